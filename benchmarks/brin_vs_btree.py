@@ -0,0 +1,150 @@
+"""Compare BRIN and B-tree indices on the fact table date columns.
+
+Loads a bundled synthetic dataset into a scratch schema, then for every date and
+datetime column covered by the BRIN index profile builds a B-tree and a BRIN index
+in turn, recording build time, index size and the latency of a date range query.
+
+Usage:
+    python benchmarks/brin_vs_btree.py --synthetic-number 1001
+
+Connection settings are read from the usual DB_HOST, DB_PORT, DB_USER, DB_PASSWORD
+and DB_NAME environment variables. The scratch schema is dropped afterwards.
+"""
+
+import argparse
+import statistics
+import time
+from importlib.resources import files
+from typing import Optional
+
+from rich.console import Console
+from rich.table import Table
+from sqlalchemy import text
+
+from omop_lite.db import create_database
+from omop_lite.db.scripts import parse_index, split_statements
+from omop_lite.settings import Settings
+
+console = Console()
+
+
+def _timed(connection, sql: str, params: Optional[dict] = None) -> float:
+    start = time.perf_counter()
+    connection.execute(text(sql), params or {})
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--synthetic-number", type=int, default=1001)
+    parser.add_argument("--schema-name", default="bench_brin")
+    parser.add_argument("--repeat", type=int, default=20, help="Query repetitions")
+    parser.add_argument(
+        "--fraction", type=float, default=0.05, help="Share of the date range queried"
+    )
+    args = parser.parse_args()
+
+    settings = Settings(
+        synthetic=True,
+        synthetic_number=args.synthetic_number,
+        schema_name=args.schema_name,
+        dialect="postgresql",
+    )
+    db = create_database(settings)
+    db.create_schema(settings.schema_name)
+    try:
+        db.create_tables()
+        db.load_data()
+        db.add_primary_keys()
+
+        script = files(f"omop_lite.scripts.pg.{settings.omop_version}").joinpath(
+            "indices_brin.sql"
+        )
+        columns = [
+            (index.table, index.columns[0])
+            for statement in split_statements(script.read_text())
+            if (index := parse_index(statement)) is not None
+        ]
+
+        results = Table(title=f"BRIN vs B-tree, synthetic {args.synthetic_number}")
+        for column in (
+            "Table",
+            "Column",
+            "Rows",
+            "Correlation",
+            "Method",
+            "Build (ms)",
+            "Size (kB)",
+            "Query p50 (ms)",
+        ):
+            results.add_column(column)
+
+        with db.engine.connect() as connection:
+            for table, column in columns:
+                qualified = f"{settings.schema_name}.{table}"
+                connection.execute(text(f"ANALYZE {qualified}"))
+                rows, low, high = connection.execute(
+                    text(
+                        f"SELECT count(*), min({column}), max({column}) FROM {qualified}"
+                    )
+                ).one()
+                if not rows or low is None:
+                    console.print(f"[dim]Skipping {table}.{column}: no data[/dim]")
+                    continue
+                correlation = connection.execute(
+                    text(
+                        "SELECT correlation FROM pg_stats "
+                        "WHERE schemaname = :schema AND tablename = :table "
+                        "AND attname = :column"
+                    ),
+                    {"schema": settings.schema_name, "table": table, "column": column},
+                ).scalar()
+                upper = low + (high - low) * args.fraction
+                query = (
+                    f"SELECT count(*) FROM {qualified} "
+                    f"WHERE {column} BETWEEN :low AND :high"
+                )
+
+                for method in ("btree", "brin"):
+                    name = f"bench_{table}_{column}_{method}"
+                    build = _timed(
+                        connection,
+                        f"CREATE INDEX {name} ON {qualified} USING {method} ({column})",
+                    )
+                    connection.commit()
+                    connection.execute(text(f"ANALYZE {qualified}"))
+                    size = connection.execute(
+                        text("SELECT pg_relation_size(:index)"),
+                        {"index": f"{settings.schema_name}.{name}"},
+                    ).scalar()
+
+                    # Force the index to be used so the two methods are compared directly
+                    connection.execute(text("SET enable_seqscan = off"))
+                    latencies = [
+                        _timed(connection, query, {"low": low, "high": upper})
+                        for _ in range(args.repeat)
+                    ]
+                    connection.execute(text("RESET enable_seqscan"))
+                    connection.execute(
+                        text(f"DROP INDEX {settings.schema_name}.{name}")
+                    )
+                    connection.commit()
+
+                    results.add_row(
+                        table,
+                        column,
+                        str(rows),
+                        f"{correlation:.2f}" if correlation is not None else "-",
+                        method,
+                        f"{build * 1000:.1f}",
+                        f"{size / 1024:.0f}",
+                        f"{statistics.median(latencies) * 1000:.2f}",
+                    )
+
+        console.print(results)
+    finally:
+        db.drop_schema(settings.schema_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Report the bytes per row the compact DDL profile saves on the synthetic datasets.
+
+For every table with data, estimates the average heap tuple size of its rows under
+the default column order and under the compact profile, with and without type
+narrowing. With --measure the rows are also loaded into two scratch schemas, one
+per layout, and the sizes Postgres reports with pg_column_size are compared.
+
+Usage:
+    python benchmarks/compact_ddl.py
+    python benchmarks/compact_ddl.py --synthetic-number 1001 --measure
+
+Connection settings for --measure are read from the usual DB_HOST, DB_PORT,
+DB_USER, DB_PASSWORD and DB_NAME environment variables. The scratch schemas are
+dropped afterwards.
+"""
+
+import argparse
+import csv
+from importlib.resources import files
+
+from rich.console import Console
+from rich.table import Table
+from sqlalchemy import text
+
+from omop_lite.db import create_database
+from omop_lite.db.layout import compact_table, row_size
+from omop_lite.db.scripts import SCHEMA_PLACEHOLDER, parse_tables
+from omop_lite.settings import Settings
+
+console = Console()
+
+
+def _rows(number: int, name: str):
+    """Yield the rows of a synthetic table as dicts, or nothing if it has no file."""
+    data = files(f"omop_lite.synthetic.{number}").joinpath(f"{name.upper()}.csv")
+    if not data.is_file():
+        return
+    if number in (1000, 1001):
+        dialect = {"delimiter": ",", "quotechar": '"'}
+    else:
+        dialect = {"delimiter": "\t", "quoting": csv.QUOTE_NONE}
+    with data.open(newline="") as f:
+        reader = csv.reader(f, **dialect)
+        header = [column.strip().lower() for column in next(reader)]
+        for row in reader:
+            yield dict(zip(header, row))
+
+
+def estimate(number: int, version: str) -> Table:
+    ddl = files(f"omop_lite.scripts.pg.{version}").joinpath("ddl.sql").read_text()
+    tables = parse_tables(ddl.replace(SCHEMA_PLACEHOLDER, "cdm"))
+
+    report = Table(title=f"Estimated bytes per row, synthetic {number}")
+    for column in (
+        "Table",
+        "Rows",
+        "Default",
+        "Compact",
+        "Compact + narrow",
+        "Saved",
+        "Saved %",
+    ):
+        report.add_column(column)
+
+    total_rows = total_default = total_narrow = 0
+    for table in tables:
+        compact = compact_table(table).columns
+        narrow = compact_table(table, narrow=True).columns
+        rows = default_size = compact_size = narrow_size = 0
+        for values in _rows(number, table.name):
+            rows += 1
+            default_size += row_size(table.columns, values)
+            compact_size += row_size(compact, values)
+            narrow_size += row_size(narrow, values)
+        if not rows:
+            continue
+
+        saved = (default_size - narrow_size) / rows
+        report.add_row(
+            table.name,
+            str(rows),
+            f"{default_size / rows:.1f}",
+            f"{compact_size / rows:.1f}",
+            f"{narrow_size / rows:.1f}",
+            f"{saved:.1f}",
+            f"{100 * (default_size - narrow_size) / default_size:.1f}",
+        )
+        total_rows += rows
+        total_default += default_size
+        total_narrow += narrow_size
+
+    if total_rows:
+        report.add_row(
+            "[bold]all[/bold]",
+            str(total_rows),
+            f"{total_default / total_rows:.1f}",
+            "",
+            f"{total_narrow / total_rows:.1f}",
+            f"{(total_default - total_narrow) / total_rows:.1f}",
+            f"{100 * (total_default - total_narrow) / total_default:.1f}",
+        )
+    return report
+
+
+def measure(number: int, version: str, narrow: bool) -> Table:
+    report = Table(title=f"Measured bytes per row, synthetic {number}")
+    for column in ("Table", "Rows", "Default", "Compact", "Saved"):
+        report.add_column(column)
+
+    sizes: dict[str, dict[str, tuple[int, float]]] = {}
+    for profile in ("default", "compact"):
+        settings = Settings(
+            synthetic=True,
+            synthetic_number=number,
+            omop_version=version,
+            schema_name=f"bench_{profile}",
+            dialect="postgresql",
+            ddl_profile=profile,
+            narrow_types=narrow,
+        )
+        db = create_database(settings)
+        db.create_schema(settings.schema_name)
+        try:
+            db.create_tables()
+            db.load_data()
+            with db.engine.connect() as connection:
+                for table in db.omop_tables:
+                    rows, size = connection.execute(
+                        text(
+                            f"SELECT count(*), avg(pg_column_size(t.*)) "
+                            f"FROM {settings.schema_name}.{table.lower()} t"
+                        )
+                    ).one()
+                    if rows:
+                        sizes.setdefault(table.lower(), {})[profile] = (rows, size)
+        finally:
+            db.drop_schema(settings.schema_name)
+
+    for table, by_profile in sizes.items():
+        rows, default_size = by_profile["default"]
+        _, compact_size = by_profile["compact"]
+        report.add_row(
+            table,
+            str(rows),
+            f"{default_size:.1f}",
+            f"{compact_size:.1f}",
+            f"{default_size - compact_size:.1f}",
+        )
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--synthetic-number", type=int, action="append", choices=[100, 1000, 1001]
+    )
+    parser.add_argument("--omop-version", default="omop5_4")
+    parser.add_argument(
+        "--measure", action="store_true", help="Also load the data and measure it"
+    )
+    parser.add_argument(
+        "--no-narrow", action="store_true", help="Measure without type narrowing"
+    )
+    args = parser.parse_args()
+
+    for number in args.synthetic_number or [100, 1000, 1001]:
+        console.print(estimate(number, args.omop_version))
+        if args.measure:
+            console.print(measure(number, args.omop_version, not args.no_narrow))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Compare pglz and LZ4 compression of the NOTE text columns.
+
+Generates a NOTE file of clinical-style free text, then for each compression
+method loads it into a scratch schema, recording load throughput, the total size
+of the table with its TOAST storage, and the time to read every note back.
+
+Usage:
+    python benchmarks/text_compression.py --notes 20000
+    python benchmarks/text_compression.py --toast-tuple-target 4080
+
+Connection settings are read from the usual DB_HOST, DB_PORT, DB_USER, DB_PASSWORD
+and DB_NAME environment variables. LZ4 needs PostgreSQL 14 or later built with
+lz4. The scratch schemas are dropped afterwards.
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from rich.console import Console
+from rich.table import Table
+from sqlalchemy import text
+
+from omop_lite.db import create_database
+from omop_lite.settings import Settings
+
+console = Console()
+
+WORDS = (
+    "patient presents with history of hypertension diabetes mellitus type chronic "
+    "kidney disease stage denies chest pain shortness of breath reports fatigue "
+    "blood pressure heart rate normal sinus rhythm lungs clear to auscultation "
+    "bilaterally abdomen soft non tender follow up in weeks continue current "
+    "medication metformin lisinopril atorvastatin aspirin daily assessment plan"
+).split()
+
+COLUMNS = (
+    "note_id",
+    "person_id",
+    "note_date",
+    "note_type_concept_id",
+    "note_class_concept_id",
+    "note_text",
+    "encoding_concept_id",
+    "language_concept_id",
+)
+
+
+def write_notes(path: Path, notes: int, words: int, seed: int) -> int:
+    """Write a NOTE file of generated notes, returning its size in bytes."""
+    rng = random.Random(seed)
+    with path.open("w") as f:
+        f.write("\t".join(COLUMNS) + "\n")
+        for note_id in range(1, notes + 1):
+            body = " ".join(
+                rng.choice(WORDS) for _ in range(rng.randint(words // 2, words))
+            )
+            f.write(
+                f"{note_id}\t{rng.randint(1, notes // 10 + 1)}\t2020-01-01\t"
+                f"32817\t44814637\t{body}\t32678\t4180186\n"
+            )
+    return path.stat().st_size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notes", type=int, default=20000)
+    parser.add_argument("--words", type=int, default=1500, help="Maximum words a note")
+    parser.add_argument("--toast-tuple-target", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    results = Table(title=f"NOTE text compression, {args.notes} notes")
+    for column in ("Method", "Load (s)", "Load (MB/s)", "Size (MB)", "Read (s)"):
+        results.add_column(column)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        data = Path(data_dir) / "NOTE.csv"
+        size = write_notes(data, args.notes, args.words, args.seed)
+
+        for method in ("pglz", "lz4"):
+            settings = Settings(
+                data_dir=data_dir,
+                schema_name=f"bench_{method}",
+                dialect="postgresql",
+                text_compression=method,
+                toast_tuple_target=args.toast_tuple_target,
+            )
+            db = create_database(settings)
+            db.create_schema(settings.schema_name)
+            try:
+                db.create_tables()
+                start = time.perf_counter()
+                db._bulk_load("note", data)
+                load = time.perf_counter() - start
+
+                with db.engine.connect() as connection:
+                    total = connection.execute(
+                        text("SELECT pg_total_relation_size(:table)"),
+                        {"table": f"{settings.schema_name}.note"},
+                    ).scalar()
+                    # Reading the length detoasts and decompresses every note
+                    start = time.perf_counter()
+                    connection.execute(
+                        text(
+                            f"SELECT sum(length(note_text)) "
+                            f"FROM {settings.schema_name}.note"
+                        )
+                    ).scalar()
+                    read = time.perf_counter() - start
+            finally:
+                db.drop_schema(settings.schema_name)
+
+            results.add_row(
+                method,
+                f"{load:.2f}",
+                f"{size / load / 1e6:.1f}",
+                f"{total / 1e6:.1f}",
+                f"{read:.2f}",
+            )
+
+    console.print(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,8 @@ from .database import (
     add_foreign_keys_command,
     add_indices_command,
     drop_command,
+    refresh_command,
+    index_report_command,
 )
 from .help import help_commands_command
 
@@ -21,5 +23,7 @@ __all__ = [
     "add_foreign_keys_command",
     "add_indices_command",
     "drop_command",
+    "refresh_command",
+    "index_report_command",
     "help_commands_command",
 ]
@@ -8,6 +8,8 @@ from .add_primary_keys import add_primary_keys_command
 from .add_foreign_keys import add_foreign_keys_command
 from .add_indices import add_indices_command
 from .drop import drop_command
+from .refresh import refresh_command
+from .index_report import index_report_command
 
 __all__ = [
     "test_command",
@@ -18,4 +20,6 @@ __all__ = [
     "add_foreign_keys_command",
     "add_indices_command",
     "drop_command",
+    "refresh_command",
+    "index_report_command",
 ]
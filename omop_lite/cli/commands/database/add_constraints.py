@@ -1,5 +1,7 @@
 """Add all constraints (primary keys, foreign keys, and indices)."""
 
+from typing import Literal
+
 import typer
 from rich.console import Console
 from rich.progress import (
@@ -12,7 +14,7 @@ from rich.progress import (
 from rich.panel import Panel
 
 from omop_lite.db import create_database
-from ...utils import _create_settings
+from ...utils import _create_settings, _failure_summary
 
 console = Console()
 
@@ -50,6 +52,42 @@ def add_constraints_command() -> typer.Typer:
         log_level: str = typer.Option(
             "INFO", "--log-level", envvar="LOG_LEVEL", help="Logging level"
         ),
+        skip_redundant_indices: bool = typer.Option(
+            False,
+            "--skip-redundant-indices/--no-skip-redundant-indices",
+            envvar="SKIP_REDUNDANT_INDICES",
+            help="Skip indices already covered by another index or key",
+        ),
+        online_indices: bool = typer.Option(
+            False,
+            "--online/--offline",
+            envvar="ONLINE_INDICES",
+            help="Build indices without blocking writes (CREATE INDEX CONCURRENTLY, ONLINE = ON)",
+        ),
+        index_profile: Literal["default", "brin"] = typer.Option(
+            "default",
+            "--index-profile",
+            envvar="INDEX_PROFILE",
+            help="Index profile (default or brin)",
+        ),
+        index_retries: int = typer.Option(
+            2,
+            "--index-retries",
+            envvar="INDEX_RETRIES",
+            help="Retries for a failed online index build",
+        ),
+        index_workers: int = typer.Option(
+            1,
+            "--index-workers",
+            envvar="INDEX_WORKERS",
+            help="Tables or partitions indexed at once",
+        ),
+        adaptive_workers: bool = typer.Option(
+            False,
+            "--adaptive-workers/--no-adaptive-workers",
+            envvar="ADAPTIVE_WORKERS",
+            help="Tune the number of workers while running, up to the workers set",
+        ),
     ) -> None:
         """
         Add all constraints (primary keys, foreign keys, and indices).
@@ -66,6 +104,12 @@ def add_constraints_command() -> typer.Typer:
             schema_name=schema_name,
             dialect=dialect,
             log_level=log_level,
+            skip_redundant_indices=skip_redundant_indices,
+            online_indices=online_indices,
+            index_profile=index_profile,
+            index_retries=index_retries,
+            index_workers=index_workers,
+            adaptive_workers=adaptive_workers,
         )
 
         db = create_database(settings)
@@ -78,22 +122,21 @@ def add_constraints_command() -> typer.Typer:
             TaskProgressColumn(),
             console=console,
         ) as progress:
-            task = progress.add_task("[green]Adding constraints...", total=3)
-
-            # Primary keys
-            progress.update(task, description="[cyan]Adding primary keys...")
-            db.add_primary_keys()
-            progress.advance(task)
+            task = progress.add_task("[green]Adding constraints...", total=1)
+            # Primary keys, then foreign keys, then indices, on every target too
+            failed = db.add_all_constraints()
+            progress.update(task, completed=1)
 
-            # Foreign keys
-            progress.update(task, description="[cyan]Adding foreign key constraints...")
-            db.add_constraints()
-            progress.advance(task)
-
-            # Indices
-            progress.update(task, description="[cyan]Adding indices...")
-            db.add_indices()
-            progress.advance(task)
+        failures = _failure_summary(failed_constraints=failed)
+        if failures:
+            console.print(
+                Panel(
+                    f"[bold red]❌ Adding constraints failed[/bold red]\n\n[red]{failures}[/red]",
+                    title="💥 Constraints Failed",
+                    border_style="red",
+                )
+            )
+            raise typer.Exit(1)
 
         console.print(
             Panel(
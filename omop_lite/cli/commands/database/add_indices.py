@@ -1,5 +1,7 @@
 """Add only indices to existing tables."""
 
+from typing import Literal
+
 import typer
 
 from omop_lite.db import create_database
@@ -39,6 +41,42 @@ def add_indices_command() -> typer.Typer:
         log_level: str = typer.Option(
             "INFO", "--log-level", envvar="LOG_LEVEL", help="Logging level"
         ),
+        skip_redundant_indices: bool = typer.Option(
+            False,
+            "--skip-redundant-indices/--no-skip-redundant-indices",
+            envvar="SKIP_REDUNDANT_INDICES",
+            help="Skip indices already covered by another index or key",
+        ),
+        online_indices: bool = typer.Option(
+            False,
+            "--online/--offline",
+            envvar="ONLINE_INDICES",
+            help="Build indices without blocking writes (CREATE INDEX CONCURRENTLY, ONLINE = ON)",
+        ),
+        index_profile: Literal["default", "brin"] = typer.Option(
+            "default",
+            "--index-profile",
+            envvar="INDEX_PROFILE",
+            help="Index profile (default or brin)",
+        ),
+        index_retries: int = typer.Option(
+            2,
+            "--index-retries",
+            envvar="INDEX_RETRIES",
+            help="Retries for a failed online index build",
+        ),
+        index_workers: int = typer.Option(
+            1,
+            "--index-workers",
+            envvar="INDEX_WORKERS",
+            help="Tables or partitions indexed at once",
+        ),
+        adaptive_workers: bool = typer.Option(
+            False,
+            "--adaptive-workers/--no-adaptive-workers",
+            envvar="ADAPTIVE_WORKERS",
+            help="Tune the number of workers while running, up to the workers set",
+        ),
     ) -> None:
         """
         Add only indices to existing tables.
@@ -55,6 +93,12 @@ def add_indices_command() -> typer.Typer:
             schema_name=schema_name,
             dialect=dialect,
             log_level=log_level,
+            skip_redundant_indices=skip_redundant_indices,
+            online_indices=online_indices,
+            index_profile=index_profile,
+            index_retries=index_retries,
+            index_workers=index_workers,
+            adaptive_workers=adaptive_workers,
         )
 
         logger = _setup_logging(settings)
@@ -1,5 +1,7 @@
 """Create only the database tables."""
 
+from typing import Literal, Optional
+
 import typer
 
 from omop_lite.db import create_database
@@ -39,6 +41,72 @@ def create_tables_command() -> typer.Typer:
         log_level: str = typer.Option(
             "INFO", "--log-level", envvar="LOG_LEVEL", help="Logging level"
         ),
+        ddl_profile: Literal["default", "compact"] = typer.Option(
+            "default",
+            "--ddl-profile",
+            envvar="DDL_PROFILE",
+            help="DDL profile (default or compact)",
+        ),
+        narrow_types: bool = typer.Option(
+            False,
+            "--narrow-types/--no-narrow-types",
+            envvar="NARROW_TYPES",
+            help="Narrow low-cardinality code columns in the compact DDL profile",
+        ),
+        load_profile: Optional[str] = typer.Option(
+            None,
+            "--load-profile",
+            envvar="LOAD_PROFILE",
+            help="TOML file of the columns to drop or null out, per table",
+        ),
+        text_compression: Literal["default", "pglz", "lz4"] = typer.Option(
+            "default",
+            "--text-compression",
+            envvar="TEXT_COMPRESSION",
+            help="Compression of the NOTE and NOTE_NLP text columns (default, pglz or lz4)",
+        ),
+        toast_tuple_target: Optional[int] = typer.Option(
+            None,
+            "--toast-tuple-target",
+            envvar="TOAST_TUPLE_TARGET",
+            help="Row size in bytes above which NOTE and NOTE_NLP values are toasted",
+        ),
+        fillfactor: Optional[int] = typer.Option(
+            None,
+            "--fillfactor",
+            envvar="FILLFACTOR",
+            help="Fillfactor of the tables, 10 to 100",
+        ),
+        partitioning: Literal["none", "hash", "range"] = typer.Option(
+            "none",
+            "--partitioning",
+            envvar="PARTITIONING",
+            help="Partition the clinical event tables (none, hash or range)",
+        ),
+        partition_count: int = typer.Option(
+            8,
+            "--partition-count",
+            envvar="PARTITION_COUNT",
+            help="Number of hash partitions per table",
+        ),
+        partition_start_year: int = typer.Option(
+            2000,
+            "--partition-start-year",
+            envvar="PARTITION_START_YEAR",
+            help="First year with its own range partition",
+        ),
+        partition_end_year: int = typer.Option(
+            2030,
+            "--partition-end-year",
+            envvar="PARTITION_END_YEAR",
+            help="Last year with its own range partition",
+        ),
+        distributed: bool = typer.Option(
+            False,
+            "--distributed/--no-distributed",
+            envvar="DISTRIBUTED",
+            help="Distribute the tables over a Citus cluster as the ddl.sql hints say",
+        ),
     ) -> None:
         """
         Create only the database tables.
@@ -55,6 +123,17 @@ def create_tables_command() -> typer.Typer:
             schema_name=schema_name,
             dialect=dialect,
             log_level=log_level,
+            ddl_profile=ddl_profile,
+            narrow_types=narrow_types,
+            load_profile=load_profile,
+            text_compression=text_compression,
+            toast_tuple_target=toast_tuple_target,
+            fillfactor=fillfactor,
+            partitioning=partitioning,
+            partition_count=partition_count,
+            partition_start_year=partition_start_year,
+            partition_end_year=partition_end_year,
+            distributed=distributed,
         )
 
         logger = _setup_logging(settings)
@@ -0,0 +1,112 @@
+"""Report indices that are covered by another index or key."""
+
+from typing import Literal
+
+import typer
+from rich.console import Console
+from rich.panel import Panel
+from rich.table import Table
+
+from omop_lite.db import create_database
+from ...utils import _create_settings
+
+console = Console()
+
+
+def index_report_command() -> typer.Typer:
+    """Report indices that are covered by another index or key."""
+    app = typer.Typer()
+
+    @app.callback(invoke_without_command=True)
+    def index_report(
+        db_host: str = typer.Option(
+            "db", "--db-host", "-h", envvar="DB_HOST", help="Database host"
+        ),
+        db_port: int = typer.Option(
+            5432, "--db-port", "-p", envvar="DB_PORT", help="Database port"
+        ),
+        db_user: str = typer.Option(
+            "postgres", "--db-user", "-u", envvar="DB_USER", help="Database user"
+        ),
+        db_password: str = typer.Option(
+            "password", "--db-password", envvar="DB_PASSWORD", help="Database password"
+        ),
+        db_name: str = typer.Option(
+            "omop", "--db-name", "-d", envvar="DB_NAME", help="Database name"
+        ),
+        schema_name: str = typer.Option(
+            "public", "--schema-name", envvar="SCHEMA_NAME", help="Database schema name"
+        ),
+        dialect: Literal["postgresql", "mssql"] = typer.Option(
+            "postgresql",
+            "--dialect",
+            envvar="DIALECT",
+            help="Database dialect (postgresql or mssql)",
+        ),
+        log_level: str = typer.Option(
+            "INFO", "--log-level", envvar="LOG_LEVEL", help="Logging level"
+        ),
+        include_catalog: bool = typer.Option(
+            True,
+            "--catalog/--no-catalog",
+            help="Also compare against the indices that exist in the database",
+        ),
+    ) -> None:
+        """
+        Report indices that are covered by another index or key.
+
+        This command compares the primary key, constraint and index scripts,
+        and the indices already in the database, and lists the indices that
+        `add-indices --skip-redundant-indices` would not build.
+        """
+        settings = _create_settings(
+            db_host=db_host,
+            db_port=db_port,
+            db_user=db_user,
+            db_password=db_password,
+            db_name=db_name,
+            schema_name=schema_name,
+            dialect=dialect,
+            log_level=log_level,
+        )
+
+        db = create_database(settings)
+        redundant = db.index_report(include_catalog=include_catalog)
+
+        if not redundant:
+            console.print(
+                Panel(
+                    "[bold green]✅ No redundant indices found[/bold green]",
+                    title="🔍 Index Report",
+                    border_style="green",
+                )
+            )
+            return
+
+        table = Table(title="Redundant Indices")
+        table.add_column("Index", style="cyan", no_wrap=True)
+        table.add_column("Table", style="white")
+        table.add_column("Columns", style="white")
+        table.add_column("Covered By", style="green")
+        table.add_column("Reason", style="dim")
+
+        for entry in redundant:
+            table.add_row(
+                entry.index.name,
+                entry.index.table,
+                ", ".join(entry.index.columns),
+                f"{entry.covered_by.name} ({entry.covered_by.source})",
+                entry.reason,
+            )
+
+        console.print(table)
+        console.print(
+            Panel(
+                f"[bold yellow]{len(redundant)} redundant indices[/bold yellow]\n\n"
+                "[dim]Use add-indices --skip-redundant-indices to skip them[/dim]",
+                title="🔍 Index Report",
+                border_style="yellow",
+            )
+        )
+
+    return app
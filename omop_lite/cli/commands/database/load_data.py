@@ -1,5 +1,7 @@
 """Load data into existing tables."""
 
+from typing import Literal, Optional
+
 import typer
 from rich.console import Console
 from rich.progress import (
@@ -12,7 +14,7 @@ from rich.progress import (
 from rich.panel import Panel
 
 from omop_lite.db import create_database
-from ...utils import _create_settings
+from ...utils import _create_settings, _failure_summary
 
 console = Console()
 
@@ -68,13 +70,207 @@ def load_data_command() -> typer.Typer:
         delimiter: str = typer.Option(
             "\t", "--delimiter", envvar="DELIMITER", help="CSV delimiter"
         ),
+        load_workers: int = typer.Option(
+            1,
+            "--load-workers",
+            envvar="LOAD_WORKERS",
+            help="Tables, or COPY streams into a partitioned table, loaded at once",
+        ),
+        load_engine: Literal["sync", "async"] = typer.Option(
+            "sync",
+            "--load-engine",
+            envvar="LOAD_ENGINE",
+            help="Load on threads, or on one event loop with psycopg 3 (sync or async)",
+        ),
+        adaptive_workers: bool = typer.Option(
+            False,
+            "--adaptive-workers/--no-adaptive-workers",
+            envvar="ADAPTIVE_WORKERS",
+            help="Tune the number of workers while running, up to the workers set",
+        ),
+        targets: Optional[str] = typer.Option(
+            None,
+            "--targets",
+            envvar="TARGETS",
+            help="Comma-separated postgresql:// URLs of more databases to load the same data into",
+        ),
+        suspend_autovacuum: bool = typer.Option(
+            False,
+            "--suspend-autovacuum/--no-suspend-autovacuum",
+            envvar="SUSPEND_AUTOVACUUM",
+            help="Turn autovacuum off during the load and run VACUUM (ANALYZE) afterwards",
+        ),
+        server_side_copy: bool = typer.Option(
+            False,
+            "--server-side-copy/--client-side-copy",
+            envvar="SERVER_SIDE_COPY",
+            help="Have the server read the data files directly when it can",
+        ),
+        server_data_dir: Optional[str] = typer.Option(
+            None,
+            "--server-data-dir",
+            envvar="SERVER_DATA_DIR",
+            help="Path at which the database server sees the data directory",
+        ),
+        part_pattern: str = typer.Option(
+            "{table}/*.csv",
+            "--part-pattern",
+            envvar="PART_PATTERN",
+            help="Part files of a table without a single <TABLE>.csv, {table} for its name",
+        ),
+        part_headers: bool = typer.Option(
+            True,
+            "--part-headers/--no-part-headers",
+            envvar="PART_HEADERS",
+            help="Whether each part file starts with a header",
+        ),
+        load_retries: int = typer.Option(
+            2,
+            "--load-retries",
+            envvar="LOAD_RETRIES",
+            help="Retries for a data file that failed to load",
+        ),
+        load_state_file: Optional[str] = typer.Option(
+            None,
+            "--load-state-file",
+            envvar="LOAD_STATE_FILE",
+            help="JSON file recording loaded files, so a rerun skips them",
+        ),
+        normalise_dates: bool = typer.Option(
+            False,
+            "--normalise-dates/--no-normalise-dates",
+            envvar="NORMALISE_DATES",
+            help="Rewrite YYYYMMDD vocabulary dates as ISO dates while loading",
+        ),
+        commit_rows: Optional[int] = typer.Option(
+            None,
+            "--commit-rows",
+            envvar="COMMIT_ROWS",
+            help="Commit each file in chunks of this many rows, resuming from the last on failure",
+        ),
+        commit_bytes: Optional[int] = typer.Option(
+            None,
+            "--commit-bytes",
+            envvar="COMMIT_BYTES",
+            help="Commit each file in chunks of about this many bytes",
+        ),
+        on_error: Literal["skip", "quarantine"] = typer.Option(
+            "skip",
+            "--on-error",
+            envvar="ON_ERROR",
+            help="On a bad row, skip the file or quarantine the row and load the rest (skip or quarantine)",
+        ),
+        reject_file: str = typer.Option(
+            "rejects.csv",
+            "--reject-file",
+            envvar="REJECT_FILE",
+            help="CSV file quarantined rows are written to, with line and reason",
+        ),
+        load_profile: Optional[str] = typer.Option(
+            None,
+            "--load-profile",
+            envvar="LOAD_PROFILE",
+            help="TOML file of the columns to drop or null out, per table",
+        ),
+        sample_persons: Optional[float] = typer.Option(
+            None,
+            "--sample-persons",
+            envvar="SAMPLE_PERSONS",
+            help="Load this fraction of persons (0 to 1], picked by a hash of person_id",
+        ),
+        person_ids_file: Optional[str] = typer.Option(
+            None,
+            "--person-ids",
+            envvar="PERSON_IDS_FILE",
+            help="File of the person ids to load, one per line",
+        ),
+        prune_vocabulary: bool = typer.Option(
+            False,
+            "--prune-vocabulary/--full-vocabulary",
+            envvar="PRUNE_VOCABULARY",
+            help="Load only the concepts the loaded rows refer to",
+        ),
+        throttle_mb_per_second: Optional[float] = typer.Option(
+            None,
+            "--throttle-mbps",
+            envvar="THROTTLE_MB_PER_SECOND",
+            help="Cap on the data loaded per second across all workers, in MB",
+        ),
+        throttle_rows_per_second: Optional[int] = typer.Option(
+            None,
+            "--throttle-rows",
+            envvar="THROTTLE_ROWS_PER_SECOND",
+            help="Cap on the rows loaded per second across all workers",
+        ),
+        adaptive_throttle: bool = typer.Option(
+            False,
+            "--adaptive-throttle/--no-adaptive-throttle",
+            envvar="ADAPTIVE_THROTTLE",
+            help="Slow the load down while the server lags or waits on I/O (PostgreSQL only)",
+        ),
+        max_replication_lag: float = typer.Option(
+            10.0,
+            "--max-replication-lag",
+            envvar="MAX_REPLICATION_LAG",
+            help="Replication lag in seconds above which the adaptive throttle backs off",
+        ),
+        read_ahead_buffers: int = typer.Option(
+            4,
+            "--read-ahead-buffers",
+            envvar="READ_AHEAD_BUFFERS",
+            help="Buffers each loader reads ahead of the database, 0 to read as it sends",
+        ),
+        read_buffer_size: int = typer.Option(
+            1 << 20,
+            "--read-buffer-size",
+            envvar="READ_BUFFER_SIZE",
+            help="Characters read into each read-ahead buffer",
+        ),
+        convert_workers: int = typer.Option(
+            1,
+            "--convert-workers",
+            envvar="CONVERT_WORKERS",
+            help="Processes transforming files for COPY, 1 to transform in the loader (PostgreSQL only)",
+        ),
+        s3_endpoint_url: Optional[str] = typer.Option(
+            None,
+            "--s3-endpoint-url",
+            envvar="S3_ENDPOINT_URL",
+            help="Endpoint of an S3-compatible store, such as MinIO, for an s3:// data directory",
+        ),
+        s3_part_size: int = typer.Option(
+            8 << 20,
+            "--s3-part-size",
+            envvar="S3_PART_SIZE",
+            help="Bytes fetched per ranged GET from S3",
+        ),
+        s3_read_ahead: int = typer.Option(
+            4,
+            "--s3-read-ahead",
+            envvar="S3_READ_AHEAD",
+            help="Ranges fetched ahead of the reader from S3",
+        ),
+        table: Optional[str] = typer.Option(
+            None, "--table", help="Load only this table"
+        ),
+        file: Optional[str] = typer.Option(
+            None,
+            "--file",
+            help="File to load the table from, a named pipe, or - for standard input",
+        ),
     ) -> None:
         """
         Load data into existing tables.
 
         This command loads data into tables that must already exist.
         Use create-tables first if tables don't exist.
+
+        With --table only that table is loaded, from --file if given, which can be
+        a named pipe or - to stream the data in on standard input.
         """
+        if file is not None and table is None:
+            raise typer.BadParameter("--file needs --table", param_hint="--file")
+
         settings = _create_settings(
             db_host=db_host,
             db_port=db_port,
@@ -88,6 +284,36 @@ def load_data_command() -> typer.Typer:
             dialect=dialect,
             log_level=log_level,
             delimiter=delimiter,
+            load_workers=load_workers,
+            load_engine=load_engine,
+            adaptive_workers=adaptive_workers,
+            targets=targets,
+            suspend_autovacuum=suspend_autovacuum,
+            server_side_copy=server_side_copy,
+            server_data_dir=server_data_dir,
+            part_pattern=part_pattern,
+            part_headers=part_headers,
+            load_retries=load_retries,
+            load_state_file=load_state_file,
+            normalise_dates=normalise_dates,
+            commit_rows=commit_rows,
+            commit_bytes=commit_bytes,
+            on_error=on_error,
+            reject_file=reject_file,
+            load_profile=load_profile,
+            sample_persons=sample_persons,
+            person_ids_file=person_ids_file,
+            prune_vocabulary=prune_vocabulary,
+            throttle_mb_per_second=throttle_mb_per_second,
+            throttle_rows_per_second=throttle_rows_per_second,
+            adaptive_throttle=adaptive_throttle,
+            max_replication_lag=max_replication_lag,
+            read_ahead_buffers=read_ahead_buffers,
+            read_buffer_size=read_buffer_size,
+            convert_workers=convert_workers,
+            s3_endpoint_url=s3_endpoint_url,
+            s3_part_size=s3_part_size,
+            s3_read_ahead=s3_read_ahead,
         )
 
         db = create_database(settings)
@@ -101,9 +327,24 @@ def load_data_command() -> typer.Typer:
             console=console,
         ) as progress:
             task = progress.add_task("[yellow]Loading data...", total=1)
-            db.load_data()
+            failed = []
+            if table is None:
+                failed = db.load_data()
+            else:
+                db.load_file(table, file)
             progress.update(task, completed=1)
 
+        failures = _failure_summary(failed)
+        if failures:
+            console.print(
+                Panel(
+                    f"[bold red]❌ Data loading failed[/bold red]\n\n[red]{failures}[/red]",
+                    title="💥 Data Loading Failed",
+                    border_style="red",
+                )
+            )
+            raise typer.Exit(1)
+
         console.print(
             Panel(
                 "[bold green]✅ Data loaded successfully![/bold green]",
@@ -60,7 +60,17 @@ def help_commands_command() -> typer.Typer:
             "Granular constraint control",
         )
         table.add_row("add-indices", "Add only indices", "Granular constraint control")
+        table.add_row(
+            "index-report",
+            "Report indices covered by another index or key",
+            "Review index build cost",
+        )
         table.add_row("drop", "Drop tables and/or schema", "Cleanup, reset database")
+        table.add_row(
+            "refresh",
+            "Rebuild in a shadow schema and swap it in",
+            "Reload production without downtime",
+        )
         table.add_row(
             "help-commands", "Show this help table", "Discover available commands"
         )
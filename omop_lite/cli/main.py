@@ -1,4 +1,4 @@
-from typing import Literal
+from typing import Literal, Optional
 from omop_lite.db import create_database
 from importlib.metadata import version
 import typer
@@ -12,7 +12,7 @@ from rich.progress import (
 )
 from rich.panel import Panel
 
-from .utils import _create_settings
+from .utils import _create_settings, _failure_summary
 
 console = Console()
 
@@ -33,6 +33,8 @@ from .commands import (  # noqa: E402
     add_foreign_keys_command,
     add_indices_command,
     drop_command,
+    refresh_command,
+    index_report_command,
     help_commands_command,
 )
 
@@ -44,6 +46,8 @@ app.add_typer(add_primary_keys_command(), name="add-primary-keys")
 app.add_typer(add_foreign_keys_command(), name="add-foreign-keys")
 app.add_typer(add_indices_command(), name="add-indices")
 app.add_typer(drop_command(), name="drop")
+app.add_typer(refresh_command(), name="refresh")
+app.add_typer(index_report_command(), name="index-report")
 app.add_typer(help_commands_command(), name="help-commands")
 
 
@@ -93,8 +97,8 @@ def callback(
         "omop5_4",
         "--omop_version",
         envvar="OMOP_VERSION",
-        help="Version of the OMOP CDM (omop5_4 or omop5_3)"
-        ),
+        help="Version of the OMOP CDM (omop5_4 or omop5_3)",
+    ),
     log_level: str = typer.Option(
         "INFO", "--log-level", envvar="LOG_LEVEL", help="Logging level"
     ),
@@ -107,6 +111,276 @@ def callback(
     delimiter: str = typer.Option(
         "\t", "--delimiter", envvar="DELIMITER", help="CSV delimiter"
     ),
+    skip_redundant_indices: bool = typer.Option(
+        False,
+        "--skip-redundant-indices/--no-skip-redundant-indices",
+        envvar="SKIP_REDUNDANT_INDICES",
+        help="Skip indices already covered by another index or key",
+    ),
+    online_indices: bool = typer.Option(
+        False,
+        "--online/--offline",
+        envvar="ONLINE_INDICES",
+        help="Build indices without blocking writes (CREATE INDEX CONCURRENTLY, ONLINE = ON)",
+    ),
+    index_profile: Literal["default", "brin"] = typer.Option(
+        "default",
+        "--index-profile",
+        envvar="INDEX_PROFILE",
+        help="Index profile (default or brin)",
+    ),
+    index_retries: int = typer.Option(
+        2,
+        "--index-retries",
+        envvar="INDEX_RETRIES",
+        help="Retries for a failed online index build",
+    ),
+    ddl_profile: Literal["default", "compact"] = typer.Option(
+        "default",
+        "--ddl-profile",
+        envvar="DDL_PROFILE",
+        help="DDL profile (default or compact)",
+    ),
+    narrow_types: bool = typer.Option(
+        False,
+        "--narrow-types/--no-narrow-types",
+        envvar="NARROW_TYPES",
+        help="Narrow low-cardinality code columns in the compact DDL profile",
+    ),
+    load_profile: Optional[str] = typer.Option(
+        None,
+        "--load-profile",
+        envvar="LOAD_PROFILE",
+        help="TOML file of the columns to drop or null out, per table",
+    ),
+    text_compression: Literal["default", "pglz", "lz4"] = typer.Option(
+        "default",
+        "--text-compression",
+        envvar="TEXT_COMPRESSION",
+        help="Compression of the NOTE and NOTE_NLP text columns (default, pglz or lz4)",
+    ),
+    toast_tuple_target: Optional[int] = typer.Option(
+        None,
+        "--toast-tuple-target",
+        envvar="TOAST_TUPLE_TARGET",
+        help="Row size in bytes above which NOTE and NOTE_NLP values are toasted",
+    ),
+    fillfactor: Optional[int] = typer.Option(
+        None,
+        "--fillfactor",
+        envvar="FILLFACTOR",
+        help="Fillfactor of the tables, 10 to 100",
+    ),
+    partitioning: Literal["none", "hash", "range"] = typer.Option(
+        "none",
+        "--partitioning",
+        envvar="PARTITIONING",
+        help="Partition the clinical event tables (none, hash or range)",
+    ),
+    partition_count: int = typer.Option(
+        8,
+        "--partition-count",
+        envvar="PARTITION_COUNT",
+        help="Number of hash partitions per table",
+    ),
+    partition_start_year: int = typer.Option(
+        2000,
+        "--partition-start-year",
+        envvar="PARTITION_START_YEAR",
+        help="First year with its own range partition",
+    ),
+    partition_end_year: int = typer.Option(
+        2030,
+        "--partition-end-year",
+        envvar="PARTITION_END_YEAR",
+        help="Last year with its own range partition",
+    ),
+    distributed: bool = typer.Option(
+        False,
+        "--distributed/--no-distributed",
+        envvar="DISTRIBUTED",
+        help="Distribute the tables over a Citus cluster as the ddl.sql hints say",
+    ),
+    load_workers: int = typer.Option(
+        1,
+        "--load-workers",
+        envvar="LOAD_WORKERS",
+        help="Tables, or COPY streams into a partitioned table, loaded at once",
+    ),
+    load_engine: Literal["sync", "async"] = typer.Option(
+        "sync",
+        "--load-engine",
+        envvar="LOAD_ENGINE",
+        help="Load on threads, or on one event loop with psycopg 3 (sync or async)",
+    ),
+    targets: Optional[str] = typer.Option(
+        None,
+        "--targets",
+        envvar="TARGETS",
+        help="Comma-separated postgresql:// URLs of more databases to load the same data into",
+    ),
+    suspend_autovacuum: bool = typer.Option(
+        False,
+        "--suspend-autovacuum/--no-suspend-autovacuum",
+        envvar="SUSPEND_AUTOVACUUM",
+        help="Turn autovacuum off during the load and run VACUUM (ANALYZE) afterwards",
+    ),
+    server_side_copy: bool = typer.Option(
+        False,
+        "--server-side-copy/--client-side-copy",
+        envvar="SERVER_SIDE_COPY",
+        help="Have the server read the data files directly when it can",
+    ),
+    server_data_dir: Optional[str] = typer.Option(
+        None,
+        "--server-data-dir",
+        envvar="SERVER_DATA_DIR",
+        help="Path at which the database server sees the data directory",
+    ),
+    part_pattern: str = typer.Option(
+        "{table}/*.csv",
+        "--part-pattern",
+        envvar="PART_PATTERN",
+        help="Part files of a table without a single <TABLE>.csv, {table} for its name",
+    ),
+    part_headers: bool = typer.Option(
+        True,
+        "--part-headers/--no-part-headers",
+        envvar="PART_HEADERS",
+        help="Whether each part file starts with a header",
+    ),
+    load_retries: int = typer.Option(
+        2,
+        "--load-retries",
+        envvar="LOAD_RETRIES",
+        help="Retries for a data file that failed to load",
+    ),
+    load_state_file: Optional[str] = typer.Option(
+        None,
+        "--load-state-file",
+        envvar="LOAD_STATE_FILE",
+        help="JSON file recording loaded files, so a rerun skips them",
+    ),
+    normalise_dates: bool = typer.Option(
+        False,
+        "--normalise-dates/--no-normalise-dates",
+        envvar="NORMALISE_DATES",
+        help="Rewrite YYYYMMDD vocabulary dates as ISO dates while loading",
+    ),
+    commit_rows: Optional[int] = typer.Option(
+        None,
+        "--commit-rows",
+        envvar="COMMIT_ROWS",
+        help="Commit each file in chunks of this many rows, resuming from the last on failure",
+    ),
+    commit_bytes: Optional[int] = typer.Option(
+        None,
+        "--commit-bytes",
+        envvar="COMMIT_BYTES",
+        help="Commit each file in chunks of about this many bytes",
+    ),
+    on_error: Literal["skip", "quarantine"] = typer.Option(
+        "skip",
+        "--on-error",
+        envvar="ON_ERROR",
+        help="On a bad row, skip the file or quarantine the row and load the rest (skip or quarantine)",
+    ),
+    reject_file: str = typer.Option(
+        "rejects.csv",
+        "--reject-file",
+        envvar="REJECT_FILE",
+        help="CSV file quarantined rows are written to, with line and reason",
+    ),
+    sample_persons: Optional[float] = typer.Option(
+        None,
+        "--sample-persons",
+        envvar="SAMPLE_PERSONS",
+        help="Load this fraction of persons (0 to 1], picked by a hash of person_id",
+    ),
+    person_ids_file: Optional[str] = typer.Option(
+        None,
+        "--person-ids",
+        envvar="PERSON_IDS_FILE",
+        help="File of the person ids to load, one per line",
+    ),
+    prune_vocabulary: bool = typer.Option(
+        False,
+        "--prune-vocabulary/--full-vocabulary",
+        envvar="PRUNE_VOCABULARY",
+        help="Load only the concepts the loaded rows refer to",
+    ),
+    throttle_mb_per_second: Optional[float] = typer.Option(
+        None,
+        "--throttle-mbps",
+        envvar="THROTTLE_MB_PER_SECOND",
+        help="Cap on the data loaded per second across all workers, in MB",
+    ),
+    throttle_rows_per_second: Optional[int] = typer.Option(
+        None,
+        "--throttle-rows",
+        envvar="THROTTLE_ROWS_PER_SECOND",
+        help="Cap on the rows loaded per second across all workers",
+    ),
+    adaptive_throttle: bool = typer.Option(
+        False,
+        "--adaptive-throttle/--no-adaptive-throttle",
+        envvar="ADAPTIVE_THROTTLE",
+        help="Slow the load down while the server lags or waits on I/O (PostgreSQL only)",
+    ),
+    max_replication_lag: float = typer.Option(
+        10.0,
+        "--max-replication-lag",
+        envvar="MAX_REPLICATION_LAG",
+        help="Replication lag in seconds above which the adaptive throttle backs off",
+    ),
+    read_ahead_buffers: int = typer.Option(
+        4,
+        "--read-ahead-buffers",
+        envvar="READ_AHEAD_BUFFERS",
+        help="Buffers each loader reads ahead of the database, 0 to read as it sends",
+    ),
+    read_buffer_size: int = typer.Option(
+        1 << 20,
+        "--read-buffer-size",
+        envvar="READ_BUFFER_SIZE",
+        help="Characters read into each read-ahead buffer",
+    ),
+    convert_workers: int = typer.Option(
+        1,
+        "--convert-workers",
+        envvar="CONVERT_WORKERS",
+        help="Processes transforming files for COPY, 1 to transform in the loader (PostgreSQL only)",
+    ),
+    s3_endpoint_url: Optional[str] = typer.Option(
+        None,
+        "--s3-endpoint-url",
+        envvar="S3_ENDPOINT_URL",
+        help="Endpoint of an S3-compatible store, such as MinIO, for an s3:// data directory",
+    ),
+    s3_part_size: int = typer.Option(
+        8 << 20,
+        "--s3-part-size",
+        envvar="S3_PART_SIZE",
+        help="Bytes fetched per ranged GET from S3",
+    ),
+    s3_read_ahead: int = typer.Option(
+        4,
+        "--s3-read-ahead",
+        envvar="S3_READ_AHEAD",
+        help="Ranges fetched ahead of the reader from S3",
+    ),
+    index_workers: int = typer.Option(
+        1,
+        "--index-workers",
+        envvar="INDEX_WORKERS",
+        help="Tables or partitions indexed at once",
+    ),
+    adaptive_workers: bool = typer.Option(
+        False,
+        "--adaptive-workers/--no-adaptive-workers",
+        envvar="ADAPTIVE_WORKERS",
+        help="Tune the number of workers while running, up to the workers set",
+    ),
 ) -> None:
     """
     Create the OMOP Lite database (default command).
@@ -134,6 +408,51 @@ def callback(
             log_level=log_level,
             fts_create=fts_create,
             delimiter=delimiter,
+            skip_redundant_indices=skip_redundant_indices,
+            online_indices=online_indices,
+            index_profile=index_profile,
+            index_retries=index_retries,
+            ddl_profile=ddl_profile,
+            narrow_types=narrow_types,
+            load_profile=load_profile,
+            text_compression=text_compression,
+            toast_tuple_target=toast_tuple_target,
+            fillfactor=fillfactor,
+            partitioning=partitioning,
+            partition_count=partition_count,
+            partition_start_year=partition_start_year,
+            partition_end_year=partition_end_year,
+            distributed=distributed,
+            load_workers=load_workers,
+            load_engine=load_engine,
+            targets=targets,
+            suspend_autovacuum=suspend_autovacuum,
+            server_side_copy=server_side_copy,
+            server_data_dir=server_data_dir,
+            part_pattern=part_pattern,
+            part_headers=part_headers,
+            load_retries=load_retries,
+            load_state_file=load_state_file,
+            normalise_dates=normalise_dates,
+            commit_rows=commit_rows,
+            commit_bytes=commit_bytes,
+            on_error=on_error,
+            reject_file=reject_file,
+            sample_persons=sample_persons,
+            person_ids_file=person_ids_file,
+            prune_vocabulary=prune_vocabulary,
+            throttle_mb_per_second=throttle_mb_per_second,
+            throttle_rows_per_second=throttle_rows_per_second,
+            adaptive_throttle=adaptive_throttle,
+            max_replication_lag=max_replication_lag,
+            read_ahead_buffers=read_ahead_buffers,
+            read_buffer_size=read_buffer_size,
+            convert_workers=convert_workers,
+            s3_endpoint_url=s3_endpoint_url,
+            s3_part_size=s3_part_size,
+            s3_read_ahead=s3_read_ahead,
+            index_workers=index_workers,
+            adaptive_workers=adaptive_workers,
         )
 
         # Show startup info
@@ -173,14 +492,26 @@ def callback(
 
             # Load data
             task2 = progress.add_task("[yellow]Loading data...", total=1)
-            db.load_data()
+            failed_files = db.load_data()
             progress.update(task2, completed=1)
 
             # Add constraints
             task3 = progress.add_task("[green]Adding constraints...", total=1)
-            db.add_all_constraints()
+            failed_constraints = db.add_all_constraints()
             progress.update(task3, completed=1)
 
+        failures = _failure_summary(failed_files, failed_constraints)
+        if failures:
+            console.print(
+                Panel(
+                    "[bold red]❌ OMOP Lite database created with errors[/bold red]\n\n"
+                    f"[red]{failures}[/red]",
+                    title="💥 Pipeline Failed",
+                    border_style="red",
+                )
+            )
+            raise typer.Exit(1)
+
         console.print(
             Panel(
                 "[bold green]✅ OMOP Lite database created successfully![/bold green]\n"
@@ -193,6 +524,6 @@ def callback(
         )
 
 
-def main_cli():
+def main_cli() -> None:
     """Entry point for the CLI."""
     app()
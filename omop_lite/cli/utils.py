@@ -1,8 +1,12 @@
-from typing import Literal
+from typing import Literal, Optional, Sequence
+from omop_lite.db.projection import LoadProfile
+from omop_lite.db.tee import split_targets
 from omop_lite.settings import Settings
 import logging
 import typer
+from rich.markup import escape
 from importlib.metadata import version
+from urllib.parse import urlsplit
 
 
 def _create_settings(
@@ -20,6 +24,51 @@ def _create_settings(
     log_level: str = "INFO",
     fts_create: bool = False,
     delimiter: str = "\t",
+    skip_redundant_indices: bool = False,
+    online_indices: bool = False,
+    index_profile: Literal["default", "brin"] = "default",
+    index_retries: int = 2,
+    ddl_profile: Literal["default", "compact"] = "default",
+    narrow_types: bool = False,
+    load_profile: Optional[str] = None,
+    text_compression: Literal["default", "pglz", "lz4"] = "default",
+    toast_tuple_target: Optional[int] = None,
+    fillfactor: Optional[int] = None,
+    partitioning: Literal["none", "hash", "range"] = "none",
+    partition_count: int = 8,
+    partition_start_year: int = 2000,
+    partition_end_year: int = 2030,
+    distributed: bool = False,
+    load_workers: int = 1,
+    load_engine: Literal["sync", "async"] = "sync",
+    targets: Optional[str] = None,
+    suspend_autovacuum: bool = False,
+    server_side_copy: bool = False,
+    server_data_dir: Optional[str] = None,
+    part_pattern: str = "{table}/*.csv",
+    part_headers: bool = True,
+    load_retries: int = 2,
+    load_state_file: Optional[str] = None,
+    normalise_dates: bool = False,
+    commit_rows: Optional[int] = None,
+    commit_bytes: Optional[int] = None,
+    on_error: Literal["skip", "quarantine"] = "skip",
+    reject_file: str = "rejects.csv",
+    sample_persons: Optional[float] = None,
+    person_ids_file: Optional[str] = None,
+    prune_vocabulary: bool = False,
+    throttle_mb_per_second: Optional[float] = None,
+    throttle_rows_per_second: Optional[int] = None,
+    adaptive_throttle: bool = False,
+    max_replication_lag: float = 10.0,
+    read_ahead_buffers: int = 4,
+    read_buffer_size: int = 1 << 20,
+    convert_workers: int = 1,
+    s3_endpoint_url: Optional[str] = None,
+    s3_part_size: int = 8 << 20,
+    s3_read_ahead: int = 4,
+    index_workers: int = 1,
+    adaptive_workers: bool = False,
 ) -> Settings:
     """Create settings with validation."""
     # Validate dialect
@@ -30,6 +79,73 @@ def _create_settings(
     # Validate omop_version
     if omop_version not in ["omop5_3", "omop5_4"]:
         raise typer.BadParameter("omop version must be either 'omop5_3' or 'omop5_4'")
+    if index_profile not in ["default", "brin"]:
+        raise typer.BadParameter("index profile must be either 'default' or 'brin'")
+    if ddl_profile not in ["default", "compact"]:
+        raise typer.BadParameter("DDL profile must be either 'default' or 'compact'")
+    if text_compression not in ["default", "pglz", "lz4"]:
+        raise typer.BadParameter(
+            "text compression must be either 'default', 'pglz' or 'lz4'"
+        )
+    if toast_tuple_target is not None and not 128 <= toast_tuple_target <= 8160:
+        raise typer.BadParameter("toast tuple target must be between 128 and 8160")
+    if fillfactor is not None and not 10 <= fillfactor <= 100:
+        raise typer.BadParameter("fillfactor must be between 10 and 100")
+    if partitioning not in ["none", "hash", "range"]:
+        raise typer.BadParameter(
+            "partitioning must be either 'none', 'hash' or 'range'"
+        )
+    if partition_count < 1:
+        raise typer.BadParameter("partition count must be at least 1")
+    if partition_start_year > partition_end_year:
+        raise typer.BadParameter("partition start year must not be after the end year")
+    if on_error not in ["skip", "quarantine"]:
+        raise typer.BadParameter("on error must be either 'skip' or 'quarantine'")
+    if targets:
+        if dialect != "postgresql":
+            raise typer.BadParameter("targets are only supported for postgresql")
+        if on_error == "quarantine" or commit_rows or commit_bytes:
+            raise typer.BadParameter(
+                "targets cannot be combined with quarantine or chunked commits"
+            )
+        for url in split_targets(targets):
+            if urlsplit(url).scheme not in ("postgresql", "postgres"):
+                raise typer.BadParameter(f"target {url} is not a postgresql:// URL")
+    if load_engine not in ["sync", "async"]:
+        raise typer.BadParameter("load engine must be either 'sync' or 'async'")
+    if load_engine == "async":
+        if dialect != "postgresql":
+            raise typer.BadParameter("the async load engine is only for postgresql")
+        if targets or on_error == "quarantine" or commit_rows or commit_bytes:
+            raise typer.BadParameter(
+                "the async load engine cannot be combined with targets, "
+                "quarantine or chunked commits"
+            )
+    if load_profile is not None:
+        try:
+            LoadProfile.from_file(load_profile)
+        except (OSError, ValueError) as e:
+            raise typer.BadParameter(f"load profile: {e}")
+    if sample_persons is not None and not 0 < sample_persons <= 1:
+        raise typer.BadParameter("sample persons must be above 0 and at most 1")
+    if throttle_mb_per_second is not None and throttle_mb_per_second <= 0:
+        raise typer.BadParameter("throttle MB per second must be above 0")
+    if throttle_rows_per_second is not None and throttle_rows_per_second <= 0:
+        raise typer.BadParameter("throttle rows per second must be above 0")
+    if max_replication_lag <= 0:
+        raise typer.BadParameter("max replication lag must be above 0")
+    if read_ahead_buffers < 0:
+        raise typer.BadParameter("read-ahead buffers cannot be negative")
+    if read_buffer_size <= 0:
+        raise typer.BadParameter("read buffer size must be above 0")
+    if load_workers < 1:
+        raise typer.BadParameter("load workers must be at least 1")
+    if index_workers < 1:
+        raise typer.BadParameter("index workers must be at least 1")
+    if convert_workers < 1:
+        raise typer.BadParameter("convert workers must be at least 1")
+    if load_retries < 0 or index_retries < 0:
+        raise typer.BadParameter("retries cannot be negative")
 
     return Settings(
         db_host=db_host,
@@ -46,6 +162,51 @@ def _create_settings(
         log_level=log_level,
         fts_create=fts_create,
         delimiter=delimiter,
+        skip_redundant_indices=skip_redundant_indices,
+        online_indices=online_indices,
+        index_profile=index_profile,
+        index_retries=index_retries,
+        ddl_profile=ddl_profile,
+        narrow_types=narrow_types,
+        load_profile=load_profile,
+        text_compression=text_compression,
+        toast_tuple_target=toast_tuple_target,
+        fillfactor=fillfactor,
+        partitioning=partitioning,
+        partition_count=partition_count,
+        partition_start_year=partition_start_year,
+        partition_end_year=partition_end_year,
+        distributed=distributed,
+        load_workers=load_workers,
+        load_engine=load_engine,
+        targets=targets,
+        suspend_autovacuum=suspend_autovacuum,
+        server_side_copy=server_side_copy,
+        server_data_dir=server_data_dir,
+        part_pattern=part_pattern,
+        part_headers=part_headers,
+        load_retries=load_retries,
+        load_state_file=load_state_file,
+        normalise_dates=normalise_dates,
+        commit_rows=commit_rows,
+        commit_bytes=commit_bytes,
+        on_error=on_error,
+        reject_file=reject_file,
+        sample_persons=sample_persons,
+        person_ids_file=person_ids_file,
+        prune_vocabulary=prune_vocabulary,
+        throttle_mb_per_second=throttle_mb_per_second,
+        throttle_rows_per_second=throttle_rows_per_second,
+        adaptive_throttle=adaptive_throttle,
+        max_replication_lag=max_replication_lag,
+        read_ahead_buffers=read_ahead_buffers,
+        read_buffer_size=read_buffer_size,
+        convert_workers=convert_workers,
+        s3_endpoint_url=s3_endpoint_url,
+        s3_part_size=s3_part_size,
+        s3_read_ahead=s3_read_ahead,
+        index_workers=index_workers,
+        adaptive_workers=adaptive_workers,
     )
 
 
@@ -56,3 +217,17 @@ def _setup_logging(settings: Settings) -> logging.Logger:
     logger.info(f"Starting OMOP Lite {version('omop-lite')}")
     logger.debug(f"Settings: {settings.model_dump()}")
     return logger
+
+
+def _failure_summary(
+    failed_files: Sequence[str] = (), failed_constraints: Sequence[str] = ()
+) -> Optional[str]:
+    """Describe the files and constraints that failed, or None if none did."""
+    lines = []
+    if failed_files:
+        lines.append(f"{len(failed_files)} files failed to load:")
+        lines.extend(f"• {escape(key)}" for key in failed_files)
+    if failed_constraints:
+        lines.append(f"{len(failed_constraints)} constraint or index scripts failed:")
+        lines.extend(f"• {escape(error)}" for error in failed_constraints)
+    return "\n".join(lines) or None
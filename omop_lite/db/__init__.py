@@ -1,5 +1,6 @@
 from .base import Database
 from .postgres import PostgresDatabase
+from .postgres_async import AsyncPostgresDatabase
 from .sqlserver import SQLServerDatabase
 from omop_lite.settings import Settings
 
@@ -7,6 +8,8 @@ from omop_lite.settings import Settings
 def create_database(settings: Settings) -> Database:
     """Factory function to create the appropriate database instance."""
     if settings.dialect == "postgresql":
+        if settings.load_engine == "async":
+            return AsyncPostgresDatabase(settings)
         return PostgresDatabase(settings)
     elif settings.dialect == "mssql":
         return SQLServerDatabase(settings)
@@ -14,4 +17,10 @@ def create_database(settings: Settings) -> Database:
         raise ValueError(f"Unsupported dialect: {settings.dialect}")
 
 
-__all__ = ["Database", "PostgresDatabase", "SQLServerDatabase", "create_database"]
+__all__ = [
+    "AsyncPostgresDatabase",
+    "Database",
+    "PostgresDatabase",
+    "SQLServerDatabase",
+    "create_database",
+]
@@ -1,98 +1,149 @@
 from abc import ABC, abstractmethod
 from sqlalchemy import MetaData, inspect, Engine
 from pathlib import Path
-from typing import Union, Optional
+from typing import (
+    IO,
+    Callable,
+    ContextManager,
+    Iterable,
+    Sequence,
+    TypeVar,
+    Union,
+    Optional,
+)
+from contextlib import nullcontext
+from functools import partial
+import io
 import logging
+import sys
+import zipfile
 from importlib.resources import files
 from importlib.abc import Traversable
 from omop_lite.settings import Settings
 from sqlalchemy.sql import text
+from .indexes import IndexPlan, RedundantIndex, find_redundant_indices, plan_indices
+from .partitioning import PartitionInfo, group_by_table, partition_index_jobs
+from .parts import LoadState, part_files
+from .projection import LoadProfile
+from .quarantine import RejectWriter
+from .retry import is_transient, with_retries
+from .sampling import RowFilter, Sample, read_person_ids
+from .throttle import Throttle, ThrottledReader
+from .s3 import S3Client, S3Path
+from .scripts import (
+    SCHEMA_PLACEHOLDER,
+    IndexDefinition,
+    TableDefinition,
+    parse_index,
+    parse_tables,
+    split_statements,
+)
+from .transforms import Transform, column_transforms, null
+from .streams import ReadAheadReader, TextStream
+from .workers import Throughput, run_adaptive, run_parallel
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 # I thought about having a COMMON_TABLES list, but I think that's trying to be too clever
 OMOP_TABLES = {
-        "omop5_4": [
-            "CARE_SITE",
-            "CDM_SOURCE",
-            "COHORT",
-            "COHORT_DEFINITION",
-            "CONCEPT",
-            "CONCEPT_ANCESTOR",
-            "CONCEPT_CLASS",    
-            "CONCEPT_RELATIONSHIP",
-            "CONCEPT_SYNONYM",
-            "CONDITION_ERA",
-            "CONDITION_OCCURRENCE",
-            "COST",
-            "DEATH",
-            "DEVICE_EXPOSURE",
-            "DOMAIN",
-            "DOSE_ERA",
-            "DRUG_ERA",
-            "DRUG_EXPOSURE",
-            "DRUG_STRENGTH",
-            "EPISODE",
-            "EPISODE_EVENT",
-            "FACT_RELATIONSHIP",
-            "LOCATION",
-            "MEASUREMENT",
-            "METADATA",
-            "NOTE",
-            "NOTE_NLP",
-            "OBSERVATION",
-            "OBSERVATION_PERIOD",
-            "PAYER_PLAN_PERIOD",
-            "PERSON",
-            "PROCEDURE_OCCURRENCE",
-            "PROVIDER",
-            "RELATIONSHIP",
-            "SOURCE_TO_CONCEPT_MAP",
-            "SPECIMEN",
-            "VISIT_DETAIL",
-            "VISIT_OCCURRENCE",
-            "VOCABULARY",
-        ],
-        "omop5_3": [
-            "ATTRIBUTE_DEFINITION",
-            "CARE_SITE",
-            "CDM_SOURCE",
-            "COHORT_DEFINITION",
-            "CONCEPT",
-            "CONCEPT_ANCESTOR",
-            "CONCEPT_CLASS",
-            "CONCEPT_RELATIONSHIP",
-            "CONCEPT_SYNONYM",
-            "CONDITION_ERA",
-            "CONDITION_OCCURRENCE",
-            "COST",
-            "DEATH",
-            "DRUG_EXPOSURE",
-            "DOMAIN",
-            "DEVICE_EXPOSURE",
-            "DOSE_ERA",
-            "DRUG_ERA",
-            "DRUG_STRENGTH",
-            "FACT_RELATIONSHIP",
-            "LOCATION",
-            "MEASUREMENT",
-            "METADATA",
-            "NOTE",
-            "NOTE_NLP",
-            "OBSERVATION",
-            "OBSERVATION_PERIOD",
-            "PAYER_PLAN_PERIOD",
-            "PERSON",
-            "PROCEDURE_OCCURRENCE",
-            "PROVIDER",
-            "RELATIONSHIP",
-            "SOURCE_TO_CONCEPT_MAP",
-            "SPECIMEN",
-            "VISIT_DETAIL",
-            "VISIT_OCCURRENCE",
-            "VOCABULARY",
-        ]
-        }
+    "omop5_4": [
+        "CARE_SITE",
+        "CDM_SOURCE",
+        "COHORT",
+        "COHORT_DEFINITION",
+        "CONCEPT",
+        "CONCEPT_ANCESTOR",
+        "CONCEPT_CLASS",
+        "CONCEPT_RELATIONSHIP",
+        "CONCEPT_SYNONYM",
+        "CONDITION_ERA",
+        "CONDITION_OCCURRENCE",
+        "COST",
+        "DEATH",
+        "DEVICE_EXPOSURE",
+        "DOMAIN",
+        "DOSE_ERA",
+        "DRUG_ERA",
+        "DRUG_EXPOSURE",
+        "DRUG_STRENGTH",
+        "EPISODE",
+        "EPISODE_EVENT",
+        "FACT_RELATIONSHIP",
+        "LOCATION",
+        "MEASUREMENT",
+        "METADATA",
+        "NOTE",
+        "NOTE_NLP",
+        "OBSERVATION",
+        "OBSERVATION_PERIOD",
+        "PAYER_PLAN_PERIOD",
+        "PERSON",
+        "PROCEDURE_OCCURRENCE",
+        "PROVIDER",
+        "RELATIONSHIP",
+        "SOURCE_TO_CONCEPT_MAP",
+        "SPECIMEN",
+        "VISIT_DETAIL",
+        "VISIT_OCCURRENCE",
+        "VOCABULARY",
+    ],
+    "omop5_3": [
+        "ATTRIBUTE_DEFINITION",
+        "CARE_SITE",
+        "CDM_SOURCE",
+        "COHORT_DEFINITION",
+        "CONCEPT",
+        "CONCEPT_ANCESTOR",
+        "CONCEPT_CLASS",
+        "CONCEPT_RELATIONSHIP",
+        "CONCEPT_SYNONYM",
+        "CONDITION_ERA",
+        "CONDITION_OCCURRENCE",
+        "COST",
+        "DEATH",
+        "DRUG_EXPOSURE",
+        "DOMAIN",
+        "DEVICE_EXPOSURE",
+        "DOSE_ERA",
+        "DRUG_ERA",
+        "DRUG_STRENGTH",
+        "FACT_RELATIONSHIP",
+        "LOCATION",
+        "MEASUREMENT",
+        "METADATA",
+        "NOTE",
+        "NOTE_NLP",
+        "OBSERVATION",
+        "OBSERVATION_PERIOD",
+        "PAYER_PLAN_PERIOD",
+        "PERSON",
+        "PROCEDURE_OCCURRENCE",
+        "PROVIDER",
+        "RELATIONSHIP",
+        "SOURCE_TO_CONCEPT_MAP",
+        "SPECIMEN",
+        "VISIT_DETAIL",
+        "VISIT_OCCURRENCE",
+        "VOCABULARY",
+    ],
+}
+
+# A data file path that means standard input
+STDIN = "-"
+
+# A refresh builds the new CDM in <schema>_new and keeps the one it replaces
+# as <schema>_old
+SHADOW_SUFFIX = "_new"
+OLD_SUFFIX = "_old"
+
+# Extra index scripts run after indices.sql for each index profile
+INDEX_PROFILES = {
+    "default": [],
+    "brin": ["indices_brin.sql"],
+}
+
 
 class Database(ABC):
     """Abstract base class for database operations"""
@@ -103,6 +154,21 @@ class Database(ABC):
         self.metadata: Optional[MetaData] = None
         self.file_path: Optional[Union[Path, Traversable]] = None
         self.omop_tables: list[str] = OMOP_TABLES[settings.omop_version]
+        self._spec_tables: Optional[dict[str, TableDefinition]] = None
+        self._profile: Optional[LoadProfile] = None
+        if settings.load_profile:
+            self._profile = LoadProfile.from_file(settings.load_profile)
+        self._rejects = RejectWriter(settings.reject_file)
+        self._state: Optional[LoadState] = None
+        self._offsets: dict[str, int] = {}
+        self._sample: Optional[Sample] = None
+        self._throttle: Optional[Throttle] = None
+        self._throughput: Optional[Throughput] = None
+        # Scripts and statements that failed in the current phase, logged as they
+        # fail so the phases carry on
+        self._errors: list[str] = []
+        # More databases the same data is loaded into, with the same schema
+        self.targets: Sequence["Database"] = []
 
     @property
     def dialect(self) -> str:
@@ -115,14 +181,48 @@ class Database(ABC):
         pass
 
     @abstractmethod
-    def _bulk_load(self, table_name: str, file_path: Union[Path, Traversable]) -> None:
-        """Bulk load data into a table."""
+    def _bulk_load(
+        self,
+        table_name: str,
+        file_path: Union[str, Path, Traversable],
+        header: bool = True,
+    ) -> None:
+        """Bulk load data into a table.
+
+        A file without a ``header`` has the columns of the CDM specification, in
+        order.
+        """
         pass
 
     def _file_exists(self, file_path: Union[Path, Traversable]) -> bool:
-        """Check if a file exists, handling both Path and Traversable types."""
-        if isinstance(file_path, Traversable):
-            return file_path.is_file()
+        """Check if a file exists, handling both Path and Traversable types.
+
+        A named pipe counts as a file, so data can be streamed in through one.
+        """
+        if isinstance(file_path, Path):
+            return file_path.is_file() or file_path.is_fifo()
+        return file_path.is_file()
+
+    def _open(
+        self,
+        file_path: Union[str, Path, Traversable],
+        encoding: Optional[str] = None,
+        newline: Optional[str] = None,
+    ) -> ContextManager[IO[str]]:
+        """Open a data file for reading, ``-`` meaning standard input.
+
+        Data files are read front to back without seeking, so pipes work too,
+        members of a ZIP archive are decompressed as they are read and objects in
+        a bucket are downloaded as they are read.
+        """
+        if str(file_path) == STDIN:
+            return nullcontext(sys.stdin)
+        if not isinstance(file_path, Path) and isinstance(file_path, Traversable):
+            # Members of a ZIP archive, or objects in a bucket
+            return io.TextIOWrapper(
+                file_path.open("rb"), encoding=encoding or "utf-8", newline=newline
+            )
+        return open(str(file_path), "r", encoding=encoding, newline=newline)
 
     def refresh_metadata(self) -> None:
         """Refresh the metadata for the database."""
@@ -139,29 +239,260 @@ class Database(ABC):
 
     def create_tables(self) -> None:
         """Create the tables in the database."""
-        self._execute_sql_file(self.file_path.joinpath("ddl.sql"))
+        if self.settings.partitioning != "none":
+            logger.warning(
+                f"Partitioning is not supported for {self.dialect}, "
+                "creating the tables unpartitioned"
+            )
+        if self.settings.ddl_profile != "default":
+            logger.warning(
+                f"DDL profile '{self.settings.ddl_profile}' is not available "
+                f"for {self.dialect}, using the default"
+            )
+        if (
+            self.settings.text_compression != "default"
+            or self.settings.toast_tuple_target is not None
+            or self.settings.fillfactor is not None
+        ):
+            logger.warning(f"Storage settings are not supported for {self.dialect}")
+        if self.settings.distributed:
+            logger.warning(
+                f"Distributed mode needs Citus and is not supported for {self.dialect}"
+            )
+        if self._profile is None:
+            self._execute_sql_file(self._script("ddl.sql"))
+        else:
+            tables = self._slim_tables(
+                parse_tables(self._read_sql_file(self._script("ddl.sql")))
+            )
+            self._execute_sql(";\n".join(table.render() for table in tables), "ddl.sql")
         self.refresh_metadata()
 
+    def _slim_tables(self, tables: list[TableDefinition]) -> list[TableDefinition]:
+        """Leave the columns the load profile drops out of the tables."""
+        if self._profile is None:
+            return tables
+        return [self._profile.slim_table(table) for table in tables]
+
     def add_primary_keys(self) -> None:
         """Add primary keys to the tables in the database."""
-        self._execute_sql_file(self.file_path.joinpath("primary_keys.sql"))
+        self._execute_sql_file(self._script("primary_keys.sql"))
 
     def add_constraints(self) -> None:
         """Add constraints to the tables in the database."""
-        self._execute_sql_file(self.file_path.joinpath("constraints.sql"))
+        self._execute_sql_file(self._script("constraints.sql"))
 
     def add_indices(self) -> None:
-        """Add indices to the tables in the database."""
-        self._execute_sql_file(self.file_path.joinpath("indices.sql"))
+        """Add indices to the tables in the database.
+
+        With ``skip_redundant_indices`` set, indices already covered by an index in
+        the catalog or earlier in the script are left out. With ``online_indices``
+        set, indices are built one at a time without blocking writes. The
+        ``index_profile`` adds the indices of its extra scripts. Tables, and the
+        partitions of partitioned tables, are indexed on ``index_workers`` threads.
+        """
+        partitioned = self.partitioned_tables()
+        if (
+            not self.settings.skip_redundant_indices
+            and not self.settings.online_indices
+            and not INDEX_PROFILES[self.settings.index_profile]
+            and not partitioned
+            and self.settings.index_workers <= 1
+        ):
+            self._execute_sql_file(self._script("indices.sql"))
+            return
 
-    def add_all_constraints(self) -> None:
+        parents, jobs = self._index_jobs(self._index_statements(), partitioned)
+        if self.settings.online_indices:
+            run = self._add_indices_online
+        else:
+            run = self._add_indices_batch
+
+        if parents:
+            run(parents)
+        self._run_jobs(
+            [partial(run, job) for job in jobs], self.settings.index_workers, "Indices"
+        )
+
+        if self.settings.online_indices:
+            invalid = self.invalid_indices()
+            if invalid:
+                logger.error(f"Invalid indices left after the index phase: {invalid}")
+
+    def _index_jobs(
+        self, statements: list[str], partitioned: dict[str, PartitionInfo]
+    ) -> tuple[list[str], list[list[str]]]:
+        """Split the index phase into statements to run first and concurrent jobs."""
+        if partitioned:
+            return partition_index_jobs(statements, partitioned)
+        if self.settings.index_workers > 1:
+            return [], group_by_table(statements)
+        return [], [statements]
+
+    def _add_indices_batch(self, statements: list[str]) -> None:
+        """Build indices in a single transaction."""
+        self._execute_sql(";\n".join(statements), "indices.sql")
+
+    def _index_statements(self) -> list[str]:
+        """Return the statements of the index phase."""
+        if not self.settings.skip_redundant_indices:
+            return split_statements(self._index_script())
+
+        plan = self.plan_indices()
+        for redundant in plan.redundant:
+            logger.info(
+                f"Skipping index {redundant.index.name}: {redundant.reason} "
+                f"of {redundant.covered_by.name}"
+            )
+        return plan.statements
+
+    def _add_indices_online(self, statements: list[str]) -> None:
+        """Build indices one statement at a time, outside a transaction block.
+
+        A failed build is retried up to ``index_retries`` times, dropping any
+        invalid index it left behind first.
+        """
+        for statement in statements:
+            online = self._online_index_statement(statement)
+            if online is None:
+                logger.warning(f"Skipping in online mode: {statement}")
+                continue
+
+            index = parse_index(online)
+            attempts = self.settings.index_retries + 1
+            for attempt in range(1, attempts + 1):
+                try:
+                    self._execute_autocommit(online)
+                    break
+                except Exception as e:
+                    logger.error(
+                        f"Error building index (attempt {attempt}/{attempts}): {str(e)}"
+                    )
+                    if index is not None and index.name in self.invalid_indices():
+                        self._drop_invalid_index(index.name)
+                    if attempt == attempts:
+                        self._errors.append(f"{online}: {str(e)}")
+
+    def _online_index_statement(self, statement: str) -> Optional[str]:
+        """Rewrite an index phase statement so it does not block writes.
+
+        Returns None for statements that cannot run online.
+        """
+        return statement
+
+    def partitioned_tables(self) -> dict[str, PartitionInfo]:
+        """Return the partitioned OMOP tables, keyed by table name."""
+        return {}
+
+    def invalid_indices(self) -> list[str]:
+        """Return the indices left unusable by a failed online build."""
+        return []
+
+    def _drop_invalid_index(self, name: str) -> None:
+        """Drop an index left unusable by a failed online build."""
+        pass
+
+    def plan_indices(self) -> IndexPlan:
+        """Plan the index phase against the indices that exist in the catalog."""
+        statements = split_statements(self._index_script())
+        return plan_indices(statements, self.existing_indices())
+
+    def _index_script(self) -> str:
+        """Return indices.sql followed by the scripts of the index profile."""
+        scripts = [self._read_sql_file(self._script("indices.sql"))]
+        for name in INDEX_PROFILES[self.settings.index_profile]:
+            script = self._script(name)
+            if not script.is_file():
+                logger.warning(
+                    f"Index profile '{self.settings.index_profile}' is not available "
+                    f"for {self.dialect}, skipping {name}"
+                )
+                continue
+            scripts.append(self._read_sql_file(script))
+        return ";\n".join(scripts)
+
+    def index_report(self, include_catalog: bool = True) -> list[RedundantIndex]:
+        """Report the redundant indices in the index script.
+
+        The primary keys and constraints scripts are assumed to have run, so an index
+        is reported when a key, an existing index, or another index in the script
+        already covers it.
+        """
+        keys = []
+        for script in ("primary_keys.sql", "constraints.sql"):
+            for statement in split_statements(
+                self._read_sql_file(self._script(script))
+            ):
+                index = parse_index(statement, script)
+                if index is not None:
+                    keys.append(index)
+        existing = self.existing_indices() if include_catalog else []
+        existing_names = {index.name for index in existing}
+        keys = [key for key in keys if key.name not in existing_names]
+
+        candidates = []
+        for statement in split_statements(self._index_script()):
+            index = parse_index(statement, "indices.sql")
+            if index is not None:
+                candidates.append(index)
+        return find_redundant_indices(candidates, existing + keys)
+
+    def existing_indices(self) -> list[IndexDefinition]:
+        """Return the indices and primary keys that exist on the OMOP tables."""
+        if not self.engine:
+            raise RuntimeError("Database engine not initialized")
+
+        inspector = inspect(self.engine)
+        schema = self.settings.schema_name
+        tables = {name.lower() for name in inspector.get_table_names(schema=schema)}
+        existing = []
+        for table in self.omop_tables:
+            table = table.lower()
+            if table not in tables:
+                continue
+            pk = inspector.get_pk_constraint(table, schema=schema)
+            pk_name = pk.get("name") if pk else None
+            if pk_name and pk.get("constrained_columns"):
+                existing.append(
+                    IndexDefinition(
+                        name=pk_name.lower(),
+                        table=table,
+                        columns=tuple(c.lower() for c in pk["constrained_columns"]),
+                        unique=True,
+                        source="catalog",
+                    )
+                )
+            for index in inspector.get_indexes(table, schema=schema):
+                index_name = index.get("name")
+                if not index_name:
+                    continue
+                options = index.get("dialect_options", {})
+                existing.append(
+                    IndexDefinition(
+                        name=index_name.lower(),
+                        table=table,
+                        columns=tuple(
+                            c.lower() for c in index["column_names"] if c is not None
+                        ),
+                        method=options.get("postgresql_using", "btree"),
+                        unique=bool(index.get("unique")),
+                        clustered=bool(options.get("mssql_clustered", False)),
+                        source="catalog",
+                    )
+                )
+        return existing
+
+    def add_all_constraints(self) -> list[str]:
         """Add all constraints, primary keys, and indices to the tables in the database.
 
         This is a convenience method that calls all three constraint methods.
+        Returns the scripts and statements that failed.
         """
+        self._errors = []
         self.add_primary_keys()
         self.add_constraints()
         self.add_indices()
+        return list(self._errors)
 
     def drop_tables(self) -> None:
         """Drop all tables in the database."""
@@ -187,6 +518,58 @@ class Database(ABC):
             connection.commit()
             logger.info(f"✅ Schema '{schema_name}' dropped successfully")
 
+    def refresh(self) -> None:
+        """Rebuild the CDM in a shadow schema and swap it in.
+
+        The tables, data, keys and indices are built in ``<schema>_new`` by the
+        usual phases, while the current schema stays in use. The shadow schema is
+        then swapped in, and the schema it replaces kept as ``<schema>_old``. If any
+        file fails to load, or any key or index fails, the refresh stops before the
+        swap and the current schema is left as it is.
+        """
+        live = self.settings.schema_name
+        shadow_name = f"{live}{SHADOW_SUFFIX}"
+        shadow = type(self)(
+            self.settings.model_copy(update={"schema_name": shadow_name})
+        )
+        if shadow.schema_exists(shadow_name):
+            logger.info(f"Dropping '{shadow_name}' left by an earlier refresh")
+            shadow.drop_schema(shadow_name)
+        shadow.create_schema(shadow_name)
+        shadow.create_tables()
+        failed = shadow.load_data()
+        if failed:
+            raise RuntimeError(
+                f"Refresh stopped, {len(failed)} files failed to load into "
+                f"'{shadow_name}'; '{live}' is unchanged"
+            )
+        failed = shadow.add_all_constraints()
+        if failed:
+            raise RuntimeError(
+                f"Refresh stopped, the keys and indices of '{shadow_name}' failed: "
+                f"{failed[0]}; '{live}' is unchanged"
+            )
+
+        self.swap_schema(shadow_name, f"{live}{OLD_SUFFIX}")
+        self.refresh_metadata()
+
+    def rollback_refresh(self) -> None:
+        """Swap ``<schema>_old`` back in, keeping the current schema as the old one."""
+        previous = f"{self.settings.schema_name}{OLD_SUFFIX}"
+        if not self.schema_exists(previous):
+            raise RuntimeError(f"There is no schema '{previous}' to roll back to")
+        self.swap_schema(previous, previous)
+        self.refresh_metadata()
+
+    @abstractmethod
+    def swap_schema(self, replacement: str, previous: str) -> None:
+        """Make ``replacement`` the schema, in one transaction.
+
+        The current schema is kept as ``previous``, replacing whatever that held,
+        or exchanged with ``replacement`` if the two are the same.
+        """
+        pass
+
     def drop_all(self, schema_name: str) -> None:
         """Drop everything: tables and schema.
 
@@ -197,26 +580,425 @@ class Database(ABC):
             self.drop_schema(schema_name)
         logger.info("✅ Database completely dropped")
 
-    def load_data(self) -> None:
-        """Load data into tables."""
+    def load_data(self) -> list[str]:
+        """Load data into tables, ``load_workers`` files at a time.
+
+        A table is loaded from ``<TABLE>.csv``, or else from the part files
+        matching ``part_pattern``, each part loaded and retried on its own. With
+        ``load_state_file`` set, files loaded by an earlier run are skipped.
+
+        When a subset of persons is sampled, or the vocabulary pruned, the tables
+        load in waves, so the ids and concepts later tables are filtered on are
+        known before they load.
+
+        Returns the files that failed to load.
+        """
         data_dir = self._get_data_dir()
         logger.info(f"Loading data from {data_dir}")
 
-        for table_name in self.omop_tables:
-            table_lower = table_name.lower()
-            csv_file = data_dir / f"{table_name}.csv"
+        self._state = None
+        if self.settings.load_state_file:
+            self._state = LoadState(self.settings.load_state_file)
+        self._offsets.clear()
+        self._sample = self._create_sample()
+        self._throttle = self._create_throttle()
+        self._throughput = Throughput() if self.settings.adaptive_workers else None
+        waves = [self.omop_tables]
+        if self._sample is not None:
+            waves = self._sample.waves(self.omop_tables)
 
-            if not self._file_exists(csv_file):
-                logger.warning(f"Warning: {csv_file} not found, skipping...")
-                continue
+        failed: list[str] = []
+        workers = 1
+        for wave in waves:
+            parts: list[tuple[str, Union[Path, Traversable], bool]] = []
+            for table_name in wave:
+                table_files = self._table_files(table_name, data_dir)
+                if not table_files:
+                    logger.warning(
+                        f"Warning: {data_dir / f'{table_name}.csv'} not found, skipping..."
+                    )
+                    continue
+                parts.extend(
+                    (table_name, file_path, header) for file_path, header in table_files
+                )
+            workers = self._load_parts(parts, failed, workers)
+        if failed:
+            logger.error(f"{len(failed)} files failed to load: {', '.join(failed)}")
+        return failed
 
-            logger.info(f"Loading: {table_name}")
+    def load_file(
+        self, table_name: str, file_path: Optional[Union[str, Path]] = None
+    ) -> None:
+        """Load one table, from ``file_path`` or its file in the data directory.
+
+        ``file_path`` can be a named pipe, or ``-`` for standard input. Errors are
+        raised rather than logged, so a failed load can fail the pipeline feeding it.
+        """
+        table = next(
+            (name for name in self.omop_tables if name.lower() == table_name.lower()),
+            None,
+        )
+        if table is None:
+            raise ValueError(
+                f"Unknown table {table_name} for {self.settings.omop_version}"
+            )
 
+        path: Union[str, Path, Traversable] = STDIN
+        if file_path is None:
+            path = self._get_data_dir() / f"{table}.csv"
+        elif str(file_path) != STDIN:
+            path = Path(file_path)
+        if not isinstance(path, str) and not self._file_exists(path):
+            raise FileNotFoundError(f"Data file {path} does not exist")
+
+        self._sample = self._create_sample(single_table=True)
+        self._throttle = self._create_throttle()
+        source = "standard input" if isinstance(path, str) else path
+        logger.info(f"Loading: {table} from {source}")
+        self._bulk_load(table.lower(), path)
+        logger.info(f"Successfully loaded {table}")
+
+    def _table_files(
+        self, table_name: str, data_dir: Union[Path, Traversable]
+    ) -> list[tuple[Union[Path, Traversable], bool]]:
+        """Return the files of a table, each with whether it starts with a header."""
+        csv_file = data_dir / f"{table_name}.csv"
+        if self._file_exists(csv_file):
+            return [(csv_file, True)]
+        return [
+            (part, self.settings.part_headers)
+            for part in part_files(data_dir, table_name, self.settings.part_pattern)
+        ]
+
+    def _load_parts(
+        self,
+        parts: list[tuple[str, Union[Path, Traversable], bool]],
+        failed: list[str],
+        workers: int = 1,
+    ) -> int:
+        """
+        Load the files of a wave, ``load_workers`` at a time.
+
+        With ``adaptive_workers`` set, the workers start at ``workers``. Returns the
+        number of workers the wave settled on.
+        """
+        jobs = [
+            partial(self._load_part, table_name, file_path, header, failed)
+            for table_name, file_path, header in parts
+        ]
+        return self._run_jobs(
+            jobs,
+            self.settings.load_workers,
+            "Load",
+            progress=self._loaded_mb,
+            unit="MB",
+            start=workers,
+        )
+
+    def _load_part(
+        self,
+        table_name: str,
+        file_path: Union[Path, Traversable],
+        header: bool,
+        failed: list[str],
+    ) -> None:
+        """Load one file of a table, retrying it up to ``load_retries`` times.
+
+        Only transient errors, such as a lost connection, are retried. With chunked
+        commits a retry resumes after the last committed chunk.
+        """
+        state = self._state
+        key = self._file_key(table_name, file_path)
+        if state is not None and state.done(key):
+            logger.info(f"Skipping {key}, already loaded")
+            return
+
+        logger.info(f"Loading: {key}")
+        attempts = self.settings.load_retries + 1
+        for attempt in range(1, attempts + 1):
             try:
-                self._bulk_load(table_lower, csv_file)
-                logger.info(f"Successfully loaded {table_name}")
+                if header:
+                    self._bulk_load(table_name.lower(), file_path)
+                else:
+                    self._bulk_load(table_name.lower(), file_path, header=False)
             except Exception as e:
-                logger.error(f"Error loading {table_name}: {str(e)}")
+                if state is not None:
+                    state.update(key, status="failed", attempts=attempt, error=str(e))
+                if attempt < attempts and is_transient(e):
+                    logger.warning(
+                        f"Error loading {key}, attempt {attempt} of {attempts}: {str(e)}"
+                    )
+                    continue
+                logger.error(f"Error loading {key}: {str(e)}")
+                failed.append(key)
+                return
+
+            self._offsets.pop(key, None)
+            if state is not None:
+                state.update(key, status="done", attempts=attempt, error=None)
+            logger.info(f"Successfully loaded {key}")
+            return
+
+    def _file_key(
+        self, table_name: str, file_path: Union[str, Path, Traversable]
+    ) -> str:
+        """Return the key a file's progress is recorded under."""
+        name = STDIN if isinstance(file_path, str) else file_path.name
+        return f"{table_name.upper()}/{name}"
+
+    def _chunked_commits(self) -> bool:
+        """Return whether files are committed in chunks rather than at once."""
+        return bool(self.settings.commit_rows or self.settings.commit_bytes)
+
+    def _committed_rows(self, key: str) -> int:
+        """Return how many rows of a file earlier attempts have committed."""
+        if key in self._offsets:
+            return self._offsets[key]
+        if self._state is not None:
+            return int(self._state.get(key).get("committed_rows", 0))
+        return 0
+
+    def _commit_offset(self, key: str, rows: int) -> None:
+        """Record that the first ``rows`` rows of a file are committed."""
+        self._offsets[key] = rows
+        if self._state is not None:
+            self._state.update(key, status="loading", committed_rows=rows)
+
+    def _retry(self, call: Callable[[], T], description: str) -> T:
+        """Run ``call``, retrying transient failures with backoff."""
+        return with_retries(call, self.settings.load_retries, description)
+
+    def _quarantine(
+        self,
+        table_name: str,
+        file_path: Union[str, Path, Traversable],
+        rejects: list[tuple[int, str, str]],
+    ) -> None:
+        """Write the records of a file that failed to load to the reject file."""
+        if not rejects:
+            return
+        logger.warning(
+            f"{len(rejects)} rows of {file_path} rejected, "
+            f"see {self.settings.reject_file}"
+        )
+        self._rejects.write(table_name, str(file_path), rejects)
+
+    def _create_sample(self, single_table: bool = False) -> Optional[Sample]:
+        """Return the subset of persons to load, or None to load everyone.
+
+        A ``single_table`` load is only filtered on its persons, as there are no
+        other tables loading with it to follow or prune against.
+        """
+        settings = self.settings
+        prune = settings.prune_vocabulary and not single_table
+        if (
+            settings.sample_persons is None
+            and settings.person_ids_file is None
+            and not prune
+        ):
+            return None
+        person_ids = None
+        if settings.person_ids_file is not None:
+            person_ids = read_person_ids(settings.person_ids_file)
+            logger.info(
+                f"Loading the {len(person_ids)} persons in {settings.person_ids_file}"
+            )
+        if settings.sample_persons is not None:
+            logger.info(f"Loading a {settings.sample_persons:.2%} sample of persons")
+        return Sample(
+            settings.sample_persons,
+            person_ids,
+            prune_vocabulary=prune,
+            follow_parents=not single_table,
+        )
+
+    def _create_throttle(self) -> Optional[Throttle]:
+        """Return the rate caps shared by the load workers, or None to load flat out."""
+        settings = self.settings
+        health = None
+        if settings.adaptive_throttle:
+            if type(self)._health is Database._health:
+                logger.warning(
+                    f"Adaptive throttling is not supported for {self.dialect}, "
+                    "using the fixed caps only"
+                )
+            else:
+                health = self._health
+        if (
+            settings.throttle_mb_per_second is None
+            and settings.throttle_rows_per_second is None
+            and health is None
+        ):
+            return None
+        mb = settings.throttle_mb_per_second
+        return Throttle(
+            bytes_per_second=mb * 1_000_000 if mb else None,
+            rows_per_second=settings.throttle_rows_per_second,
+            health=health,
+        )
+
+    def _health(self) -> Optional[bool]:
+        """Return whether the server can take more load, or None if unknown."""
+        return None
+
+    def _throttled(self, f: TextStream, table_name: str) -> TextStream:
+        """Wrap a file so reading it draws from the load's throttle and counters."""
+        if self._throttle is None and self._throughput is None:
+            return f
+        counter = None
+        if self._throughput is not None:
+            counter = partial(self._throughput.add, table_name)
+        return ThrottledReader(f, self._throttle, counter)
+
+    def _read_ahead(self, f: TextStream) -> ContextManager[TextStream]:
+        """Read a file ahead on a thread of its own, ``read_ahead_buffers`` deep."""
+        if self.settings.read_ahead_buffers <= 0:
+            return nullcontext(f)
+        return ReadAheadReader.from_file(
+            f, self.settings.read_buffer_size, self.settings.read_ahead_buffers
+        )
+
+    def _loaded_mb(self) -> float:
+        """Return the MB loaded so far, as counted by the load's readers."""
+        if self._throughput is None:
+            return 0.0
+        return self._throughput.total() / 1_000_000
+
+    def _run_jobs(
+        self,
+        jobs: Iterable[Callable[[], None]],
+        workers: int,
+        label: str,
+        progress: Optional[Callable[[], float]] = None,
+        unit: str = "jobs",
+        start: int = 1,
+    ) -> int:
+        """
+        Run jobs on up to ``workers`` threads, returning the number used.
+
+        With ``adaptive_workers`` set, the number running at once is tuned between
+        one and ``workers`` by the throughput ``progress`` reports.
+        """
+        if not self.settings.adaptive_workers:
+            run_parallel(jobs, workers)
+            return workers
+        return run_adaptive(jobs, workers, progress, label, unit, start)
+
+    def _row_filter(self, table_name: str, columns: list[str]) -> Optional[RowFilter]:
+        """Return the filter for the rows of a table's file, or None to keep all."""
+        if self._sample is None:
+            return None
+        return self._sample.row_filter(table_name, columns)
+
+    def _transforms(self, table_name: str, columns: list[str]) -> dict[int, Transform]:
+        """Return the column transforms to apply while loading a table's file.
+
+        The columns the load profile nulls out are emptied.
+        """
+        transforms = {}
+        if self.settings.normalise_dates:
+            transforms = column_transforms(table_name, columns)
+        transforms.update(
+            dict.fromkeys(self._nulled_columns(table_name, columns), null)
+        )
+        return transforms
+
+    def _nulled_columns(self, table_name: str, columns: list[str]) -> list[int]:
+        """Return the positions of the file's columns that load as NULL."""
+        if self._profile is None:
+            return []
+        required = self._required_columns(table_name)
+        return [
+            position
+            for position, column in enumerate(columns)
+            if _column_name(column) not in required
+            and self._profile.nulled(table_name, _column_name(column))
+        ]
+
+    def _projection(self, table_name: str, columns: list[str]) -> Optional[list[int]]:
+        """Return the positions of the file's columns to load, or None for all.
+
+        With a load profile, the columns it drops are left out, and so are any
+        the reflected table does not have, such as those left out by
+        ``create_tables``.
+        """
+        if self._profile is None:
+            return None
+        required = self._required_columns(table_name)
+        reflected = self._reflected_columns(table_name)
+        positions = []
+        for position, column in enumerate(columns):
+            name = _column_name(column)
+            if name not in required and (
+                self._profile.dropped(table_name, name)
+                or (reflected is not None and name not in reflected)
+            ):
+                continue
+            positions.append(position)
+        if len(positions) == len(columns):
+            return None
+        return positions
+
+    def _reflected_columns(self, table_name: str) -> Optional[set[str]]:
+        """Return the columns of a table as reflected, or None if it was not."""
+        if self.metadata is None:
+            return None
+        table = self.metadata.tables.get(
+            f"{self.settings.schema_name}.{table_name.lower()}"
+        )
+        if table is None:
+            return None
+        return {column.name.lower() for column in table.columns}
+
+    def _required_columns(self, table_name: str) -> set[str]:
+        """Return the NOT NULL columns of a table in the CDM specification."""
+        table = self._spec_table(table_name)
+        return {
+            column.name.strip('"') for column in table.columns if not column.nullable
+        }
+
+    def _header_columns(self, table_name: str, header: list[str]) -> list[str]:
+        """
+        Return the columns a file's header names, stripped of any byte order mark.
+
+        If the header names a column the table does not have, such as when it is
+        separated differently from the rows, the file is loaded by position in
+        the order of the CDM specification instead.
+        """
+        columns = [column.lstrip("\ufeff").strip().lower() for column in header]
+        try:
+            spec = self._spec_columns(table_name)
+        except KeyError:
+            # Not a table of the CDM, so there is nothing to check the header by
+            return columns
+        known = set(spec)
+        if not all(_column_name(column) in known for column in columns):
+            # The table may have columns of its own beyond the specification
+            known |= self._reflected_columns(table_name) or set()
+        if all(_column_name(column) in known for column in columns):
+            return columns
+        logger.warning(
+            f"The header of the {table_name} file does not match the table's "
+            "columns, loading it by position"
+        )
+        return spec
+
+    def _spec_columns(self, table_name: str) -> list[str]:
+        """Return the columns of a table in the order of the CDM specification.
+
+        Part files without a header follow this order, which the table itself may
+        not, with the compact DDL profile.
+        """
+        return [
+            column.name.strip('"') for column in self._spec_table(table_name).columns
+        ]
+
+    def _spec_table(self, table_name: str) -> TableDefinition:
+        """Return a table as the bundled DDL defines it."""
+        if self._spec_tables is None:
+            ddl = self._read_sql_file(self._script("ddl.sql"))
+            self._spec_tables = {table.name: table for table in parse_tables(ddl)}
+        return self._spec_tables[table_name.lower()]
 
     def _get_data_dir(self) -> Union[Path, Traversable]:
         """
@@ -230,9 +1012,22 @@ class Database(ABC):
             elif self.settings.synthetic_number == 1001:
                 return files("omop_lite.synthetic.1001")
             return files("omop_lite.synthetic.100")
+        if self.settings.data_dir.startswith("s3://"):
+            bucket = S3Path.from_url(
+                self.settings.data_dir,
+                S3Client.from_env(self.settings.s3_endpoint_url),
+                part_size=self.settings.s3_part_size,
+                read_ahead=self.settings.s3_read_ahead,
+            )
+            if not bucket.is_dir():
+                raise FileNotFoundError(f"Data directory {bucket} does not exist")
+            return bucket
         data_dir = Path(self.settings.data_dir)
         if not data_dir.exists():
             raise FileNotFoundError(f"Data directory {data_dir} does not exist")
+        if data_dir.is_file() and zipfile.is_zipfile(data_dir):
+            # The tables are read straight out of the archive, e.g. an Athena download
+            return zipfile.Path(data_dir)
         return data_dir
 
     def _get_delimiter(self) -> str:
@@ -245,9 +1040,12 @@ class Database(ABC):
         - Default is `\t`
 
         This is used to determine the delimiter for the COPY command.
-"""
+        """
         if self.settings.synthetic:
-            if self.settings.synthetic_number == 1000 or self.settings.synthetic_number == 1001:
+            if (
+                self.settings.synthetic_number == 1000
+                or self.settings.synthetic_number == 1001
+            ):
                 return ","
             return self.settings.delimiter
         else:
@@ -259,21 +1057,49 @@ class Database(ABC):
         Common implementation for all databases.
         """
         if self.settings.synthetic:
-            if self.settings.synthetic_number == 1000 or self.settings.synthetic_number == 1001:
+            if (
+                self.settings.synthetic_number == 1000
+                or self.settings.synthetic_number == 1001
+            ):
                 return '"'
         return "\b"
 
+    def _script(self, name: str) -> Union[Path, Traversable]:
+        """Get a SQL script from the dialect's script directory."""
+        if self.file_path is None:
+            raise RuntimeError("Database not properly initialized")
+        return self.file_path.joinpath(name)
+
+    def _read_sql_file(self, file_path: Union[str, Traversable]) -> str:
+        """Read a SQL file, filling in the schema name."""
+        if isinstance(file_path, Traversable):
+            file_path = str(file_path)
+
+        with open(file_path, "r") as f:
+            return f.read().replace(SCHEMA_PLACEHOLDER, self.settings.schema_name)
+
     def _execute_sql_file(self, file_path: Union[str, Traversable]) -> None:
         """
         Execute a SQL file directly.
         Common implementation for all databases.
         """
-        if isinstance(file_path, Traversable):
-            file_path = str(file_path)
+        self._execute_sql(self._read_sql_file(file_path), str(file_path))
 
-        with open(file_path, "r") as f:
-            sql = f.read().replace("@cdmDatabaseSchema", self.settings.schema_name)
+    def _execute_autocommit(self, sql: str) -> None:
+        """Execute a statement outside of a transaction block, raising on error."""
+        if not self.engine:
+            raise RuntimeError("Database engine not initialized")
 
+        with self.engine.connect().execution_options(
+            isolation_level="AUTOCOMMIT"
+        ) as connection:
+            connection.exec_driver_sql(sql)
+
+    def _execute_sql(self, sql: str, label: str) -> None:
+        """
+        Execute a batch of SQL in a single transaction.
+        Common implementation for all databases.
+        """
         if not self.engine:
             raise RuntimeError("Database engine not initialized")
 
@@ -284,9 +1110,15 @@ class Database(ABC):
                 cursor.execute(sql)
                 connection.commit()
             except Exception as e:
-                logger.error(f"Error executing {file_path}: {str(e)}")
+                logger.error(f"Error executing {label}: {str(e)}")
+                self._errors.append(f"{label}: {str(e)}")
                 connection.rollback()
             finally:
                 cursor.close()
         finally:
             connection.close()
+
+
+def _column_name(column: str) -> str:
+    """Return a column of a file's header as the DDL names it."""
+    return column.strip().strip('"').lower()
@@ -0,0 +1,158 @@
+"""Converting data files for COPY on a pool of processes.
+
+Transforming and projecting records is pure Python, so one thread of it can fall
+behind a fast COPY. A local file is cut into byte ranges of whole records, and
+each range is read, transformed and encoded by a worker process, which hands
+the result back in a block of shared memory rather than pickling it. The ranges
+are sent to COPY in file order, a few ahead of the one being sent, so the memory
+held stays bounded.
+
+Row filters keep state across the whole load, so sampled files are converted in
+the loading thread as before.
+"""
+
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+from .streams import iter_records
+from .transforms import Transform, transform_records
+
+logger = logging.getLogger(__name__)
+
+# Bytes of a file in each range converted by a worker
+RANGE_SIZE = 8 << 20
+
+
+def record_ranges(
+    path: Union[str, Path], header: bool, quote: str, size: int = RANGE_SIZE
+) -> Iterator[tuple[int, int]]:
+    """Cut a file into byte ranges of about ``size``, ending on record boundaries.
+
+    A line with an odd number of quote characters starts or ends a quoted value
+    holding a newline, and a range never ends inside one. The header is skipped.
+    """
+    marker = quote.encode()
+    with open(path, "rb") as f:
+        offset = len(f.readline()) if header else 0
+        start = offset
+        inside = False
+        for line in f:
+            offset += len(line)
+            if marker and line.count(marker) % 2:
+                inside = not inside
+            if not inside and offset - start >= size:
+                yield start, offset
+                start = offset
+    if offset > start:
+        yield start, offset
+
+
+def _lines(text: str) -> list[str]:
+    """Split text into lines ending in a newline, as a file would read them."""
+    lines = text.split("\n")
+    last = lines.pop()
+    return [line + "\n" for line in lines] + ([last] if last else [])
+
+
+def convert_range(
+    path: str,
+    start: int,
+    end: int,
+    transforms: dict[int, Transform],
+    delimiter: str,
+    quote: str,
+    positions: Optional[list[int]],
+) -> tuple[str, int]:
+    """Convert a range of a file, returning the shared memory holding the result.
+
+    Runs in a worker process. Returns the name of the block and the length of the
+    data in it; the reader unlinks the block once it has the data.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    records = list(iter_records(_lines(text), quote))
+    data = transform_records(
+        records, transforms, delimiter, quote, positions=positions
+    ).encode("utf-8")
+    block = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+    _buffer(block)[: len(data)] = data
+    block.close()
+    return block.name, len(data)
+
+
+def _buffer(block: shared_memory.SharedMemory) -> memoryview:
+    """Return the memory of a block, which is only there while it is open."""
+    if block.buf is None:
+        raise ValueError(f"Shared memory {block.name} is closed")
+    return block.buf
+
+
+def _take(name: str, length: int) -> str:
+    """Read the data out of a block of shared memory and free the block."""
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        return bytes(_buffer(block)[:length]).decode("utf-8")
+    finally:
+        block.close()
+        block.unlink()
+
+
+class ConversionPool:
+    """A pool of processes converting ranges of files for COPY."""
+
+    def __init__(self, workers: int, range_size: int = RANGE_SIZE) -> None:
+        self.workers = workers
+        self.range_size = range_size
+        # The loader runs threads, which a forked worker would inherit mid-flight
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def convert(
+        self,
+        path: Union[str, Path],
+        header: bool,
+        transforms: dict[int, Transform],
+        delimiter: str,
+        quote: str,
+        positions: Optional[list[int]] = None,
+    ) -> Iterator[str]:
+        """Yield a file's converted ranges in order, ``2 * workers`` ahead."""
+        ranges = record_ranges(path, header, quote, self.range_size)
+        pending: deque[Future[tuple[str, int]]] = deque()
+        try:
+            for start, end in ranges:
+                pending.append(
+                    self._executor.submit(
+                        convert_range,
+                        str(path),
+                        start,
+                        end,
+                        transforms,
+                        delimiter,
+                        quote,
+                        positions,
+                    )
+                )
+                if len(pending) >= 2 * self.workers:
+                    yield _take(*pending.popleft().result())
+            while pending:
+                yield _take(*pending.popleft().result())
+        finally:
+            # Free the blocks of ranges converted but never sent
+            for future in pending:
+                if future.cancel():
+                    continue
+                try:
+                    _take(*future.result())
+                except Exception as e:
+                    logger.debug(f"Error freeing a converted range: {str(e)}")
+
+    def close(self) -> None:
+        self._executor.shutdown(cancel_futures=True)
@@ -0,0 +1,64 @@
+"""Distributing the OMOP tables over a Citus cluster.
+
+``ddl.sql`` hints which tables to distribute on ``person_id``. Those become
+distributed tables, co-located on that key, and the rest, the vocabulary and the
+other small tables, become reference tables copied to every node.
+"""
+
+import logging
+from typing import Iterable, Optional
+
+from .scripts import TableDefinition, parse_foreign_key
+
+logger = logging.getLogger(__name__)
+
+
+def distribution_statements(tables: Iterable[TableDefinition]) -> list[str]:
+    """Return the Citus calls that distribute the tables as their hints say."""
+    statements = []
+    for table in tables:
+        if table.distribution_key is not None:
+            statements.append(
+                f"SELECT create_distributed_table('{table.qualified_name}', "
+                f"'{table.distribution_key}')"
+            )
+        else:
+            statements.append(
+                f"SELECT create_reference_table('{table.qualified_name}')"
+            )
+    return statements
+
+
+def adapt_distributed_constraints(
+    statements: Iterable[str], distributed: dict[str, Optional[str]]
+) -> list[str]:
+    """Leave out foreign keys that Citus cannot enforce.
+
+    ``distributed`` maps each Citus table to its distribution column, or None for a
+    reference table. A reference table cannot reference a distributed table, and a
+    foreign key between distributed tables must join them on their distribution
+    columns.
+    """
+    adapted = []
+    for statement in statements:
+        foreign_key = parse_foreign_key(statement)
+        if foreign_key is not None:
+            column = distributed.get(foreign_key.table)
+            referenced = distributed.get(foreign_key.referenced_table)
+            reason = None
+            if referenced is not None and foreign_key.table not in distributed:
+                reason = f"{foreign_key.table} is not distributed"
+            elif referenced is not None and column is None:
+                reason = f"{foreign_key.table} is a reference table"
+            elif referenced is not None and (
+                column not in foreign_key.columns
+                or referenced not in foreign_key.referenced_columns
+                or foreign_key.columns.index(column)
+                != foreign_key.referenced_columns.index(referenced)
+            ):
+                reason = "it does not join on the distribution columns"
+            if reason is not None:
+                logger.info(f"Skipping foreign key {foreign_key.name}: {reason}")
+                continue
+        adapted.append(statement)
+    return adapted
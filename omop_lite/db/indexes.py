@@ -0,0 +1,139 @@
+"""Detection of redundant indices in the index scripts."""
+
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from .scripts import IndexDefinition, parse_cluster, parse_index
+
+
+@dataclass(frozen=True)
+class RedundantIndex:
+    """An index that does not need building because another one already covers it."""
+
+    index: IndexDefinition
+    covered_by: IndexDefinition
+    reason: str
+
+
+@dataclass
+class IndexPlan:
+    """The statements to run for the index phase, and the indices left out of it."""
+
+    statements: list[str] = field(default_factory=list)
+    redundant: list[RedundantIndex] = field(default_factory=list)
+
+
+def covering_reason(index: IndexDefinition, other: IndexDefinition) -> Optional[str]:
+    """Return why ``other`` makes ``index`` redundant, or None if it does not.
+
+    An index is covered when another B-tree index on the same table has the same
+    columns ("identical") or starts with all of its columns ("left-prefix").
+    Unique and clustered indices are only covered by an identical index of the same
+    kind, as they also enforce uniqueness or decide the physical row order.
+    """
+    if index.table != other.table or index.method != other.method:
+        return None
+    if index.method != "btree":
+        return None
+    if index.unique and not (other.unique and other.columns == index.columns):
+        return None
+    if index.clustered and not other.clustered:
+        return None
+    if other.columns == index.columns:
+        return "identical"
+    if other.columns[: len(index.columns)] == index.columns:
+        return "left-prefix"
+    return None
+
+
+def find_redundant_indices(
+    candidates: Iterable[IndexDefinition], existing: Iterable[IndexDefinition] = ()
+) -> list[RedundantIndex]:
+    """Find the candidate indices covered by an existing index or another candidate.
+
+    Of two identical candidates, the first one is kept.
+    """
+    candidates = list(candidates)
+    existing = list(existing)
+    redundant = []
+    kept: list[IndexDefinition] = []
+    for position, index in enumerate(candidates):
+        found = None
+        for other in existing + kept:
+            reason = covering_reason(index, other)
+            if reason:
+                found = RedundantIndex(index, other, reason)
+                break
+        if not found:
+            # A longer candidate later in the script also makes this one redundant
+            for other in candidates[position + 1 :]:
+                reason = covering_reason(index, other)
+                if reason == "left-prefix":
+                    found = RedundantIndex(index, other, reason)
+                    break
+        if found:
+            redundant.append(found)
+        else:
+            kept.append(index)
+    return redundant
+
+
+def plan_indices(
+    statements: Iterable[str],
+    existing: Iterable[IndexDefinition] = (),
+    source: str = "indices.sql",
+) -> IndexPlan:
+    """Drop redundant CREATE INDEX statements from an index script.
+
+    Indices whose name already exists are skipped as well, and CLUSTER statements
+    using a skipped index are pointed at the index that covers it.
+    """
+    statements = list(statements)
+    existing = list(existing)
+    existing_names = {index.name for index in existing}
+    parsed = [parse_index(statement, source) for statement in statements]
+    candidates = [
+        index
+        for index in parsed
+        if index is not None and index.name not in existing_names
+    ]
+    redundant = find_redundant_indices(candidates, existing)
+    redundant += [
+        RedundantIndex(index, other, "exists")
+        for index in parsed
+        if index is not None
+        for other in existing
+        if other.name == index.name
+    ]
+
+    skipped = {r.index.name for r in redundant}
+    replacements = {
+        r.index.name: r.covered_by.name
+        for r in redundant
+        if r.index.name != r.covered_by.name
+    }
+    plan = IndexPlan(redundant=redundant)
+    emitted = set(existing_names)
+    pending: dict[str, list[str]] = {}
+    for statement, index in zip(statements, parsed):
+        if index is not None and index.name in skipped:
+            continue
+        cluster = parse_cluster(statement)
+        if cluster and cluster[1] in replacements:
+            target = cluster[1]
+            while target in replacements:
+                target = replacements[target]
+            statement = (
+                statement[: statement.upper().rindex("USING")] + f"USING {target}"
+            )
+            if target not in emitted:
+                # The covering index comes later in the script, so cluster after it
+                pending.setdefault(target, []).append(statement)
+                continue
+        plan.statements.append(statement)
+        if index is not None:
+            emitted.add(index.name)
+            plan.statements.extend(pending.pop(index.name, []))
+    for deferred in pending.values():
+        plan.statements.extend(deferred)
+    return plan
@@ -0,0 +1,117 @@
+"""Column layout of the Postgres tables, and the compact DDL profile.
+
+Postgres stores the columns of a row in table order, padding each fixed-length
+value to its type's alignment. Putting the 8-byte aligned columns first, then the
+4-byte, then the 2-byte and finally the variable-length columns removes most of
+that padding. The row size estimate follows the heap tuple layout, so that the
+compact profile's saving can be measured on a dataset before loading it.
+"""
+
+import math
+import re
+from dataclasses import replace
+from typing import Iterable, Optional
+
+from .scripts import ColumnDefinition, TableDefinition
+
+# Tuple header size before the null bitmap, and the maximum alignment
+HEADER_SIZE = 23
+MAXALIGN = 8
+
+# Length and alignment of the fixed-length types; anything else is variable length
+FIXED_TYPES = {
+    "bigint": (8, 8),
+    "timestamp": (8, 8),
+    "datetime": (8, 8),
+    "float": (8, 8),
+    "double precision": (8, 8),
+    "integer": (4, 4),
+    "date": (4, 4),
+    "real": (4, 4),
+    "smallint": (2, 2),
+}
+
+# Code columns whose values fit a narrower type than the DDL gives them
+NARROW_TYPES = {
+    "year_of_birth": "smallint",
+    "month_of_birth": "smallint",
+    "day_of_birth": "smallint",
+}
+
+
+def _align(offset: int, alignment: int) -> int:
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def storage(column_type: str) -> tuple[int, int]:
+    """Return the length and alignment of a type, with -1 for variable length."""
+    return FIXED_TYPES.get(column_type.lower(), (-1, 4))
+
+
+def compact_table(table: TableDefinition, narrow: bool = False) -> TableDefinition:
+    """Reorder the columns of a table to minimise alignment padding.
+
+    Fixed-length columns come first, widest alignment first, then the variable
+    length columns; the spec order is kept within each group. With ``narrow`` set
+    the columns in ``NARROW_TYPES`` get their narrower type.
+    """
+    columns = table.columns
+    if narrow:
+        columns = tuple(
+            replace(column, type=NARROW_TYPES[column.name])
+            if column.name in NARROW_TYPES
+            else column
+            for column in columns
+        )
+
+    def order(column: ColumnDefinition) -> int:
+        length, alignment = storage(column.type)
+        return -alignment if length > 0 else 0
+
+    return replace(table, columns=tuple(sorted(columns, key=order)))
+
+
+def _numeric_size(value: str) -> int:
+    """Return the size of a numeric value, stored as base 10000 digits."""
+    digits = value.strip().lstrip("+-")
+    whole, _, fraction = digits.partition(".")
+    whole = whole.lstrip("0")
+    fraction = fraction.rstrip("0")
+    count = math.ceil(len(whole) / 4) + math.ceil(len(fraction) / 4)
+    return 2 + 2 * count
+
+
+def value_size(column_type: str, value: str) -> tuple[int, int]:
+    """Return the stored size and alignment of a non-null value."""
+    length, alignment = storage(column_type)
+    if length > 0:
+        return length, alignment
+    if re.match(r"numeric|decimal", column_type, re.IGNORECASE):
+        size = _numeric_size(value)
+    else:
+        size = len(value.encode("utf-8"))
+    # Short values get a 1-byte header and are not aligned
+    if size + 1 <= 127:
+        return size + 1, 1
+    return size + 4, 4
+
+
+def row_size(
+    columns: Iterable[ColumnDefinition], values: dict[str, Optional[str]]
+) -> int:
+    """Estimate the size of a heap tuple holding ``values``, keyed by column name.
+
+    Missing and empty values are null, taking no space beyond the null bitmap.
+    """
+    columns = list(columns)
+    offset = 0
+    has_nulls = False
+    for column in columns:
+        value = values.get(column.name.strip('"'))
+        if value is None or value == "":
+            has_nulls = True
+            continue
+        size, alignment = value_size(column.type, value)
+        offset = _align(offset, alignment) + size
+    header = HEADER_SIZE + (math.ceil(len(columns) / 8) if has_nulls else 0)
+    return _align(_align(header, MAXALIGN) + offset, MAXALIGN)
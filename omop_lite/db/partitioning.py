@@ -0,0 +1,243 @@
+"""Declarative partitioning of the clinical event tables on Postgres.
+
+The clinical event tables are the ones ``ddl.sql`` hints to distribute on
+``person_id``. They are hash partitioned on that key, or range partitioned by year
+on their first required date column, and the key, constraint and index scripts are
+adapted to the partitioned tables.
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from .scripts import (
+    TableDefinition,
+    parse_cluster,
+    parse_foreign_key,
+    parse_index,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PartitionInfo:
+    """The partition key and the partitions of a partitioned table."""
+
+    key: tuple[str, ...]
+    partitions: list[str] = field(default_factory=list)
+
+
+def partition_key(table: TableDefinition, mode: str) -> Optional[str]:
+    """Return the column a clinical event table is partitioned on, if any."""
+    if table.distribution_key is None:
+        return None
+    if mode == "hash":
+        return table.distribution_key
+    if mode == "range":
+        for column in table.columns:
+            if not column.nullable and column.type.lower() in (
+                "date",
+                "timestamp",
+                "datetime",
+            ):
+                return column.name
+    return None
+
+
+def partition_ddl(
+    tables: Iterable[TableDefinition],
+    mode: str,
+    count: int = 8,
+    start_year: int = 2000,
+    end_year: int = 2030,
+) -> list[str]:
+    """Render the DDL with the clinical event tables partitioned.
+
+    Hash partitioning creates ``count`` partitions named ``<table>_p<n>``. Range
+    partitioning creates one partition a year, ``<table>_y<year>``, from
+    ``start_year`` to ``end_year`` inclusive, and a ``<table>_default`` partition
+    for the rows outside that range.
+    """
+    statements = []
+    for table in tables:
+        key = partition_key(table, mode) if mode != "none" else None
+        if key is None:
+            statements.append(table.render())
+            continue
+
+        parent = table.qualified_name
+        if mode == "hash":
+            statements.append(table.render(f"PARTITION BY HASH ({key})"))
+            for remainder in range(count):
+                statements.append(
+                    f"CREATE TABLE {parent}_p{remainder} PARTITION OF {parent} "
+                    f"FOR VALUES WITH (MODULUS {count}, REMAINDER {remainder})"
+                )
+        else:
+            statements.append(table.render(f"PARTITION BY RANGE ({key})"))
+            for year in range(start_year, end_year + 1):
+                statements.append(
+                    f"CREATE TABLE {parent}_y{year} PARTITION OF {parent} "
+                    f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+                )
+            statements.append(
+                f"CREATE TABLE {parent}_default PARTITION OF {parent} DEFAULT"
+            )
+    return statements
+
+
+def adapt_primary_keys(
+    statements: Iterable[str], keys: dict[str, tuple[str, ...]]
+) -> list[str]:
+    """Add the partition key to the primary keys of partitioned tables.
+
+    Postgres requires a unique constraint on a partitioned table to include all of
+    the partition key columns. ``keys`` maps each partitioned table to its key.
+    """
+    adapted = []
+    for statement in statements:
+        index = parse_index(statement)
+        key = keys.get(index.table) if index is not None else None
+        if index is not None and key is not None:
+            missing = [column for column in key if column not in index.columns]
+            if missing:
+                columns = ", ".join(index.columns + tuple(missing))
+                statement = re.sub(
+                    r"(PRIMARY\s+KEY|UNIQUE)(\s+(?:NON)?CLUSTERED)?\s*\([^)]*\)",
+                    lambda match: f"{match.group(1)}{match.group(2) or ''} ({columns})",
+                    statement,
+                    count=1,
+                    flags=re.IGNORECASE,
+                )
+        adapted.append(statement)
+    return adapted
+
+
+def adapt_constraints(
+    statements: Iterable[str], keys: dict[str, tuple[str, ...]]
+) -> list[str]:
+    """Leave out foreign keys that cannot reference a partitioned table.
+
+    A foreign key needs a unique constraint on exactly its referenced columns, and
+    on a partitioned table those always include the partition key.
+    """
+    adapted = []
+    for statement in statements:
+        foreign_key = parse_foreign_key(statement)
+        key = (
+            keys.get(foreign_key.referenced_table) if foreign_key is not None else None
+        )
+        if (
+            foreign_key is not None
+            and key is not None
+            and not set(key) <= set(foreign_key.referenced_columns)
+        ):
+            logger.info(
+                f"Skipping foreign key {foreign_key.name}: "
+                f"{foreign_key.referenced_table} is partitioned"
+            )
+            continue
+        adapted.append(statement)
+    return adapted
+
+
+def _statement_table(statement: str) -> Optional[str]:
+    index = parse_index(statement)
+    if index is not None:
+        return index.table
+    cluster = parse_cluster(statement)
+    if cluster is not None:
+        return cluster[0]
+    return None
+
+
+def group_by_table(statements: Iterable[str]) -> list[list[str]]:
+    """Group index phase statements by table, keeping their order within a table.
+
+    Statements on different tables can then run concurrently, while a CLUSTER still
+    follows the index it uses.
+    """
+    groups: dict[Optional[str], list[str]] = {}
+    jobs = []
+    for statement in statements:
+        table = _statement_table(statement)
+        if table is None:
+            jobs.append([statement])
+            continue
+        if table not in groups:
+            groups[table] = []
+            jobs.append(groups[table])
+        groups[table].append(statement)
+    return jobs
+
+
+def partition_index_jobs(
+    statements: Iterable[str], partitioned: dict[str, PartitionInfo]
+) -> tuple[list[str], list[list[str]]]:
+    """Split the index phase into parent statements and per-partition jobs.
+
+    An index on a partitioned table is created ``ON ONLY`` the parent first, then
+    built on each partition as a separate job and attached to the parent index.
+    CLUSTER runs per partition, on the partition's own index. Returns the parent
+    statements, to run first, and the jobs, which can run concurrently.
+    """
+    parents = []
+    other = []
+    created = set()
+    partition_jobs: dict[str, list[str]] = {}
+    for statement in statements:
+        table = _statement_table(statement)
+        info = partitioned.get(table) if table is not None else None
+        target = re.search(
+            r"\b(?:ON(?:\s+ONLY)?|CLUSTER)\s+([\w@.\"]+)", statement, re.IGNORECASE
+        )
+        if table is None or info is None or target is None:
+            other.append(statement)
+            continue
+
+        identifier = target.group(1)
+        schema = identifier.rsplit(".", 1)[0] + "." if "." in identifier else ""
+        index = parse_index(statement)
+        cluster = parse_cluster(statement)
+        if cluster is not None and cluster[1] not in created:
+            # The partitions of an index created elsewhere, such as a primary key,
+            # have generated names, so there is nothing to cluster each partition on
+            logger.info(f"Skipping CLUSTER of partitioned {table} on {cluster[1]}")
+            continue
+        if index is not None:
+            created.add(index.name)
+            parents.append(
+                re.sub(
+                    r"\bON\s+(?!ONLY\b)",
+                    "ON ONLY ",
+                    statement,
+                    count=1,
+                    flags=re.IGNORECASE,
+                )
+            )
+        for partition in info.partitions:
+            suffix = (
+                partition[len(table) + 1 :]
+                if partition.startswith(table)
+                else partition
+            )
+            job = partition_jobs.setdefault(partition, [])
+            if index is not None:
+                name = f"{index.name}_{suffix}"
+                job.append(
+                    re.sub(
+                        rf"\b{index.name}\b\s+ON\s+{re.escape(identifier)}",
+                        f"{name} ON {schema}{partition}",
+                        statement,
+                        count=1,
+                        flags=re.IGNORECASE,
+                    )
+                )
+                job.append(
+                    f"ALTER INDEX {schema}{index.name} ATTACH PARTITION {schema}{name}"
+                )
+            elif cluster is not None:
+                job.append(f"CLUSTER {schema}{partition} USING {cluster[1]}_{suffix}")
+    return parents, group_by_table(other) + list(partition_jobs.values())
@@ -0,0 +1,78 @@
+"""Data files split into parts, and the state of a resumable load.
+
+A big table can be written as many part files, such as ``MEASUREMENT/part-0000.csv``
+to ``MEASUREMENT/part-0511.csv``, instead of a single ``MEASUREMENT.csv``. Each
+part is loaded on its own, so parts load concurrently and a failed part can be
+retried, or skipped when a load is resumed, without touching the others.
+"""
+
+import json
+import os
+import threading
+from fnmatch import fnmatch
+from importlib.abc import Traversable
+from pathlib import Path
+from typing import Any, Union
+
+
+def part_files(
+    data_dir: Union[Path, Traversable], table_name: str, pattern: str
+) -> list[Union[Path, Traversable]]:
+    """Return the part files of a table matching ``pattern``, in name order.
+
+    ``pattern`` is relative to the data directory and may use ``{table}`` for the
+    table name, as in ``{table}/part-*.csv``. Only the last path component may
+    hold wildcards.
+    """
+    directory, _, name = pattern.format(table=table_name).rpartition("/")
+    base = data_dir
+    for component in filter(None, directory.split("/")):
+        base = base / component
+    if not base.is_dir():
+        return []
+    return sorted(
+        (
+            path
+            for path in base.iterdir()
+            if fnmatch(path.name, name) and path.is_file()
+        ),
+        key=lambda path: path.name,
+    )
+
+
+class LoadState:
+    """
+    The status of each file of a load, kept in a JSON file so a load can resume.
+
+    Files are keyed as ``TABLE/name``, the upper-case table name and the file's
+    name, such as ``PERSON/PERSON.csv`` or ``MEASUREMENT/part-0000.csv``, under
+    ``files``. Each holds the file's ``status`` (``loading``, ``done`` or
+    ``failed``) and, as they are known, its ``attempts``, last ``error`` and
+    ``committed_rows``. The state file is rewritten after every update, through
+    a temporary file so that it is never left half written.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._files: dict[str, dict[str, Any]] = {}
+        if self.path.exists():
+            self._files = json.loads(self.path.read_text()).get("files", {})
+
+    def done(self, key: str) -> bool:
+        """Return whether a file has already been loaded."""
+        with self._lock:
+            return self._files.get(key, {}).get("status") == "done"
+
+    def get(self, key: str) -> dict[str, Any]:
+        """Return the recorded state of a file."""
+        with self._lock:
+            return dict(self._files.get(key, {}))
+
+    def update(self, key: str, **fields: Any) -> None:
+        """Record new fields for a file and save the state."""
+        with self._lock:
+            self._files.setdefault(key, {}).update(fields)
+            temporary = self.path.with_name(self.path.name + ".tmp")
+            temporary.write_text(json.dumps({"files": self._files}, indent=2))
+            os.replace(temporary, self.path)
@@ -1,23 +1,92 @@
 from sqlalchemy import create_engine, MetaData, text
 from importlib.resources import files
+import csv
+import io
 import logging
+import queue
+import re
+import threading
+from collections import deque
+from functools import partial
+from itertools import islice
 from .base import Database
+from .convert import ConversionPool
+from .layout import compact_table
+from .storage import storage_statements
+from .distribution import adapt_distributed_constraints, distribution_statements
+from .partitioning import (
+    PartitionInfo,
+    adapt_constraints,
+    adapt_primary_keys,
+    partition_ddl,
+)
+from .quarantine import batches, bisect_load, numbered_records
+from .scripts import parse_cluster, parse_tables, split_statements
+from .streams import (
+    ChunkReader,
+    QueueReader,
+    TextStream,
+    chunked,
+    iter_chunks,
+    iter_records,
+)
+from .tee import split_targets, target_settings, tee_copy
+from .sampling import RowFilter
+from .transforms import Transform, transform_chunks
+from .workers import run_parallel
 from omop_lite.settings import Settings
-from typing import Union
-from pathlib import Path
+from typing import Any, Callable, Optional, Union
+from pathlib import Path, PurePosixPath
 from importlib.abc import Traversable
 
 logger = logging.getLogger(__name__)
 
+# Replication lag, and sessions of the database waiting on I/O, as a measure of
+# how busy the server is
+HEALTH_SQL = """
+SELECT
+    (SELECT EXTRACT(EPOCH FROM MAX(replay_lag)) FROM pg_stat_replication),
+    (SELECT COUNT(*) FROM pg_stat_activity
+     WHERE state = 'active' AND wait_event_type = 'IO'
+     AND datname = current_database())
+"""
+
+# Sessions waiting on I/O at once above which the server's disks are saturated
+MAX_IO_WAITS = 8
+
 
 class PostgresDatabase(Database):
     def __init__(self, settings: Settings) -> None:
         super().__init__(settings)
         self.db_url = f"postgresql+psycopg2://{settings.db_user}:{settings.db_password}@{settings.db_host}:{settings.db_port}/{settings.db_name}"
-        self.engine = create_engine(self.db_url)
+        # Files, and the extra streams of partitioned or distributed tables, share
+        # load_workers COPY connections between them
+        self.engine = create_engine(
+            self.db_url,
+            pool_size=max(5, settings.load_workers, settings.index_workers),
+        )
+        self._streams = threading.BoundedSemaphore(max(1, settings.load_workers))
         self.metadata = MetaData(schema=settings.schema_name)
         self.metadata.reflect(bind=self.engine)
         self.file_path = files(f"omop_lite.scripts.pg.{settings.omop_version}")
+        self._parallel_tables: set[str] = set()
+        # Processes converting transformed files, while data is loaded
+        self._converter: Optional[ConversionPool] = None
+        # Whether the server can read the data files, checked on the first load
+        self._server_copy: Optional[bool] = None
+        self._server_copy_lock = threading.Lock()
+        self.targets: list[PostgresDatabase] = [
+            PostgresDatabase(target_settings(settings, url))
+            for url in split_targets(settings.targets)
+        ]
+        # The status of each file on each database, when loading several at once
+        self.target_status: dict[str, dict[str, str]] = {}
+
+    @property
+    def target_name(self) -> str:
+        return (
+            f"{self.settings.db_host}:{self.settings.db_port}/{self.settings.db_name}"
+        )
 
     def create_schema(self, schema_name: str) -> None:
         if not self.engine:
@@ -26,14 +95,309 @@ class PostgresDatabase(Database):
             connection.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{schema_name}"'))
             logger.info(f"Schema '{schema_name}' created.")
             connection.commit()
+        for target in self.targets:
+            target.create_schema(schema_name)
+
+    def swap_schema(self, replacement: str, previous: str) -> None:
+        """Rename ``replacement`` to the schema, in one transaction, on every target.
+
+        Renaming takes only a brief lock on the schemas, so queries running
+        against the current schema finish against it. The schema ``previous`` held
+        is renamed aside in the same transaction, and only dropped once the swap
+        has committed.
+        """
+        if not self.engine:
+            raise RuntimeError("Database engine not initialized")
+        live = self.settings.schema_name
+        discard = None
+        if previous != replacement:
+            discard = f"{previous}_drop"
+            # Left by a swap that failed before dropping it
+            self.drop_schema(discard)
+        with self.engine.begin() as connection:
+
+            def exists(name: str) -> bool:
+                return (
+                    connection.execute(
+                        text("SELECT 1 FROM pg_namespace WHERE nspname = :name"),
+                        {"name": name},
+                    ).first()
+                    is not None
+                )
+
+            if discard is not None and exists(previous):
+                connection.execute(
+                    text(f'ALTER SCHEMA "{previous}" RENAME TO "{discard}"')
+                )
+            else:
+                discard = None
+            current = exists(live)
+            if current:
+                connection.execute(
+                    text(f'ALTER SCHEMA "{live}" RENAME TO "{live}_swap"')
+                )
+            connection.execute(text(f'ALTER SCHEMA "{replacement}" RENAME TO "{live}"'))
+            if current:
+                connection.execute(
+                    text(f'ALTER SCHEMA "{live}_swap" RENAME TO "{previous}"')
+                )
+        if discard is not None:
+            self.drop_schema(discard)
+        logger.info(f"Swapped '{replacement}' in as '{live}', keeping '{previous}'")
+        for target in self.targets:
+            target.swap_schema(replacement, previous)
+
+    def create_tables(self) -> None:
+        """
+        Create the tables, partitioning the clinical event tables if configured.
+
+        Hash partitioning splits each table on ``person_id``, range partitioning by
+        year on its first required date column. The compact DDL profile reorders
+        the columns of every table to minimise alignment padding. The storage
+        settings are applied next, and in distributed mode the tables are then
+        distributed over the Citus cluster. The same tables are created on every
+        target.
+        """
+        if (
+            self.settings.partitioning == "none"
+            and self.settings.ddl_profile == "default"
+        ):
+            super().create_tables()
+        else:
+            tables = self._slim_tables(
+                parse_tables(self._read_sql_file(self._script("ddl.sql")))
+            )
+            if self.settings.ddl_profile == "compact":
+                tables = [
+                    compact_table(table, self.settings.narrow_types) for table in tables
+                ]
+            statements = partition_ddl(
+                tables,
+                self.settings.partitioning,
+                count=self.settings.partition_count,
+                start_year=self.settings.partition_start_year,
+                end_year=self.settings.partition_end_year,
+            )
+            self._execute_sql(";\n".join(statements), "ddl.sql")
+            self.refresh_metadata()
+
+        if (
+            self.settings.text_compression != "default"
+            or self.settings.toast_tuple_target is not None
+            or self.settings.fillfactor is not None
+        ):
+            self._apply_storage_settings()
+
+        if self.settings.distributed:
+            self._distribute_tables()
+
+        for target in self.targets:
+            target.create_tables()
+
+    def add_all_constraints(self) -> list[str]:
+        """Add the primary keys, constraints and indices, on every target too."""
+        failed = super().add_all_constraints()
+        for target in self.targets:
+            failed.extend(
+                f"{target.target_name}: {error}"
+                for error in target.add_all_constraints()
+            )
+        return failed
+
+    def _apply_storage_settings(self) -> None:
+        """Set the text compression, toast_tuple_target and fillfactor of the tables."""
+        compression: Optional[str] = self.settings.text_compression
+        if compression == "default":
+            compression = None
+        elif compression == "lz4" and not self._lz4_available():
+            logger.warning(
+                "LZ4 compression needs PostgreSQL 14 built with lz4, keeping the default"
+            )
+            compression = None
+
+        tables = self._slim_tables(
+            parse_tables(self._read_sql_file(self._script("ddl.sql")))
+        )
+        statements = storage_statements(
+            tables,
+            compression=compression,
+            toast_tuple_target=self.settings.toast_tuple_target,
+            fillfactor=self.settings.fillfactor,
+            partitions={
+                table: info.partitions
+                for table, info in self.partitioned_tables().items()
+            },
+        )
+        if statements:
+            self._execute_sql(";\n".join(statements), "storage settings")
+
+    def _lz4_available(self) -> bool:
+        if not self.engine:
+            raise RuntimeError("Database engine not initialized")
+        with self.engine.connect() as connection:
+            return (
+                connection.execute(
+                    text(
+                        "SELECT 1 FROM pg_settings "
+                        "WHERE name = 'default_toast_compression' "
+                        "AND 'lz4' = ANY(enumvals)"
+                    )
+                ).first()
+                is not None
+            )
+
+    def _distribute_tables(self) -> None:
+        """
+        Distribute the tables over the Citus cluster.
+
+        The tables ``ddl.sql`` hints to distribute on a key become distributed
+        tables, co-located on that key, and the rest become reference tables.
+        """
+        if not self._citus_installed():
+            raise RuntimeError(
+                f"The citus extension is not installed in database '{self.settings.db_name}'"
+            )
+
+        logger.info("Distributing tables over the Citus cluster")
+        tables = parse_tables(self._read_sql_file(self._script("ddl.sql")))
+        for statement in distribution_statements(tables):
+            self._execute_autocommit(statement)
+
+    def _citus_installed(self) -> bool:
+        if not self.engine:
+            raise RuntimeError("Database engine not initialized")
+        with self.engine.connect() as connection:
+            return (
+                connection.execute(
+                    text("SELECT 1 FROM pg_extension WHERE extname = 'citus'")
+                ).first()
+                is not None
+            )
+
+    def distributed_tables(self) -> dict[str, Optional[str]]:
+        """
+        Return the Citus tables, mapped to their distribution column.
+
+        Reference tables map to None. Without Citus there are none.
+        """
+        if not self._citus_installed():
+            return {}
+        if not self.engine:
+            raise RuntimeError("Database engine not initialized")
+        with self.engine.connect() as connection:
+            result = connection.execute(
+                text(
+                    "SELECT c.relname, column_to_column_name(p.logicalrelid, p.partkey) "
+                    "FROM pg_dist_partition p "
+                    "JOIN pg_class c ON c.oid = p.logicalrelid "
+                    "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                    "WHERE n.nspname = :schema"
+                ),
+                {"schema": self.settings.schema_name},
+            )
+            return {table: column for table, column in result}
+
+    @staticmethod
+    def _table_keys(
+        partitioned: dict[str, PartitionInfo], distributed: dict[str, Optional[str]]
+    ) -> dict[str, tuple[str, ...]]:
+        """Return the columns a unique constraint on each table must include."""
+        keys = {table: info.key for table, info in partitioned.items()}
+        for table, column in distributed.items():
+            key = keys.get(table, ())
+            if column is not None and column not in key:
+                keys[table] = key + (column,)
+        return keys
+
+    def partitioned_tables(self) -> dict[str, PartitionInfo]:
+        if not self.engine:
+            raise RuntimeError("Database engine not initialized")
+        with self.engine.connect() as connection:
+            result = connection.execute(
+                text(
+                    "SELECT parent.relname, pg_get_partkeydef(parent.oid), child.relname "
+                    "FROM pg_partitioned_table p "
+                    "JOIN pg_class parent ON parent.oid = p.partrelid "
+                    "JOIN pg_namespace n ON n.oid = parent.relnamespace "
+                    "LEFT JOIN pg_inherits i ON i.inhparent = parent.oid "
+                    "LEFT JOIN pg_class child ON child.oid = i.inhrelid "
+                    "WHERE n.nspname = :schema "
+                    "ORDER BY parent.relname, child.relname"
+                ),
+                {"schema": self.settings.schema_name},
+            )
+            partitioned: dict[str, PartitionInfo] = {}
+            for table, key, partition in result:
+                if table not in partitioned:
+                    columns = key[key.index("(") + 1 : key.rindex(")")]
+                    partitioned[table] = PartitionInfo(
+                        key=tuple(c.strip().lower() for c in columns.split(","))
+                    )
+                if partition is not None:
+                    partitioned[table].partitions.append(partition)
+            return partitioned
+
+    def drop_tables(self) -> None:
+        """Drop all tables, leaving the partitions to go with their parent table."""
+        if not self.metadata or not self.engine:
+            raise RuntimeError("Database not properly initialized")
+
+        partitions = {
+            partition
+            for info in self.partitioned_tables().values()
+            for partition in info.partitions
+        }
+        if not partitions:
+            super().drop_tables()
+            return
+
+        self.metadata.drop_all(
+            bind=self.engine,
+            tables=[
+                table
+                for table in self.metadata.sorted_tables
+                if table.name not in partitions
+            ],
+        )
+        logger.info("✅ All tables dropped successfully")
+
+    def add_primary_keys(self) -> None:
+        """
+        Add primary keys.
+
+        Override to add the partition key or distribution column to the primary keys
+        of partitioned and distributed tables.
+        """
+        keys = self._table_keys(self.partitioned_tables(), self.distributed_tables())
+        if not keys:
+            super().add_primary_keys()
+            return
+
+        statements = adapt_primary_keys(
+            split_statements(self._read_sql_file(self._script("primary_keys.sql"))),
+            keys,
+        )
+        self._execute_sql(";\n".join(statements), "primary_keys.sql")
 
     def add_constraints(self) -> None:
         """
         Add primary keys, constraints, and indices.
 
-        Override to add full-text search.
+        Override to add full-text search, and to leave out the foreign keys that
+        partitioned or distributed tables cannot enforce.
         """
-        super().add_constraints()
+        partitioned = self.partitioned_tables()
+        distributed = self.distributed_tables()
+        if partitioned or distributed:
+            statements = adapt_constraints(
+                split_statements(self._read_sql_file(self._script("constraints.sql"))),
+                self._table_keys(partitioned, distributed),
+            )
+            if distributed:
+                statements = adapt_distributed_constraints(statements, distributed)
+            self._execute_sql(";\n".join(statements), "constraints.sql")
+        else:
+            super().add_constraints()
         self._add_full_text_search()
 
     def _add_full_text_search(self) -> None:
@@ -53,29 +417,620 @@ class PostgresDatabase(Database):
         logger.info("Added full-text search column")
 
         # Create the GIN index
-        fts_index_sql = self.file_path.joinpath("fts_index.sql")
+        fts_index_sql = self._script("fts_index.sql")
         self._execute_sql_file(fts_index_sql)
         logger.info("Created full-text search index")
 
-    def _bulk_load(self, table_name: str, file_path: Union[Path, Traversable]) -> None:
+    def _online_index_statement(self, statement: str) -> Optional[str]:
+        """
+        Build indices with CREATE INDEX CONCURRENTLY.
+
+        CLUSTER takes an ACCESS EXCLUSIVE lock for the whole rewrite, so it is skipped.
+        An index ``ON ONLY`` a partitioned table cannot be built concurrently, but
+        creating it is instant; its partitions are built concurrently instead.
+        """
+        if parse_cluster(statement):
+            return None
+        if re.search(r"\bON\s+ONLY\b", statement, re.IGNORECASE):
+            return statement
+        return re.sub(
+            r"^(CREATE\s+(?:UNIQUE\s+)?INDEX)\s+(?!CONCURRENTLY\b)",
+            r"\1 CONCURRENTLY ",
+            statement,
+            flags=re.IGNORECASE,
+        )
+
+    def invalid_indices(self) -> list[str]:
+        if not self.engine:
+            raise RuntimeError("Database engine not initialized")
+        with self.engine.connect() as connection:
+            result = connection.execute(
+                text(
+                    "SELECT c.relname FROM pg_index i "
+                    "JOIN pg_class c ON c.oid = i.indexrelid "
+                    "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                    "WHERE NOT i.indisvalid AND n.nspname = :schema"
+                ),
+                {"schema": self.settings.schema_name},
+            )
+            return [row[0] for row in result]
+
+    def _drop_invalid_index(self, name: str) -> None:
+        logger.info(f"Dropping invalid index {name}")
+        self._execute_autocommit(
+            f'DROP INDEX CONCURRENTLY IF EXISTS "{self.settings.schema_name}"."{name}"'
+        )
+
+    def load_data(self) -> list[str]:
+        """
+        Load data into tables.
+
+        Override to split the file of a partitioned or distributed table over
+        ``load_workers`` COPY streams, the server routing each row to its partition
+        or shard. With ``suspend_autovacuum`` set, autovacuum is turned off for the
+        tables during the load, which is followed by one VACUUM (ANALYZE) pass.
+        The autovacuum settings are restored however the load ends. With
+        ``convert_workers`` set, transformed files are converted on that many
+        processes.
+        """
+        if self.settings.load_workers > 1:
+            self._parallel_tables = set(self.partitioned_tables()) | {
+                table
+                for table, column in self.distributed_tables().items()
+                if column is not None
+            }
+        suspended = None
+        if self.settings.suspend_autovacuum:
+            suspended = self._suspend_autovacuum()
+        self.target_status = {}
+        try:
+            if self.settings.convert_workers > 1:
+                self._converter = ConversionPool(self.settings.convert_workers)
+            failed = super().load_data()
+            if self.targets:
+                self._log_target_status()
+            if suspended is not None:
+                self._vacuum_analyze()
+            return failed
+        finally:
+            self._parallel_tables = set()
+            if self._converter is not None:
+                self._converter.close()
+                self._converter = None
+            if suspended is not None:
+                self._restore_autovacuum(suspended)
+
+    def _health(self) -> Optional[bool]:
+        """
+        Return whether the replicas are keeping up and the disks are not saturated.
+
+        Replication lag is only visible to superusers and members of pg_monitor,
+        and is taken as none otherwise.
+        """
         if not self.engine:
             raise RuntimeError("Database engine not initialized")
+        with self.engine.connect() as connection:
+            lag, waits = connection.execute(text(HEALTH_SQL)).one()
+        lagging = float(lag or 0) > self.settings.max_replication_lag
+        return not lagging and waits < MAX_IO_WAITS
+
+    def _log_target_status(self) -> None:
+        """Log how many files loaded into each database, and which failed."""
+        for database in (self, *self.targets):
+            status = self.target_status.get(database.target_name, {})
+            failed = {key: s for key, s in status.items() if s != "loaded"}
+            loaded = len(status) - len(failed)
+            if failed:
+                logger.error(
+                    f"Target {database.target_name}: {loaded} files loaded, "
+                    f"{len(failed)} failed"
+                )
+                for key, s in failed.items():
+                    logger.error(f"  {key}: {s}")
+            else:
+                logger.info(f"Target {database.target_name}: {loaded} files loaded")
 
+    def _suspend_autovacuum(self) -> dict[str, tuple[Optional[str], Optional[str]]]:
+        """
+        Turn autovacuum off for the tables in the schema and their TOAST tables.
+
+        Returns the autovacuum_enabled options the tables had before, keyed by
+        table, as a pair for the table and its TOAST table; None where unset. If a
+        table cannot be altered, the tables already altered are restored.
+        """
+        if not self.engine:
+            raise RuntimeError("Database engine not initialized")
+        with self.engine.connect() as connection:
+            result = connection.execute(
+                text(
+                    "SELECT c.relname, "
+                    "(SELECT option_value FROM pg_options_to_table(c.reloptions) "
+                    "WHERE option_name = 'autovacuum_enabled'), "
+                    "(SELECT option_value FROM pg_options_to_table(t.reloptions) "
+                    "WHERE option_name = 'autovacuum_enabled') "
+                    "FROM pg_class c "
+                    "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                    "LEFT JOIN pg_class t ON t.oid = c.reltoastrelid "
+                    "WHERE n.nspname = :schema AND c.relkind = 'r'"
+                ),
+                {"schema": self.settings.schema_name},
+            )
+            previous = {table: (heap, toast) for table, heap, toast in result}
+
+        logger.info(f"Suspending autovacuum on {len(previous)} tables during the load")
+        suspended = {}
+        try:
+            for table, options in previous.items():
+                self._execute_autocommit(
+                    f'ALTER TABLE "{self.settings.schema_name}"."{table}" '
+                    "SET (autovacuum_enabled = false, toast.autovacuum_enabled = false)"
+                )
+                suspended[table] = options
+        except Exception:
+            # Put back the tables already altered before giving up
+            self._restore_autovacuum(suspended)
+            raise
+        return suspended
+
+    def _restore_autovacuum(
+        self, previous: dict[str, tuple[Optional[str], Optional[str]]]
+    ) -> None:
+        """Put back the autovacuum options the tables had before the load."""
+        for table, options in previous.items():
+            settings = []
+            resets = []
+            for name, value in zip(
+                ("autovacuum_enabled", "toast.autovacuum_enabled"), options
+            ):
+                if value is None:
+                    resets.append(name)
+                else:
+                    settings.append(f"{name} = {value}")
+            qualified = f'"{self.settings.schema_name}"."{table}"'
+            try:
+                if settings:
+                    self._execute_autocommit(
+                        f"ALTER TABLE {qualified} SET ({', '.join(settings)})"
+                    )
+                if resets:
+                    self._execute_autocommit(
+                        f"ALTER TABLE {qualified} RESET ({', '.join(resets)})"
+                    )
+            except Exception as e:
+                logger.error(f"Error restoring autovacuum on {table}: {str(e)}")
+        logger.info("Restored autovacuum settings")
+
+    def _vacuum_analyze(self) -> None:
+        """Vacuum and analyze the loaded tables, ``load_workers`` at a time."""
+        if not self.metadata:
+            raise RuntimeError("Database not properly initialized")
+
+        tables = [
+            table
+            for table in (name.lower() for name in self.omop_tables)
+            if f"{self.settings.schema_name}.{table}" in self.metadata.tables
+        ]
+        logger.info(f"Running VACUUM (ANALYZE) on {len(tables)} tables")
+        run_parallel(
+            [
+                partial(
+                    self._execute_autocommit,
+                    f'VACUUM (ANALYZE) "{self.settings.schema_name}"."{table}"',
+                )
+                for table in tables
+            ],
+            self.settings.load_workers,
+        )
+
+    def _read_header(self, f: TextStream) -> list[str]:
+        """Read the header of a CSV file, returning its column names."""
+        line = f.readline()
+        if not line.strip():
+            return []
+        header = next(
+            csv.reader(
+                [line], delimiter=self._get_delimiter(), quotechar=self._get_quote()
+            )
+        )
+        return [column.lstrip("\ufeff").strip().lower() for column in header]
+
+    def _copy_sql(
+        self,
+        table_name: str,
+        columns: list[str],
+        server_path: Optional[str] = None,
+        header: bool = True,
+    ) -> str:
+        """Return the COPY statement for CSV data with the given columns, in order.
+
+        The columns are mapped by name, so the file need not follow the table's
+        column order. The data comes from the client after the header has been
+        read, or from ``server_path``, a file the server reads itself and whose
+        first line it skips if the file has a ``header``.
+        """
         delimiter = self._get_delimiter()
         quote = self._get_quote()
+        column_list = ", ".join(f'"{column}"' for column in columns)
+        options = f"FORMAT csv, DELIMITER E'{delimiter}', NULL '', QUOTE E'{quote}'"
+        if server_path is None:
+            source = "STDIN"
+        else:
+            source = "'" + server_path.replace("'", "''") + "'"
+            if header:
+                options += ", HEADER"
+        return (
+            f"COPY {self.settings.schema_name}.{table_name} ({column_list}) "
+            f"FROM {source} WITH ({options}, ENCODING 'UTF8')"
+        )
+
+    def _server_path(self, file_path: Union[str, Path, Traversable]) -> Optional[str]:
+        """
+        Return the path the server reads a data file at, for a server-side COPY.
+
+        ``data_dir`` is seen by the server at ``server_data_dir``. Whether the
+        server can read the files is checked once, on the first file, with
+        pg_stat_file; if it cannot, every file is streamed from the client.
+        """
+        if not self.settings.server_side_copy or self.settings.synthetic:
+            return None
+        if not isinstance(file_path, Path) or not file_path.is_file():
+            # Pipes and standard input can only be streamed from the client
+            return None
+        try:
+            relative = (
+                Path(str(file_path))
+                .resolve()
+                .relative_to(Path(self.settings.data_dir).resolve())
+            )
+        except ValueError:
+            return None
+        server_dir = self.settings.server_data_dir or str(
+            Path(self.settings.data_dir).resolve()
+        )
+        server_path = str(PurePosixPath(server_dir, *relative.parts))
+
+        with self._server_copy_lock:
+            if self._server_copy is None:
+                self._server_copy = self._server_can_read(
+                    server_path, Path(str(file_path)).stat().st_size
+                )
+        return server_path if self._server_copy else None
+
+    def _server_can_read(self, server_path: str, size: int) -> bool:
+        """Check the server sees a data file at ``server_path``, of the same size."""
+        if not self.engine:
+            raise RuntimeError("Database engine not initialized")
+        try:
+            with self.engine.connect() as connection:
+                server_size = connection.execute(
+                    text("SELECT size FROM pg_stat_file(:path)"), {"path": server_path}
+                ).scalar()
+        except Exception as e:
+            logger.warning(
+                f"Server cannot read {server_path}, streaming data from the client: "
+                f"{str(e)}"
+            )
+            return False
+        if server_size != size:
+            logger.warning(
+                f"Server sees {server_path} as {server_size} bytes, not {size}, "
+                "streaming data from the client"
+            )
+            return False
+        logger.info("Server reads the data files directly")
+        return True
+
+    def _bulk_load(
+        self,
+        table_name: str,
+        file_path: Union[str, Path, Traversable],
+        header: bool = True,
+    ) -> None:
+        if not self.engine:
+            raise RuntimeError("Database engine not initialized")
+
+        with self._streams, self._open(file_path) as f:
+            if header:
+                columns = self._read_header(f)
+                if not columns:
+                    logger.warning(f"{file_path} has no header, skipping...")
+                    return
+                columns = self._header_columns(table_name, columns)
+            else:
+                columns = self._spec_columns(table_name)
+
+            transforms = self._transforms(table_name, columns)
+            keep = self._row_filter(table_name, columns)
+            positions = self._projection(table_name, columns)
+            quarantine = self.settings.on_error == "quarantine"
+            server_path = None
+            if (
+                not transforms
+                and keep is None
+                and positions is None
+                and not self.targets
+                and self._throttle is None
+                and not quarantine
+                and not self._chunked_commits()
+            ):
+                server_path = self._server_path(file_path)
+            if server_path is not None:
+                self._execute_copy(
+                    self._copy_sql(table_name, columns, server_path, header)
+                )
+                self._count_server_file(table_name, file_path)
+                return
+
+            columns, stream = self._client_source(
+                table_name, f, columns, transforms, keep, positions, file_path, header
+            )
+            with self._read_ahead(stream) as source:
+                sql = self._copy_sql(table_name, columns)
+                if self.targets:
+                    self._tee_copy(sql, source, self._file_key(table_name, file_path))
+                    return
+                if quarantine:
+                    rejects = self._quarantine_copy(sql, source, 2 if header else 1)
+                    self._quarantine(table_name, file_path, rejects)
+                    return
+                if self._chunked_commits():
+                    self._chunked_copy(
+                        sql, source, self._file_key(table_name, file_path)
+                    )
+                    return
+                if table_name in self._parallel_tables:
+                    self._parallel_copy(sql, source)
+                    return
+
+                self._execute_copy(sql, source)
+
+    def _client_source(
+        self,
+        table_name: str,
+        f: TextStream,
+        columns: list[str],
+        transforms: dict[int, Transform],
+        keep: Optional[RowFilter],
+        positions: Optional[list[int]],
+        file_path: Union[str, Path, Traversable, None] = None,
+        header: bool = True,
+    ) -> tuple[list[str], TextStream]:
+        """
+        Return the columns of a file's COPY and the file to stream to it.
+
+        The file is transformed, filtered and projected as it is read, and drawn
+        from the load's throttle and counters. A local file that is not filtered
+        is converted on the load's process pool, if it has one.
+        """
+        delimiter, quote = self._get_delimiter(), self._get_quote()
+        if (
+            self._converter is not None
+            and (transforms or positions is not None)
+            and keep is None
+            and isinstance(file_path, Path)
+            and file_path.is_file()
+        ):
+            f = ChunkReader(
+                self._converter.convert(
+                    file_path, header, transforms, delimiter, quote, positions
+                )
+            )
+        elif transforms or keep is not None or positions is not None:
+            f = ChunkReader(
+                transform_chunks(
+                    iter_records(f, quote),
+                    transforms,
+                    delimiter,
+                    quote,
+                    keep=keep,
+                    positions=positions,
+                )
+            )
+        if positions is not None:
+            columns = [columns[position] for position in positions]
+        return columns, self._throttled(f, table_name)
+
+    def _count_server_file(
+        self, table_name: str, file_path: Union[str, Path, Traversable]
+    ) -> None:
+        """Count a file the server read itself, once it has loaded."""
+        if self._throughput is not None:
+            self._throughput.add(table_name, Path(str(file_path)).stat().st_size)
+
+    def _execute_copy(self, sql: str, f: Optional[TextStream] = None) -> None:
+        """Run a COPY statement, streaming ``f`` to it if given, and commit."""
+        if not self.engine:
+            raise RuntimeError("Database engine not initialized")
+        connection = self.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            try:
+                if f is None:
+                    cursor.execute(sql)
+                else:
+                    cursor.copy_expert(sql, f)
+                connection.commit()
+            finally:
+                cursor.close()
+        finally:
+            connection.close()
+
+    def _chunked_copy(self, sql: str, f: TextStream, key: str) -> None:
+        """
+        Copy the rest of a file in chunks of ``commit_rows`` rows or
+        ``commit_bytes`` characters, committing each one.
+
+        Rows committed by an earlier attempt are skipped, and a chunk that fails
+        for a transient reason is copied again after a backoff.
+        """
+        committed = self._committed_rows(key)
+        records = iter_records(f, self._get_quote())
+        if committed:
+            logger.info(f"Resuming {key} after {committed} committed rows")
+            deque(islice(records, committed), maxlen=0)
+
+        for chunk in chunked(
+            records, self.settings.commit_rows, self.settings.commit_bytes
+        ):
+            data = "".join(chunk)
+            self._retry(
+                lambda: self._execute_copy(sql, io.StringIO(data)), f"copying {key}"
+            )
+            committed += len(chunk)
+            self._commit_offset(key, committed)
+
+    def _quarantine_copy(
+        self, sql: str, f: TextStream, first_line: int
+    ) -> list[tuple[int, str, str]]:
+        """
+        Copy the rest of a file in batches, bisecting failed batches to their bad
+        records, and return those records.
+
+        Each attempt runs in a savepoint, so a failed one leaves nothing behind,
+        and the good records are committed together at the end.
+        """
+        if not self.engine:
+            raise RuntimeError("Database engine not initialized")
+        rejects: list[tuple[int, str, str]] = []
+        connection = self.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+
+            def load(data: str) -> None:
+                cursor.execute("SAVEPOINT quarantine")
+                try:
+                    cursor.copy_expert(sql, io.StringIO(data))
+                except Exception:
+                    cursor.execute("ROLLBACK TO SAVEPOINT quarantine")
+                    raise
+                cursor.execute("RELEASE SAVEPOINT quarantine")
+
+            try:
+                records = numbered_records(f, self._get_quote(), first_line)
+                for batch in batches(records):
+                    rejects.extend(bisect_load(batch, load))
+                connection.commit()
+            finally:
+                cursor.close()
+        finally:
+            connection.close()
+        return rejects
+
+    def _tee_copy(self, sql: str, f: TextStream, key: str) -> None:
+        """
+        Copy the rest of a file into this database and every target at once.
+
+        A retry only copies into the databases that have not loaded the file.
+        """
+        databases = [
+            database
+            for database in (self, *self.targets)
+            if self.target_status.get(database.target_name, {}).get(key) != "loaded"
+        ]
+        connections: dict[str, Callable[[], Any]] = {}
+        for database in databases:
+            if not database.engine:
+                raise RuntimeError("Database engine not initialized")
+            connections[database.target_name] = database.engine.raw_connection
+        chunks = iter_chunks(iter_records(f, self._get_quote()))
+        errors = tee_copy(sql, chunks, connections)
+        for name, error in errors.items():
+            status = self.target_status.setdefault(name, {})
+            if error is None:
+                status[key] = "loaded"
+            else:
+                reason = str(error).strip().splitlines() or [type(error).__name__]
+                status[key] = f"failed: {reason[0]}"
+                logger.warning(f"Error loading {key} into {name}: {str(error)}")
+        failed = [error for error in errors.values() if error is not None]
+        if failed:
+            raise failed[0]
+
+    def _parallel_copy(self, sql: str, f: TextStream) -> None:
+        """
+        Copy the rest of a file over up to ``load_workers`` connections at once.
+
+        The file's own stream is joined by as many more as other files leave
+        free, so the load never holds more than ``load_workers`` streams. Records
+        are dealt out in chunks to one queue per connection. Once every stream has
+        finished, each connection commits, or all roll back if any stream failed.
 
-        with open(str(file_path), "r") as f:
-            connection = self.engine.raw_connection()
+        The commits are not atomic: if one fails after another has committed, the
+        file is partly loaded, and the error raised is not retried, as loading the
+        file again would duplicate the rows already committed.
+        """
+        workers = 1
+        while workers < self.settings.load_workers and self._streams.acquire(
+            blocking=False
+        ):
+            workers += 1
+        try:
+            self._copy_streams(sql, f, workers)
+        finally:
+            for _ in range(workers - 1):
+                self._streams.release()
+
+    def _copy_streams(self, sql: str, f: TextStream, workers: int) -> None:
+        """Copy the rest of a file over ``workers`` connections, as one load."""
+        engine = self.engine
+        if not engine:
+            raise RuntimeError("Database engine not initialized")
+        queues: list[queue.Queue[Optional[str]]] = [
+            queue.Queue(maxsize=4) for _ in range(workers)
+        ]
+        finished = threading.Barrier(workers)
+        errors: list[Exception] = []
+        committed: list[bool] = []
+
+        def copy(reader: QueueReader) -> None:
+            connection = None
             try:
+                connection = engine.raw_connection()
                 cursor = connection.cursor()
                 try:
-                    with open(str(file_path), "r") as f:
-                        cursor.copy_expert(
-                            f"COPY {self.settings.schema_name}.{table_name} FROM STDIN WITH (FORMAT csv, DELIMITER E'{delimiter}', NULL '', QUOTE E'{quote}', HEADER, ENCODING 'UTF8')",
-                            f,
-                        )
-                    connection.commit()
+                    cursor.copy_expert(sql, reader)
                 finally:
                     cursor.close()
+            except Exception as e:
+                errors.append(e)
+                reader.drain()
+            finished.wait()
+            if connection is None:
+                return
+            try:
+                if errors:
+                    connection.rollback()
+                else:
+                    connection.commit()
+                    committed.append(True)
+            except Exception as e:
+                errors.append(e)
             finally:
                 connection.close()
+
+        threads = [
+            threading.Thread(target=copy, args=(QueueReader(chunks),))
+            for chunks in queues
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            records = iter_records(f, self._get_quote())
+            for n, chunk in enumerate(iter_chunks(records)):
+                queues[n % workers].put(chunk)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            for chunks in queues:
+                chunks.put(None)
+            for thread in threads:
+                thread.join()
+
+        if errors and committed:
+            # Not transient, so the file is not loaded again on top of itself
+            raise RuntimeError(
+                f"{len(committed)} of {workers} COPY streams committed before "
+                f"another failed, the file is partly loaded: {str(errors[0])}"
+            ) from errors[0]
+        if errors:
+            raise errors[0]
@@ -0,0 +1,177 @@
+"""Loading PostgreSQL over asyncio, with psycopg 3.
+
+Every file of a wave is a task on one event loop, ``load_workers`` of them
+streaming at once over a pool of async connections, so thousands of part files
+cost a coroutine each rather than a thread. Reads, and the decompressing and
+transforming that go with them, run on a small thread pool so they never stall
+the loop. Everything other than the load itself, such as the DDL and indices,
+runs as it does for :class:`PostgresDatabase`.
+
+psycopg 3 and psycopg-pool are optional, installed with ``omop-lite[async]``.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from importlib.abc import Traversable
+from pathlib import Path
+from typing import Any, Union
+
+from omop_lite.settings import Settings
+
+from .postgres import PostgresDatabase
+from .retry import is_transient
+
+try:
+    from psycopg_pool import AsyncConnectionPool
+except ImportError:
+    AsyncConnectionPool = None  # type: ignore[assignment,misc]
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPostgresDatabase(PostgresDatabase):
+    """PostgreSQL, loaded with many COPY streams on one event loop."""
+
+    def __init__(self, settings: Settings) -> None:
+        if AsyncConnectionPool is None:
+            raise ImportError(
+                "The async load engine needs psycopg 3, "
+                "install it with: pip install 'omop-lite[async]'"
+            )
+        super().__init__(settings)
+
+    def _connect_kwargs(self) -> dict[str, Any]:
+        """Return the psycopg connection parameters of the database."""
+        return {
+            "host": self.settings.db_host,
+            "port": self.settings.db_port,
+            "user": self.settings.db_user,
+            "password": self.settings.db_password,
+            "dbname": self.settings.db_name,
+        }
+
+    def _load_parts(
+        self,
+        parts: list[tuple[str, Union[Path, Traversable], bool]],
+        failed: list[str],
+        workers: int = 1,
+    ) -> int:
+        """Load the files of a wave on an event loop, ``load_workers`` at a time."""
+        workers = max(1, self.settings.load_workers)
+        if parts:
+            asyncio.run(self._load_parts_async(parts, failed, workers))
+        return workers
+
+    async def _load_parts_async(
+        self,
+        parts: list[tuple[str, Union[Path, Traversable], bool]],
+        failed: list[str],
+        workers: int,
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        # asyncio.run shuts the executor down when the wave is done
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=workers))
+        slots = asyncio.Semaphore(workers)
+
+        async with AsyncConnectionPool(
+            kwargs=self._connect_kwargs(), min_size=1, max_size=workers, open=False
+        ) as pool:
+
+            async def load(
+                table_name: str, file_path: Union[Path, Traversable], header: bool
+            ) -> None:
+                # Files are only opened once there is a connection free for them
+                async with slots:
+                    await self._load_part_async(
+                        pool, table_name, file_path, header, failed
+                    )
+
+            await asyncio.gather(*(load(*part) for part in parts))
+
+    async def _load_part_async(
+        self,
+        pool: "AsyncConnectionPool[Any]",
+        table_name: str,
+        file_path: Union[Path, Traversable],
+        header: bool,
+        failed: list[str],
+    ) -> None:
+        """Load one file of a table, retrying it up to ``load_retries`` times.
+
+        Only transient errors, such as a lost connection, are retried.
+        """
+        state = self._state
+        key = self._file_key(table_name, file_path)
+        if state is not None and state.done(key):
+            logger.info(f"Skipping {key}, already loaded")
+            return
+
+        logger.info(f"Loading: {key}")
+        attempts = self.settings.load_retries + 1
+        for attempt in range(1, attempts + 1):
+            try:
+                await self._bulk_load_async(pool, table_name.lower(), file_path, header)
+            except Exception as e:
+                if state is not None:
+                    state.update(key, status="failed", attempts=attempt, error=str(e))
+                if attempt < attempts and is_transient(e):
+                    logger.warning(
+                        f"Error loading {key}, attempt {attempt} of {attempts}: {str(e)}"
+                    )
+                    continue
+                logger.error(f"Error loading {key}: {str(e)}")
+                failed.append(key)
+                return
+
+            if state is not None:
+                state.update(key, status="done", attempts=attempt, error=None)
+            logger.info(f"Successfully loaded {key}")
+            return
+
+    async def _bulk_load_async(
+        self,
+        pool: "AsyncConnectionPool[Any]",
+        table_name: str,
+        file_path: Union[Path, Traversable],
+        header: bool = True,
+    ) -> None:
+        """Stream one file into its table with COPY, committing once it is in."""
+        with self._open(file_path) as f:
+            if header:
+                columns = await asyncio.to_thread(self._read_header, f)
+                if not columns:
+                    logger.warning(f"{file_path} has no header, skipping...")
+                    return
+                columns = self._header_columns(table_name, columns)
+            else:
+                columns = self._spec_columns(table_name)
+
+            transforms = self._transforms(table_name, columns)
+            keep = self._row_filter(table_name, columns)
+            positions = self._projection(table_name, columns)
+            if (
+                not transforms
+                and keep is None
+                and positions is None
+                and self._throttle is None
+            ):
+                server_path = await asyncio.to_thread(self._server_path, file_path)
+                if server_path is not None:
+                    sql = self._copy_sql(table_name, columns, server_path, header)
+                    async with pool.connection() as connection:
+                        await connection.execute(sql)
+                    self._count_server_file(table_name, file_path)
+                    return
+
+            columns, source = self._client_source(
+                table_name, f, columns, transforms, keep, positions, file_path, header
+            )
+            size = self.settings.read_buffer_size
+            # The pool commits the connection's transaction when the block ends,
+            # or rolls it back if the COPY failed
+            async with pool.connection() as connection:
+                async with connection.cursor() as cursor:
+                    async with cursor.copy(self._copy_sql(table_name, columns)) as copy:
+                        while data := await asyncio.to_thread(source.read, size):
+                            await copy.write(data)
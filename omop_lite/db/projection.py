@@ -0,0 +1,104 @@
+"""Load profiles, for loading only the columns that are queried.
+
+A load profile is a TOML file with a section for each table, or glob of table
+names, listing the columns to drop and the columns to null out. Column names may
+be globs too::
+
+    ["*"]
+    drop = ["*_source_value"]
+
+    [note]
+    null = ["note_text"]
+
+Dropped columns are left out of the COPY column list and cut from each record as
+it streams in, and ``create_tables`` leaves them out of the tables. Nulled
+columns keep their place in the tables but load empty. Required columns are
+never dropped or nulled, as the rows could not be loaded without them.
+"""
+
+import tomllib
+from dataclasses import dataclass, replace
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Union
+
+from .scripts import TableDefinition
+
+RULE_KEYS = ("drop", "null")
+
+
+@dataclass(frozen=True)
+class ColumnRule:
+    """The columns to drop and null out of the tables matching a glob."""
+
+    table: str
+    drop: tuple[str, ...] = ()
+    null: tuple[str, ...] = ()
+
+
+def _matches(name: str, patterns: tuple[str, ...]) -> bool:
+    return any(fnmatchcase(name, pattern) for pattern in patterns)
+
+
+class LoadProfile:
+    """The column rules of a load profile."""
+
+    def __init__(self, rules: list[ColumnRule]) -> None:
+        self.rules = rules
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> "LoadProfile":
+        """Read a load profile, raising ValueError if it is not valid."""
+        with open(path, "rb") as f:
+            try:
+                profile = tomllib.load(f)
+            except tomllib.TOMLDecodeError as e:
+                raise ValueError(f"Load profile {path} is not valid TOML: {e}")
+
+        rules = []
+        for table, section in profile.items():
+            if not isinstance(section, dict):
+                raise ValueError(f"Load profile {path}: [{table}] must be a table")
+            unknown = set(section) - set(RULE_KEYS)
+            if unknown:
+                raise ValueError(
+                    f"Load profile {path}: unknown keys in [{table}]: "
+                    f"{', '.join(sorted(unknown))}"
+                )
+            columns = {}
+            for key in RULE_KEYS:
+                value = section.get(key, [])
+                if not isinstance(value, list) or not all(
+                    isinstance(column, str) for column in value
+                ):
+                    raise ValueError(
+                        f"Load profile {path}: {table}.{key} must be a list of columns"
+                    )
+                columns[key] = tuple(column.lower() for column in value)
+            rules.append(ColumnRule(table.lower(), columns["drop"], columns["null"]))
+        return cls(rules)
+
+    def _rules(self, table_name: str) -> list[ColumnRule]:
+        name = table_name.lower()
+        return [rule for rule in self.rules if fnmatchcase(name, rule.table)]
+
+    def dropped(self, table_name: str, column: str) -> bool:
+        """Return whether a column of a table is dropped."""
+        column = column.strip().lower()
+        return any(_matches(column, rule.drop) for rule in self._rules(table_name))
+
+    def nulled(self, table_name: str, column: str) -> bool:
+        """Return whether a column of a table loads empty."""
+        column = column.strip().lower()
+        return any(_matches(column, rule.null) for rule in self._rules(table_name))
+
+    def slim_table(self, table: TableDefinition) -> TableDefinition:
+        """Leave the dropped columns out of a table, keeping the required ones."""
+        return replace(
+            table,
+            columns=tuple(
+                column
+                for column in table.columns
+                if not column.nullable or not self.dropped(table.name, column.name)
+            ),
+        )
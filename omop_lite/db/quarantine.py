@@ -0,0 +1,88 @@
+"""Loading what can be loaded from a file with bad rows, and quarantining the rest.
+
+With ``on_error`` set to ``quarantine`` a file is copied in batches of records.
+A batch that fails is split in half and each half retried, down to the single
+records that fail on their own. Those are written to a reject file with the
+database's reason and their line number, and everything else is loaded.
+"""
+
+import csv
+import threading
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Union
+
+from .streams import iter_records
+
+# Records copied at once before any bisection
+BATCH_SIZE = 10000
+
+REJECT_COLUMNS = ("table", "file", "line", "reason", "record")
+
+
+def numbered_records(
+    lines: Iterable[str], quote: str, first_line: int = 1
+) -> Iterator[tuple[int, str]]:
+    """Yield the CSV records of ``lines`` with the line number each starts on."""
+    line = first_line
+    for record in iter_records(lines, quote):
+        yield line, record
+        line += record.count("\n") or 1
+
+
+def batches(
+    records: Iterable[tuple[int, str]], size: int = BATCH_SIZE
+) -> Iterator[list[tuple[int, str]]]:
+    """Group numbered records into lists of ``size``."""
+    records = iter(records)
+    while batch := list(islice(records, size)):
+        yield batch
+
+
+def bisect_load(
+    records: list[tuple[int, str]], load: Callable[[str], None]
+) -> list[tuple[int, str, str]]:
+    """Load ``records``, bisecting around the ones that fail.
+
+    ``load`` copies the joined records and must leave nothing behind when it
+    raises. Returns the line, record and reason of each record that failed alone.
+    """
+    try:
+        load("".join(record for _, record in records))
+        return []
+    except Exception as e:
+        if len(records) == 1:
+            line, record = records[0]
+            return [(line, record, _reason(e))]
+    middle = len(records) // 2
+    return bisect_load(records[:middle], load) + bisect_load(records[middle:], load)
+
+
+def _reason(error: Exception) -> str:
+    """Return the first line of a database error, which says what was wrong."""
+    lines = str(error).strip().splitlines()
+    return lines[0] if lines else type(error).__name__
+
+
+class RejectWriter:
+    """Appends rejected records to a CSV file, from any number of threads."""
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def write(
+        self, table_name: str, file_name: str, rejects: list[tuple[int, str, str]]
+    ) -> None:
+        if not rejects:
+            return
+        with self._lock:
+            new = not self.path.exists() or self.path.stat().st_size == 0
+            with self.path.open("a", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                if new:
+                    writer.writerow(REJECT_COLUMNS)
+                for line, record, reason in rejects:
+                    writer.writerow(
+                        (table_name, file_name, line, reason, record.rstrip("\r\n"))
+                    )
@@ -0,0 +1,63 @@
+"""Retrying database work that failed for a transient reason.
+
+A dropped connection, a failover or a serialization failure says nothing about
+the data, so the same chunk is tried again after a growing delay. Anything else,
+such as a constraint violation, is raised at once.
+"""
+
+import logging
+import time
+from typing import Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# SQLSTATEs of serialization failures, deadlocks, shutdowns and timeouts; class 08
+# (connection exceptions) is transient as a whole
+TRANSIENT_SQLSTATES = {"40001", "40P01", "57P01", "57P02", "57P03", "HYT00", "HYT01"}
+
+# Delay before the first retry, doubled for each one after, up to MAX_DELAY
+RETRY_DELAY = 1.0
+MAX_DELAY = 30.0
+
+
+def _sqlstate(error: BaseException) -> str:
+    """Return the SQLSTATE of a psycopg or pyodbc error, or an empty string."""
+    # psycopg 2 names it pgcode, psycopg 3 sqlstate
+    code = getattr(error, "pgcode", None) or getattr(error, "sqlstate", None)
+    if code:
+        return str(code)
+    if error.args and isinstance(error.args[0], str) and len(error.args[0]) == 5:
+        return error.args[0]
+    return ""
+
+
+def is_transient(error: BaseException) -> bool:
+    """Return whether an error is worth retrying."""
+    # SQLAlchemy wraps the driver's error
+    error = getattr(error, "orig", None) or error
+    code = _sqlstate(error)
+    if code:
+        return code in TRANSIENT_SQLSTATES or code.startswith("08")
+    # Lost connections often come without a SQLSTATE
+    return isinstance(error, (ConnectionError, TimeoutError)) or (
+        type(error).__name__ in ("OperationalError", "InterfaceError")
+    )
+
+
+def with_retries(call: Callable[[], T], retries: int, description: str) -> T:
+    """Run ``call``, retrying it up to ``retries`` times on transient errors."""
+    attempt = 0
+    while True:
+        try:
+            return call()
+        except Exception as e:
+            if attempt >= retries or not is_transient(e):
+                raise
+            delay = min(RETRY_DELAY * 2**attempt, MAX_DELAY)
+            logger.warning(
+                f"Transient error {description}, retrying in {delay:.0f}s: {str(e)}"
+            )
+            time.sleep(delay)
+            attempt += 1
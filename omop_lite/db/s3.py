@@ -0,0 +1,359 @@
+"""Reading the data directory from an S3-compatible bucket.
+
+``s3://bucket/prefix`` data directories are opened as an ``S3Path``, a
+Traversable, so tables and their parts are found as in a local directory. Files
+are streamed with ranged GETs, a few ranges ahead of the reader, straight into
+the load, with nothing written to disk.
+
+Requests use path-style addressing and are signed with AWS Signature Version 4
+when credentials are set. That covers AWS S3 and stand-ins such as MinIO without
+needing an SDK. Credentials and region come from the usual ``AWS_ACCESS_KEY_ID``,
+``AWS_SECRET_ACCESS_KEY``, ``AWS_SESSION_TOKEN`` and ``AWS_REGION`` variables.
+"""
+
+import datetime
+import hashlib
+import hmac
+import http.client
+import io
+import os
+import threading
+import xml.etree.ElementTree as ElementTree
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from importlib.abc import Traversable
+from typing import IO, TYPE_CHECKING, Any, Iterator, Optional
+from urllib.parse import quote, urlsplit
+
+if TYPE_CHECKING:
+    from _typeshed import StrPath, WriteableBuffer
+
+# Objects are fetched in ranges of this many bytes
+PART_SIZE = 8 << 20
+
+# Ranges fetched ahead of the one being read
+READ_AHEAD = 4
+
+_EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+
+
+def _sign(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode("utf-8"), hashlib.sha256).digest()
+
+
+class S3Client:
+    """A minimal S3 client for listing a bucket and reading ranges of objects.
+
+    Each thread keeps its own connection, so ranges of several objects can be
+    fetched at once.
+    """
+
+    def __init__(
+        self,
+        endpoint_url: Optional[str] = None,
+        region: str = "us-east-1",
+        access_key: Optional[str] = None,
+        secret_key: Optional[str] = None,
+        session_token: Optional[str] = None,
+    ) -> None:
+        url = urlsplit(endpoint_url or f"https://s3.{region}.amazonaws.com")
+        self.secure = url.scheme == "https"
+        self.host = url.netloc
+        self.region = region
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.session_token = session_token
+        self._local = threading.local()
+
+    @classmethod
+    def from_env(cls, endpoint_url: Optional[str] = None) -> "S3Client":
+        """Create a client with the credentials and region in the environment."""
+        return cls(
+            endpoint_url=endpoint_url,
+            region=os.environ.get(
+                "AWS_REGION", os.environ.get("AWS_DEFAULT_REGION", "us-east-1")
+            ),
+            access_key=os.environ.get("AWS_ACCESS_KEY_ID"),
+            secret_key=os.environ.get("AWS_SECRET_ACCESS_KEY"),
+            session_token=os.environ.get("AWS_SESSION_TOKEN"),
+        )
+
+    def _connection(self) -> http.client.HTTPConnection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            if self.secure:
+                connection = http.client.HTTPSConnection(self.host, timeout=60)
+            else:
+                connection = http.client.HTTPConnection(self.host, timeout=60)
+            self._local.connection = connection
+        return connection
+
+    def _headers(self, method: str, path: str, query: str) -> dict[str, str]:
+        """Return the headers of a request, signed if there are credentials."""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        headers = {
+            "host": self.host,
+            "x-amz-content-sha256": _EMPTY_SHA256,
+            "x-amz-date": amz_date,
+        }
+        if self.session_token:
+            headers["x-amz-security-token"] = self.session_token
+        if not (self.access_key and self.secret_key):
+            return headers
+
+        signed_headers = ";".join(sorted(headers))
+        canonical_request = "\n".join(
+            [
+                method,
+                path,
+                query,
+                "".join(f"{name}:{headers[name]}\n" for name in sorted(headers)),
+                signed_headers,
+                _EMPTY_SHA256,
+            ]
+        )
+        scope = f"{amz_date[:8]}/{self.region}/s3/aws4_request"
+        string_to_sign = "\n".join(
+            [
+                "AWS4-HMAC-SHA256",
+                amz_date,
+                scope,
+                hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+            ]
+        )
+        key = _sign(("AWS4" + self.secret_key).encode("utf-8"), amz_date[:8])
+        for part in (self.region, "s3", "aws4_request"):
+            key = _sign(key, part)
+        signature = hmac.new(
+            key, string_to_sign.encode("utf-8"), hashlib.sha256
+        ).hexdigest()
+        headers["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, "
+            f"SignedHeaders={signed_headers}, Signature={signature}"
+        )
+        return headers
+
+    def request(
+        self,
+        bucket: str,
+        key: str = "",
+        params: Optional[dict[str, str]] = None,
+        byte_range: Optional[tuple[int, int]] = None,
+    ) -> bytes:
+        """Send a GET request, returning the response body."""
+        path = "/" + quote(bucket) + ("/" + quote(key) if key else "")
+        query = "&".join(
+            f"{quote(name, safe='~')}={quote(value, safe='~')}"
+            for name, value in sorted((params or {}).items())
+        )
+        headers = self._headers("GET", path, query)
+        if byte_range is not None:
+            headers["range"] = f"bytes={byte_range[0]}-{byte_range[1]}"
+
+        for attempt in range(2):
+            connection = self._connection()
+            try:
+                connection.request(
+                    "GET", path + ("?" + query if query else ""), headers=headers
+                )
+                response = connection.getresponse()
+                body = response.read()
+                break
+            except (http.client.HTTPException, OSError):
+                # A kept-alive connection may have been closed by the server
+                connection.close()
+                self._local.connection = None
+                if attempt:
+                    raise
+        if response.status >= 300:
+            raise RuntimeError(
+                f"GET s3://{bucket}/{key} failed: {response.status} {body[:200]!r}"
+            )
+        return body
+
+    def list(
+        self,
+        bucket: str,
+        prefix: str,
+        delimiter: Optional[str] = "/",
+        max_keys: Optional[int] = None,
+    ) -> Iterator[tuple[str, Optional[int]]]:
+        """List the keys under ``prefix``, with the size of objects and None for
+        the common prefixes ending at ``delimiter``."""
+        params = {"list-type": "2", "prefix": prefix}
+        if delimiter:
+            params["delimiter"] = delimiter
+        if max_keys is not None:
+            params["max-keys"] = str(max_keys)
+        while True:
+            root = ElementTree.fromstring(self.request(bucket, params=params))
+            for common in root.findall("{*}CommonPrefixes"):
+                yield common.findtext("{*}Prefix", ""), None
+            for content in root.findall("{*}Contents"):
+                yield (
+                    content.findtext("{*}Key", ""),
+                    int(content.findtext("{*}Size", "0")),
+                )
+            if max_keys is not None or root.findtext("{*}IsTruncated") != "true":
+                return
+            params["continuation-token"] = root.findtext("{*}NextContinuationToken", "")
+
+
+class RangeReader(io.RawIOBase):
+    """A raw stream over an object, fetched ``part_size`` bytes per GET.
+
+    Up to ``read_ahead`` ranges are fetched in the background ahead of the one
+    being read, so the download overlaps the load.
+    """
+
+    def __init__(
+        self,
+        client: S3Client,
+        bucket: str,
+        key: str,
+        size: int,
+        part_size: int = PART_SIZE,
+        read_ahead: int = READ_AHEAD,
+    ) -> None:
+        super().__init__()
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.size = size
+        self.part_size = part_size
+        self.read_ahead = max(1, read_ahead)
+        self._executor = ThreadPoolExecutor(max_workers=self.read_ahead)
+        self._pending: deque[Future[bytes]] = deque()
+        self._next = 0
+        self._buffer = b""
+        self._offset = 0
+
+    def _fetch(self, start: int) -> bytes:
+        end = min(start + self.part_size, self.size) - 1
+        return self.client.request(self.bucket, self.key, byte_range=(start, end))
+
+    def _schedule(self) -> None:
+        while self._next < self.size and len(self._pending) < self.read_ahead:
+            self._pending.append(self._executor.submit(self._fetch, self._next))
+            self._next += self.part_size
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: "WriteableBuffer") -> int:
+        if self._offset >= len(self._buffer):
+            self._schedule()
+            if not self._pending:
+                return 0
+            self._buffer = self._pending.popleft().result()
+            self._offset = 0
+            self._schedule()
+        view = memoryview(buffer).cast("B")
+        size = min(len(view), len(self._buffer) - self._offset)
+        view[:size] = self._buffer[self._offset : self._offset + size]
+        self._offset += size
+        return size
+
+    def close(self) -> None:
+        if not self.closed:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._pending.clear()
+        super().close()
+
+
+class S3Path(Traversable):
+    """A file or directory in an S3 bucket, addressed by key."""
+
+    def __init__(
+        self,
+        client: S3Client,
+        bucket: str,
+        key: str = "",
+        part_size: int = PART_SIZE,
+        read_ahead: int = READ_AHEAD,
+        size: Optional[int] = None,
+    ) -> None:
+        self.client = client
+        self.bucket = bucket
+        self.key = key.strip("/")
+        self.part_size = part_size
+        self.read_ahead = read_ahead
+        self._size = size
+
+    @classmethod
+    def from_url(
+        cls,
+        url: str,
+        client: S3Client,
+        part_size: int = PART_SIZE,
+        read_ahead: int = READ_AHEAD,
+    ) -> "S3Path":
+        """Create the path of an ``s3://bucket/prefix`` URL."""
+        parts = urlsplit(url)
+        return cls(client, parts.netloc, parts.path, part_size, read_ahead)
+
+    def _child(self, key: str, size: Optional[int] = None) -> "S3Path":
+        return S3Path(
+            self.client, self.bucket, key, self.part_size, self.read_ahead, size
+        )
+
+    @property
+    def name(self) -> str:
+        return self.key.rpartition("/")[2] or self.bucket
+
+    def __str__(self) -> str:
+        return f"s3://{self.bucket}/{self.key}"
+
+    def __repr__(self) -> str:
+        return f"S3Path({str(self)!r})"
+
+    def joinpath(self, *descendants: "StrPath") -> "S3Path":
+        parts = [self.key] if self.key else []
+        parts.extend(os.fspath(part).strip("/") for part in descendants)
+        return self._child("/".join(parts))
+
+    def iterdir(self) -> Iterator["S3Path"]:
+        prefix = self.key + "/" if self.key else ""
+        for key, size in self.client.list(self.bucket, prefix):
+            if key != prefix:
+                yield self._child(key, size)
+
+    def size(self) -> Optional[int]:
+        """Return the size of the object, or None if there is none at this key."""
+        if self._size is None and self.key:
+            for key, size in self.client.list(
+                self.bucket, self.key, delimiter=None, max_keys=1
+            ):
+                if key == self.key:
+                    self._size = size
+        return self._size
+
+    def is_file(self) -> bool:
+        return self.size() is not None
+
+    def is_dir(self) -> bool:
+        if not self.key:
+            return True
+        return any(self.client.list(self.bucket, self.key + "/", max_keys=1))
+
+    def open(self, mode: str = "r", *args: Any, **kwargs: Any) -> IO[Any]:
+        size = self.size()
+        if size is None:
+            raise FileNotFoundError(str(self))
+        raw = RangeReader(
+            self.client, self.bucket, self.key, size, self.part_size, self.read_ahead
+        )
+        stream = io.BufferedReader(raw, buffer_size=min(self.part_size, 1 << 20))
+        if "b" in mode:
+            return stream
+        kwargs.setdefault("encoding", "utf-8")
+        return io.TextIOWrapper(stream, *args, **kwargs)
+
+    def read_bytes(self) -> bytes:
+        with self.open("rb") as f:
+            return bytes(f.read())
+
+    def read_text(self, encoding: Optional[str] = None) -> str:
+        with self.open("r", encoding=encoding or "utf-8") as f:
+            return str(f.read())
@@ -0,0 +1,177 @@
+"""Loading a consistent subset of patients, and pruning the vocabulary to match.
+
+Persons are picked by a hash of their ``person_id``, so the same fraction always
+picks the same persons, in every table and on every run. Every table with a
+``person_id`` (or a cohort's ``subject_id``) is filtered as it streams in. NOTE_NLP
+and EPISODE_EVENT have no person of their own, so they load after NOTE and
+EPISODE and keep the rows of the notes and episodes that were kept.
+
+The vocabulary loads in full, or with ``prune_vocabulary`` only the concepts
+referenced by the loaded rows. Every other table loads first so the referenced
+concept ids are known; DRUG_STRENGTH and CONCEPT_SYNONYM add the concepts they
+refer to, and then CONCEPT, CONCEPT_RELATIONSHIP and CONCEPT_ANCESTOR keep the
+rows whose concepts are all referenced.
+"""
+
+import hashlib
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+RowFilter = Callable[[list[str]], bool]
+
+# Columns holding the person a row belongs to, in order of preference
+PERSON_COLUMNS = ("person_id", "subject_id")
+
+# Tables without a person, keyed to a parent table that has one
+CHILD_TABLES = {
+    "note_nlp": "note_id",
+    "episode_event": "episode_id",
+}
+PARENT_TABLES = {"note": "note_id", "episode": "episode_id"}
+
+# Vocabulary tables pruned to referenced concepts, and the columns that must be
+# referenced for a row to be kept
+PRUNED_TABLES = {
+    "drug_strength": ("drug_concept_id",),
+    "concept_synonym": ("concept_id",),
+    "concept": ("concept_id",),
+    "concept_relationship": ("concept_id_1", "concept_id_2"),
+    "concept_ancestor": ("ancestor_concept_id", "descendant_concept_id"),
+}
+
+# Pruned tables whose kept rows add the other concepts they refer to, in the
+# order they load
+ADDING_TABLES = ("drug_strength", "concept_synonym")
+
+
+def is_concept_column(column: str) -> bool:
+    """Return whether a column holds a concept id."""
+    return column in ("concept_id", "concept_id_1", "concept_id_2") or column.endswith(
+        "_concept_id"
+    )
+
+
+def read_person_ids(path: Union[str, Path]) -> set[str]:
+    """Read person ids from a file, one per line, ignoring anything else."""
+    with open(path) as f:
+        return {line.strip() for line in f if line.strip().isdigit()}
+
+
+class Sample:
+    """The persons of a subset, and the ids and concepts its rows refer to.
+
+    Without ``follow_parents`` the child tables load in full, for loading a single
+    table on its own.
+    """
+
+    def __init__(
+        self,
+        fraction: Optional[float] = None,
+        person_ids: Optional[set[str]] = None,
+        prune_vocabulary: bool = False,
+        follow_parents: bool = True,
+    ) -> None:
+        self.fraction = fraction
+        self.person_ids = person_ids
+        self.prune_vocabulary = prune_vocabulary
+        self.follow_parents = follow_parents
+        self.kept: dict[str, set[str]] = {key: set() for key in PARENT_TABLES.values()}
+        self.concepts: set[str] = set()
+
+    @property
+    def filters_persons(self) -> bool:
+        return self.fraction is not None or self.person_ids is not None
+
+    def keeps_person(self, person_id: Optional[str]) -> bool:
+        """Return whether a person is in the subset."""
+        if not person_id:
+            return False
+        if self.person_ids is not None and person_id not in self.person_ids:
+            return False
+        if self.fraction is None:
+            return True
+        # Hashed rather than remembered, so the decision costs no memory per person
+        digest = hashlib.blake2b(person_id.encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "big") < self.fraction * 2**64
+
+    def waves(self, tables: list[str]) -> list[list[str]]:
+        """Split the tables into waves that load one after another."""
+        first: list[str] = []
+        children: list[str] = []
+        adding: dict[str, list[str]] = {name: [] for name in ADDING_TABLES}
+        pruned: list[str] = []
+        for table in tables:
+            name = table.lower()
+            if self.filters_persons and name in CHILD_TABLES:
+                children.append(table)
+            elif self.prune_vocabulary and name in ADDING_TABLES:
+                adding[name].append(table)
+            elif self.prune_vocabulary and name in PRUNED_TABLES:
+                pruned.append(table)
+            else:
+                first.append(table)
+        # Each adding table has a wave of its own, so what it keeps is deterministic
+        waves = [first, children, *adding.values(), pruned]
+        return [wave for wave in waves if wave]
+
+    def row_filter(self, table_name: str, columns: list[str]) -> Optional[RowFilter]:
+        """Return the filter for the rows of a table's file, or None to keep all."""
+        name = table_name.lower()
+        positions = {column.strip().lower(): n for n, column in enumerate(columns)}
+
+        person = None
+        parent = None
+        child = None
+        required: list[int] = []
+        if self.filters_persons:
+            person = next(
+                (positions[c] for c in PERSON_COLUMNS if c in positions), None
+            )
+            if name in PARENT_TABLES and PARENT_TABLES[name] in positions:
+                parent = positions[PARENT_TABLES[name]]
+            if (
+                self.follow_parents
+                and name in CHILD_TABLES
+                and CHILD_TABLES[name] in positions
+            ):
+                child = positions[CHILD_TABLES[name]]
+
+        pruned = self.prune_vocabulary and name in PRUNED_TABLES
+        if pruned:
+            required = [positions[c] for c in PRUNED_TABLES[name] if c in positions]
+        # Rows of the tables loaded before the pruned ones say which concepts to keep
+        collect = []
+        if self.prune_vocabulary and (not pruned or name in ADDING_TABLES):
+            collect = [
+                n for column, n in positions.items() if is_concept_column(column)
+            ]
+
+        if person is None and child is None and not required and not collect:
+            return None
+        kept = self.kept.get(CHILD_TABLES.get(name, ""), set())
+        parent_ids = self.kept.get(PARENT_TABLES.get(name, ""), set())
+        concepts = self.concepts
+
+        def keep(row: list[str]) -> bool:
+            if person is not None and not self.keeps_person(_get(row, person)):
+                return False
+            if child is not None and _get(row, child) not in kept:
+                return False
+            if any(_get(row, n) not in concepts for n in required):
+                return False
+            if parent is not None:
+                parent_id = _get(row, parent)
+                if parent_id:
+                    parent_ids.add(parent_id)
+            for n in collect:
+                value = _get(row, n)
+                if value:
+                    concepts.add(value)
+            return True
+
+        return keep
+
+
+def _get(row: list[str], position: int) -> Optional[str]:
+    value = row[position] if position < len(row) else None
+    return value.strip() if value else value
@@ -0,0 +1,252 @@
+"""Helpers for reading the bundled OMOP SQL scripts statement by statement."""
+
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+SCHEMA_PLACEHOLDER = "@cdmDatabaseSchema"
+
+_INDEX_RE = re.compile(
+    r"^CREATE\s+(?P<unique>UNIQUE\s+)?(?P<kind>(?:NON)?CLUSTERED\s+)?INDEX\s+"
+    r"(?:CONCURRENTLY\s+)?(?P<name>\w+)\s+ON\s+(?:ONLY\s+)?(?P<table>[\w@.\[\]\"]+)\s*"
+    r"(?:USING\s+(?P<method>\w+)\s*)?\((?P<columns>[^)]*)\)",
+    re.IGNORECASE,
+)
+_KEY_RE = re.compile(
+    r"^ALTER\s+TABLE\s+(?P<table>[\w@.\[\]\"]+)\s+ADD\s+CONSTRAINT\s+(?P<name>\w+)\s+"
+    r"(?P<type>PRIMARY\s+KEY|UNIQUE)\s+(?P<kind>(?:NON)?CLUSTERED\s+)?\((?P<columns>[^)]*)\)",
+    re.IGNORECASE,
+)
+_FOREIGN_KEY_RE = re.compile(
+    r"^ALTER\s+TABLE\s+(?P<table>[\w@.\[\]\"]+)\s+ADD\s+CONSTRAINT\s+(?P<name>\w+)\s+"
+    r"FOREIGN\s+KEY\s*\((?P<columns>[^)]*)\)\s*REFERENCES\s+(?P<referenced>[\w@.\[\]\"]+)\s*"
+    r"\((?P<referenced_columns>[^)]*)\)",
+    re.IGNORECASE,
+)
+_TABLE_RE = re.compile(
+    r"(?:--HINT\s+DISTRIBUTE\s+ON\s+(?:KEY\s*\((?P<key>\w+)\)|(?P<random>RANDOM))[^\n]*\n\s*)?"
+    r"CREATE\s+TABLE\s+(?P<table>[\w@.\[\]\"]+)\s*\((?P<body>.*?)\)\s*;",
+    re.IGNORECASE | re.DOTALL,
+)
+_CLUSTER_RE = re.compile(
+    r"^CLUSTER\s+(?P<table>[\w@.\[\]\"]+)\s+USING\s+(?P<index>\w+)", re.IGNORECASE
+)
+
+
+@dataclass(frozen=True)
+class IndexDefinition:
+    """An index, or a key constraint backed by one, found in a script or the catalog."""
+
+    name: str
+    table: str
+    columns: tuple[str, ...]
+    method: str = "btree"
+    unique: bool = False
+    clustered: bool = False
+    source: str = ""
+
+
+@dataclass(frozen=True)
+class ForeignKeyDefinition:
+    """A foreign key constraint from the constraints script."""
+
+    name: str
+    table: str
+    columns: tuple[str, ...]
+    referenced_table: str
+    referenced_columns: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class ColumnDefinition:
+    """A column of a CREATE TABLE statement."""
+
+    name: str
+    type: str
+    nullable: bool = True
+
+    def render(self) -> str:
+        return f"{self.name} {self.type} {'NULL' if self.nullable else 'NOT NULL'}"
+
+
+@dataclass(frozen=True)
+class TableDefinition:
+    """A CREATE TABLE statement from a DDL script, with its distribution hint.
+
+    ``distribution_key`` is the column named by ``--HINT DISTRIBUTE ON KEY``, and
+    ``distributed_randomly`` is set for ``--HINT DISTRIBUTE ON RANDOM``.
+    """
+
+    name: str
+    qualified_name: str
+    columns: tuple[ColumnDefinition, ...]
+    distribution_key: Optional[str] = None
+    distributed_randomly: bool = False
+
+    def column(self, name: str) -> Optional[ColumnDefinition]:
+        for column in self.columns:
+            if column.name == name:
+                return column
+        return None
+
+    def render(self, suffix: str = "") -> str:
+        """Render the CREATE TABLE statement, with an optional trailing clause."""
+        columns = ",\n\t\t\t".join(column.render() for column in self.columns)
+        statement = f"CREATE TABLE {self.qualified_name} (\n\t\t\t{columns} )"
+        return f"{statement} {suffix}" if suffix else statement
+
+
+def split_statements(sql: str) -> list[str]:
+    """Split a SQL script into statements, dropping comments and blank lines.
+
+    Semicolons inside quoted strings or identifiers do not end a statement.
+    """
+    statements = []
+    current: list[str] = []
+    i = 0
+    length = len(sql)
+    while i < length:
+        char = sql[i]
+        if sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = length if end == -1 else end
+            continue
+        if sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            i = length if end == -1 else end + 2
+            current.append(" ")
+            continue
+        if char in ("'", '"'):
+            end = sql.find(char, i + 1)
+            end = length - 1 if end == -1 else end
+            current.append(sql[i : end + 1])
+            i = end + 1
+            continue
+        if char == ";":
+            statement = "".join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+        else:
+            current.append(char)
+        i += 1
+    statement = "".join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+
+def table_name(identifier: str) -> str:
+    """Return the bare, lower-case table name from a possibly schema-qualified identifier."""
+    return identifier.split(".")[-1].strip('[]"').lower()
+
+
+def _columns(columns: str) -> tuple[str, ...]:
+    parsed = []
+    for column in columns.split(","):
+        parts = column.strip().strip('[]"').lower().split()
+        if not parts:
+            continue
+        # Ascending is the default ordering, so only a descending column is kept as such
+        if len(parts) > 1 and parts[1] == "desc":
+            parsed.append(f"{parts[0]} desc")
+        else:
+            parsed.append(parts[0])
+    return tuple(parsed)
+
+
+def parse_index(statement: str, source: str = "") -> Optional[IndexDefinition]:
+    """Parse a CREATE INDEX or a PRIMARY KEY/UNIQUE constraint statement.
+
+    Returns None for statements that do not create an index.
+    """
+    match = _INDEX_RE.match(statement)
+    if match:
+        kind = (match.group("kind") or "").strip().upper()
+        return IndexDefinition(
+            name=match.group("name").lower(),
+            table=table_name(match.group("table")),
+            columns=_columns(match.group("columns")),
+            method=(match.group("method") or "btree").lower(),
+            unique=bool(match.group("unique")),
+            clustered=kind == "CLUSTERED",
+            source=source,
+        )
+    match = _KEY_RE.match(statement)
+    if match:
+        kind = (match.group("kind") or "").strip().upper()
+        return IndexDefinition(
+            name=match.group("name").lower(),
+            table=table_name(match.group("table")),
+            columns=_columns(match.group("columns")),
+            unique=True,
+            clustered=kind == "CLUSTERED",
+            source=source,
+        )
+    return None
+
+
+def parse_cluster(statement: str) -> Optional[tuple[str, str]]:
+    """Parse a Postgres ``CLUSTER table USING index`` statement into (table, index)."""
+    match = _CLUSTER_RE.match(statement)
+    if not match:
+        return None
+    return table_name(match.group("table")), match.group("index").lower()
+
+
+def parse_foreign_key(statement: str) -> Optional[ForeignKeyDefinition]:
+    """Parse a FOREIGN KEY constraint statement, or return None."""
+    match = _FOREIGN_KEY_RE.match(statement)
+    if not match:
+        return None
+    return ForeignKeyDefinition(
+        name=match.group("name").lower(),
+        table=table_name(match.group("table")),
+        columns=_columns(match.group("columns")),
+        referenced_table=table_name(match.group("referenced")),
+        referenced_columns=_columns(match.group("referenced_columns")),
+    )
+
+
+def _split_columns(body: str) -> list[str]:
+    """Split a column list on the commas outside parentheses."""
+    parts = []
+    depth = 0
+    current: list[str] = []
+    for char in body:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+
+def parse_tables(sql: str) -> list[TableDefinition]:
+    """Parse the CREATE TABLE statements of a DDL script, keeping their hints."""
+    tables = []
+    for match in _TABLE_RE.finditer(sql):
+        columns = []
+        for definition in _split_columns(match.group("body")):
+            name, rest = definition.split(None, 1)
+            nullable = not re.search(r"\bNOT\s+NULL\b", rest, re.IGNORECASE)
+            column_type = re.sub(
+                r"\s+(?:NOT\s+)?NULL\b.*$", "", rest, flags=re.IGNORECASE | re.DOTALL
+            ).strip()
+            columns.append(ColumnDefinition(name.lower(), column_type, nullable))
+        key = match.group("key")
+        tables.append(
+            TableDefinition(
+                name=table_name(match.group("table")),
+                qualified_name=match.group("table"),
+                columns=tuple(columns),
+                distribution_key=key.lower() if key else None,
+                distributed_randomly=bool(match.group("random")),
+            )
+        )
+    return tables
@@ -1,15 +1,24 @@
 import csv
-from sqlalchemy import create_engine, MetaData, text
+import re
+from functools import partial
+from itertools import islice
+from sqlalchemy import Connection, create_engine, MetaData, text
 from importlib.resources import files
 import logging
 from .base import Database
+from .sampling import RowFilter
+from .streams import chunked
+from .transforms import Transform, transform_row
 from omop_lite.settings import Settings
-from typing import Union
+from typing import Any, Iterable, Iterator, Optional, Sequence, Union
 from pathlib import Path
 from importlib.abc import Traversable
 
 logger = logging.getLogger(__name__)
 
+# Rows sent per executemany call
+EXECUTEMANY_BATCH = 1000
+
 
 class SQLServerDatabase(Database):
     def __init__(self, settings: Settings) -> None:
@@ -19,6 +28,7 @@ class SQLServerDatabase(Database):
         self.metadata = MetaData(schema=settings.schema_name)
         self.metadata.reflect(bind=self.engine)
         self.file_path = files(f"omop_lite.scripts.mssql.{settings.omop_version}")
+        self._online_supported: Optional[bool] = None
 
     def create_schema(self, schema_name: str) -> None:
         if not self.engine:
@@ -34,36 +44,294 @@ class SQLServerDatabase(Database):
             logger.info(f"Schema '{schema_name}' created.")
             connection.commit()
 
-    def _bulk_load(self, table_name: str, file_path: Union[Path, Traversable]) -> None:
+    def drop_schema(self, schema_name: str) -> None:
+        """Drop a schema and all its contents.
+
+        SQL Server only drops an empty schema, so its foreign keys and tables are
+        dropped first.
+        """
+        if not self.engine:
+            raise RuntimeError("Database engine not initialized")
+
+        with self.engine.begin() as connection:
+            foreign_keys = connection.execute(
+                text(
+                    "SELECT OBJECT_NAME(parent_object_id), name FROM sys.foreign_keys "
+                    "WHERE schema_id = SCHEMA_ID(:schema)"
+                ),
+                {"schema": schema_name},
+            ).all()
+            for table, name in foreign_keys:
+                connection.execute(
+                    text(
+                        f"ALTER TABLE [{schema_name}].[{table}] DROP CONSTRAINT [{name}]"
+                    )
+                )
+            for table in self._schema_tables(connection, schema_name):
+                connection.execute(text(f"DROP TABLE [{schema_name}].[{table}]"))
+            connection.execute(text(f"DROP SCHEMA IF EXISTS [{schema_name}]"))
+        logger.info(f"✅ Schema '{schema_name}' dropped successfully")
+
+    def swap_schema(self, replacement: str, previous: str) -> None:
+        """Move the tables of ``replacement`` into the schema, in one transaction.
+
+        SQL Server cannot rename a schema, so the tables are moved between schemas
+        with ALTER SCHEMA ... TRANSFER, which only changes their metadata.
+        """
+        if not self.engine:
+            raise RuntimeError("Database engine not initialized")
+        live = self.settings.schema_name
+        swap = f"{live}_swap"
+        if previous != replacement:
+            self.drop_schema(previous)
+
+        def transfer(connection: Connection, source: str, destination: str) -> None:
+            for table in self._schema_tables(connection, source):
+                connection.execute(
+                    text(f"ALTER SCHEMA [{destination}] TRANSFER [{source}].[{table}]")
+                )
+
+        def create(connection: Connection, schema_name: str) -> None:
+            connection.execute(
+                text(
+                    f"IF SCHEMA_ID('{schema_name}') IS NULL "
+                    f"EXEC('CREATE SCHEMA [{schema_name}]')"
+                )
+            )
+
+        with self.engine.begin() as connection:
+            create(connection, swap)
+            create(connection, live)
+            transfer(connection, live, swap)
+            transfer(connection, replacement, live)
+            create(connection, previous)
+            transfer(connection, swap, previous)
+            connection.execute(text(f"DROP SCHEMA [{swap}]"))
+            if previous != replacement:
+                connection.execute(text(f"DROP SCHEMA [{replacement}]"))
+        logger.info(f"Swapped '{replacement}' in as '{live}', keeping '{previous}'")
+
+    @staticmethod
+    def _schema_tables(connection: Connection, schema_name: str) -> list[str]:
+        """Return the names of the tables in a schema."""
+        return list(
+            connection.execute(
+                text(
+                    "SELECT name FROM sys.tables WHERE schema_id = SCHEMA_ID(:schema)"
+                ),
+                {"schema": schema_name},
+            ).scalars()
+        )
+
+    def _online_index_statement(self, statement: str) -> Optional[str]:
+        """Build indices WITH (ONLINE = ON) where the edition supports it."""
+        if not re.match(r"^CREATE\s+.*INDEX\s", statement, re.IGNORECASE):
+            return statement
+        if re.search(r"\bWITH\s*\(", statement, re.IGNORECASE):
+            return statement
+        if not self._supports_online_indices():
+            return statement
+        return f"{statement} WITH (ONLINE = ON)"
+
+    def _supports_online_indices(self) -> bool:
+        """Check once whether the server edition can build indices online."""
+        if self._online_supported is None:
+            if not self.engine:
+                raise RuntimeError("Database engine not initialized")
+            with self.engine.connect() as connection:
+                edition = connection.execute(
+                    text("SELECT CAST(SERVERPROPERTY('EngineEdition') AS int)")
+                ).scalar()
+            # Enterprise (and Developer), Azure SQL Database and Managed Instance
+            self._online_supported = edition in (3, 5, 8)
+            if not self._online_supported:
+                logger.warning(
+                    "This SQL Server edition cannot build indices online, "
+                    "building them offline instead"
+                )
+        return self._online_supported
+
+    def _bulk_load(
+        self,
+        table_name: str,
+        file_path: Union[str, Path, Traversable],
+        header: bool = True,
+    ) -> None:
         if not self.engine:
             raise RuntimeError("Database engine not initialized")
 
         delimiter = self._get_delimiter()
 
-        with open(str(file_path), "r", encoding="utf-8", newline="") as f:
-            reader = csv.reader(f, delimiter=delimiter)
-            headers = next(reader)
+        with (
+            self._open(file_path, encoding="utf-8", newline="") as f,
+            self._read_ahead(self._throttled(f, table_name)) as source,
+        ):
+            reader = csv.reader(source, delimiter=delimiter)
+            if header:
+                headers = self._header_columns(table_name, next(reader))
+            else:
+                headers = self._spec_columns(table_name)
+            transforms = self._transforms(table_name, headers)
+            keep = self._row_filter(table_name, headers)
+            nulled = self._nulled_columns(table_name, headers)
+            positions = self._projection(table_name, headers)
+            rows = self._rows(
+                reader,
+                headers,
+                transforms,
+                2 if header else 1,
+                keep,
+                nulled,
+                positions,
+            )
+            if positions is not None:
+                headers = [headers[position] for position in positions]
 
             columns = ", ".join(f"[{col}]" for col in headers)
             placeholders = ", ".join(["?" for _ in headers])
             insert_sql = f"INSERT INTO {self.settings.schema_name}.[{table_name}] ({columns}) VALUES ({placeholders})"
 
-            conn = self.engine.raw_connection()
+            if not self._chunked_commits():
+                rejects = self._insert_rows(insert_sql, rows, delimiter)
+                self._quarantine(table_name, file_path, rejects)
+                return
+
+            key = self._file_key(table_name, file_path)
+            committed = self._committed_rows(key)
+            if committed:
+                logger.info(f"Resuming {key} after {committed} committed rows")
+            rejects = []
+            for chunk in chunked(
+                islice(rows, committed, None),
+                self.settings.commit_rows,
+                self.settings.commit_bytes,
+                length=_row_length,
+            ):
+                rejects.extend(
+                    self._retry(
+                        partial(self._insert_rows, insert_sql, chunk, delimiter),
+                        f"inserting {key}",
+                    )
+                )
+                committed += len(chunk)
+                self._commit_offset(key, committed)
+            self._quarantine(table_name, file_path, rejects)
+
+    def _rows(
+        self,
+        reader: Iterable[list[str]],
+        headers: list[str],
+        transforms: dict[int, Transform],
+        first_line: int,
+        keep: Optional[RowFilter] = None,
+        nulled: Sequence[int] = (),
+        positions: Optional[list[int]] = None,
+    ) -> Iterator[tuple[int, list[Optional[str]]]]:
+        """Yield the rows of a file with their line numbers, fitted to the header.
+
+        Rows that ``keep`` returns False for are left out. The ``nulled`` values
+        are inserted as NULL, and with ``positions`` only the values at those
+        positions are kept.
+        """
+        for line_no, fields in enumerate(reader, start=first_line):
+            if len(fields) > len(headers):
+                logger.info(
+                    f"Row {line_no} trimmed: too many values ({len(fields)}), expected {len(headers)} – trimming."
+                )
+                fields = fields[: len(headers)]
+
+            if keep is not None and not keep(fields):
+                continue
+            if transforms:
+                fields = transform_row(fields, transforms)
+            # Pad short rows, after the transforms so they never see the padding
+            row: list[Optional[str]] = list(fields)
+            if len(row) < len(headers):
+                row += [None] * (len(headers) - len(row))
+                logger.info(f"Row {line_no} padded: {row}")
+            for position in nulled:
+                row[position] = None
+            if positions is not None:
+                row = [row[position] for position in positions]
+            yield line_no, row
+
+    def _insert_rows(
+        self,
+        insert_sql: str,
+        rows: Iterable[tuple[int, list[Optional[str]]]],
+        delimiter: str,
+    ) -> list[tuple[int, str, str]]:
+        """
+        Insert rows in one transaction, returning the rows quarantined.
+
+        Rows are inserted one at a time, or with chunked commits sent
+        ``EXECUTEMANY_BATCH`` at a time with fast_executemany, which infers the
+        parameter types from the first row of a batch and so is only used when
+        asked for. In quarantine mode each batch is inserted after a savepoint,
+        and a batch that fails is rolled back to it, split in half and each half
+        retried, down to the single rows that fail on their own.
+        """
+        if not self.engine:
+            raise RuntimeError("Database engine not initialized")
+        quarantine = self.settings.on_error == "quarantine"
+        fast = self._chunked_commits()
+        rejects: list[tuple[int, str, str]] = []
+        conn = self.engine.raw_connection()
+        try:
+            # A pyodbc cursor, which has fast_executemany
+            cursor: Any = conn.cursor()
             try:
-                cursor = conn.cursor()
-                for line_no, row in enumerate(reader, start=2):
-                    # Pad short rows
-                    if len(row) < len(headers):
-                        row += [None] * (len(headers) - len(row))
-                        logger.info(f"Row {line_no} padded: {row}")
-                    elif len(row) > len(headers):
-                        logger.info(
-                            f"Row {line_no} trimmed: too many values ({len(row)}), expected {len(headers)} – trimming."
+                cursor.fast_executemany = fast
+                if quarantine:
+                    # Savepoints need an open transaction
+                    cursor.execute("IF @@TRANCOUNT = 0 BEGIN TRANSACTION")
+                    for batch in chunked(rows, EXECUTEMANY_BATCH):
+                        rejects.extend(
+                            self._bisect_insert(cursor, insert_sql, batch, delimiter)
                         )
-                        row = row[: len(headers)]
-
-                    cursor.execute(insert_sql, row)
+                elif fast:
+                    for batch in chunked(rows, EXECUTEMANY_BATCH):
+                        cursor.executemany(insert_sql, [row for _, row in batch])
+                else:
+                    for _, row in rows:
+                        cursor.execute(insert_sql, row)
                 conn.commit()
             finally:
                 cursor.close()
-                conn.close()
+        finally:
+            conn.close()
+        return rejects
+
+    def _bisect_insert(
+        self,
+        cursor: Any,
+        insert_sql: str,
+        rows: list[tuple[int, list[Optional[str]]]],
+        delimiter: str,
+    ) -> list[tuple[int, str, str]]:
+        """Insert rows after a savepoint, bisecting around the ones that fail.
+
+        An error that leaves the transaction uncommittable, or rolls it back, is
+        raised, as the rows inserted before it are lost too.
+        """
+        cursor.execute("SAVE TRANSACTION quarantine")
+        try:
+            cursor.executemany(insert_sql, [row for _, row in rows])
+            return []
+        except Exception as e:
+            if cursor.execute("SELECT XACT_STATE()").fetchone()[0] != 1:
+                raise
+            cursor.execute("ROLLBACK TRANSACTION quarantine")
+            if len(rows) == 1:
+                line_no, row = rows[0]
+                record = delimiter.join("" if v is None else v for v in row)
+                return [(line_no, record, str(e).splitlines()[0])]
+        middle = len(rows) // 2
+        return self._bisect_insert(
+            cursor, insert_sql, rows[:middle], delimiter
+        ) + self._bisect_insert(cursor, insert_sql, rows[middle:], delimiter)
+
+
+def _row_length(row: tuple[int, list[Optional[str]]]) -> int:
+    """Return the approximate size of a row's values, for chunking by size."""
+    return sum(len(value) for value in row[1] if value is not None)
@@ -0,0 +1,71 @@
+"""Storage settings for the Postgres tables.
+
+NOTE and NOTE_NLP hold long free text that Postgres compresses and moves out of
+line into TOAST storage. These settings choose the compression method of their
+text columns and when rows are toasted, and set the fillfactor of the tables.
+"""
+
+import re
+from typing import Iterable, Optional
+
+from .scripts import TableDefinition
+
+# Tables holding long free text
+TEXT_TABLES = ("note", "note_nlp")
+
+# Variable-length columns at least this long are compressed with the chosen method
+MIN_TEXT_LENGTH = 250
+
+
+def text_columns(table: TableDefinition) -> list[str]:
+    """Return the columns of a text table long enough to be worth compressing."""
+    if table.name not in TEXT_TABLES:
+        return []
+    columns = []
+    for column in table.columns:
+        match = re.match(
+            r"^(?:text|varchar(?:\((\d+)\))?)$", column.type, re.IGNORECASE
+        )
+        if match and (match.group(1) is None or int(match.group(1)) >= MIN_TEXT_LENGTH):
+            columns.append(column.name)
+    return columns
+
+
+def storage_statements(
+    tables: Iterable[TableDefinition],
+    compression: Optional[str] = None,
+    toast_tuple_target: Optional[int] = None,
+    fillfactor: Optional[int] = None,
+    partitions: Optional[dict[str, list[str]]] = None,
+) -> list[str]:
+    """Return the ALTER TABLE statements applying the storage settings.
+
+    ``compression`` applies to the long text columns of the text tables and
+    ``toast_tuple_target`` to the text tables, ``fillfactor`` to every table.
+    Storage parameters cannot be set on a partitioned table, so they go to each of
+    its ``partitions`` instead.
+    """
+    partitions = partitions or {}
+    statements = []
+    for table in tables:
+        if compression is not None:
+            for column in text_columns(table):
+                statements.append(
+                    f"ALTER TABLE {table.qualified_name} "
+                    f"ALTER COLUMN {column} SET COMPRESSION {compression}"
+                )
+
+        parameters = []
+        if fillfactor is not None:
+            parameters.append(f"fillfactor = {fillfactor}")
+        if toast_tuple_target is not None and table.name in TEXT_TABLES:
+            parameters.append(f"toast_tuple_target = {toast_tuple_target}")
+        if not parameters:
+            continue
+
+        schema = table.qualified_name[: -len(table.name)]
+        for name in partitions.get(table.name, [table.name]):
+            statements.append(
+                f"ALTER TABLE {schema}{name} SET ({', '.join(parameters)})"
+            )
+    return statements
@@ -0,0 +1,230 @@
+"""File-like streams for feeding CSV data to the database in pieces."""
+
+import queue
+import threading
+from types import TracebackType
+from typing import Callable, Iterable, Iterator, Optional, Protocol, Sized, TypeVar
+
+T = TypeVar("T", bound=Sized)
+
+# Records are handed between threads in chunks of about this many characters
+CHUNK_SIZE = 1 << 20
+
+# Chunks read ahead of the database before the reading thread waits
+READ_AHEAD_BUFFERS = 4
+
+
+def iter_records(lines: Iterable[str], quote: str) -> Iterator[str]:
+    """Group lines into CSV records.
+
+    A quoted value can hold a newline, so a line with an odd number of quote
+    characters starts a record that continues on the following lines.
+    """
+    pending: list[str] = []
+    inside = False
+    for line in lines:
+        if quote and line.count(quote) % 2:
+            inside = not inside
+        if inside:
+            pending.append(line)
+            continue
+        if pending:
+            pending.append(line)
+            yield "".join(pending)
+            pending = []
+        else:
+            yield line
+    if pending:
+        yield "".join(pending)
+
+
+def iter_chunks(records: Iterable[str], size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Join records into chunks of about ``size`` characters."""
+    chunk: list[str] = []
+    length = 0
+    for record in records:
+        chunk.append(record)
+        length += len(record)
+        if length >= size:
+            yield "".join(chunk)
+            chunk = []
+            length = 0
+    if chunk:
+        yield "".join(chunk)
+
+
+def chunked(
+    items: Iterable[T],
+    rows: Optional[int] = None,
+    size: Optional[int] = None,
+    length: Callable[[T], int] = len,
+) -> Iterator[list[T]]:
+    """Group items into lists of ``rows`` items or ``size`` total length.
+
+    A list ends at whichever limit it reaches first.
+    """
+    chunk: list[T] = []
+    total = 0
+    for item in items:
+        chunk.append(item)
+        if size:
+            total += length(item)
+        if (rows and len(chunk) >= rows) or (size and total >= size):
+            yield chunk
+            chunk = []
+            total = 0
+    if chunk:
+        yield chunk
+
+
+class TextStream(Protocol):
+    """The part of a text file the loaders use, so any file object can be read."""
+
+    def read(self, size: int = -1, /) -> str: ...
+
+    def readline(self, size: int = -1, /) -> str: ...
+
+    def __iter__(self) -> Iterator[str]: ...
+
+
+class QueueReader:
+    """A read-only file object over chunks put on a queue, ending at ``None``."""
+
+    def __init__(self, chunks: "queue.Queue[Optional[str]]") -> None:
+        self.chunks = chunks
+        self.buffer = ""
+        self.position = 0
+        self.finished = False
+
+    def _fill(self) -> bool:
+        """Move the next chunk into the buffer, returning False at the end."""
+        if self.finished:
+            return False
+        chunk = self.chunks.get()
+        if chunk is None:
+            self.finished = True
+            return False
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+        return True
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self.buffer) - self.position < size:
+            if not self._fill():
+                break
+        end = len(self.buffer) if size < 0 else self.position + size
+        data = self.buffer[self.position : end]
+        self.position += len(data)
+        return data
+
+    def readline(self, size: int = -1) -> str:
+        while self.buffer.find("\n", self.position) < 0:
+            if not self._fill():
+                break
+        end = self.buffer.find("\n", self.position) + 1 or len(self.buffer)
+        if size >= 0:
+            end = min(end, self.position + size)
+        data = self.buffer[self.position : end]
+        self.position = end
+        return data
+
+    def __iter__(self) -> Iterator[str]:
+        while line := self.readline():
+            yield line
+
+    def drain(self) -> None:
+        """Discard everything left on the queue, so a producer is never blocked."""
+        while self._fill():
+            self.buffer = ""
+            self.position = 0
+        self.buffer = ""
+        self.position = 0
+
+
+class ChunkReader(QueueReader):
+    """A read-only file object over an iterable of chunks."""
+
+    def __init__(self, chunks: Iterable[str]) -> None:
+        super().__init__(queue.Queue())
+        self.iterator = iter(chunks)
+
+    def _fill(self) -> bool:
+        if self.finished:
+            return False
+        chunk = next(self.iterator, None)
+        if chunk is None:
+            self.finished = True
+            return False
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+        return True
+
+
+class ReadAheadReader(QueueReader):
+    """A read-only file object over chunks produced ahead on a thread of their own.
+
+    The thread reads, and decompresses or transforms, while the database is sent
+    the chunks before, so waiting on storage overlaps with waiting on the network.
+    At most ``buffers`` chunks wait on the queue, which bounds the memory used. An
+    error producing the chunks is raised by the read that reaches it. Close the
+    reader, or use it as a context manager, before closing what it reads from.
+    """
+
+    def __init__(
+        self, chunks: Iterable[str], buffers: int = READ_AHEAD_BUFFERS
+    ) -> None:
+        super().__init__(queue.Queue(maxsize=buffers))
+        self.error: Optional[Exception] = None
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._produce, args=(chunks,), daemon=True
+        )
+        self._thread.start()
+
+    @classmethod
+    def from_file(
+        cls, f: TextStream, size: int = CHUNK_SIZE, buffers: int = READ_AHEAD_BUFFERS
+    ) -> "ReadAheadReader":
+        """Read a file ahead in chunks of ``size`` characters."""
+        return cls(iter(lambda: f.read(size), ""), buffers)
+
+    def _produce(self, chunks: Iterable[str]) -> None:
+        try:
+            for chunk in chunks:
+                if self._stopped.is_set():
+                    break
+                if chunk:
+                    self.chunks.put(chunk)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.chunks.put(None)
+
+    def _fill(self) -> bool:
+        if super()._fill():
+            return True
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+        return False
+
+    def close(self) -> None:
+        """Stop reading ahead and wait for the thread, discarding what is left."""
+        self._stopped.set()
+        while not self.finished:
+            if self.chunks.get() is None:
+                self.finished = True
+        self._thread.join()
+        self.buffer = ""
+        self.position = 0
+
+    def __enter__(self) -> "ReadAheadReader":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
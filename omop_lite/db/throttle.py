@@ -0,0 +1,176 @@
+"""Capping the rate data is loaded at, so a load shares the server with others.
+
+Every load worker draws from the same token buckets, one for bytes and one for
+rows, so the caps hold for the load as a whole. Workers that run ahead of the
+rate sleep off the difference as they read their files.
+
+In adaptive mode a health check, such as the server's replication lag, is run
+every few seconds by whichever worker is reading. While the server is unhealthy
+the rate is halved at each check, and while it is healthy it recovers by a
+quarter, up to the configured caps. Without caps, the rate starts from the
+throughput seen when the server first became unhealthy, and the limit is lifted
+once it has fully recovered.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Iterator, Optional
+
+from .streams import TextStream
+
+logger = logging.getLogger(__name__)
+
+# Seconds between health checks in adaptive mode
+HEALTH_INTERVAL = 5.0
+
+# Rate multipliers on an unhealthy and a healthy check, and the lowest fraction
+# of the rate to back off to
+BACKOFF = 0.5
+RECOVERY = 1.25
+MIN_FACTOR = 0.05
+
+
+class TokenBucket:
+    """A rate limit shared between threads.
+
+    Taking more than is available runs the bucket into debt, which the taker
+    sleeps off, so large takes are limited as exactly as small ones.
+    """
+
+    def __init__(self, rate: float) -> None:
+        self.rate = rate
+        # Up to a second's worth may be taken in a burst
+        self.tokens = rate
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, amount: float) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self._last) * self.rate)
+            self._last = now
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+
+class Throttle:
+    """The byte and row rate caps of a load, adapted to the server's health."""
+
+    def __init__(
+        self,
+        bytes_per_second: Optional[float] = None,
+        rows_per_second: Optional[float] = None,
+        health: Optional[Callable[[], Optional[bool]]] = None,
+        interval: float = HEALTH_INTERVAL,
+    ) -> None:
+        self.bytes_per_second = bytes_per_second
+        self.rows_per_second = rows_per_second
+        self.health = health
+        self.interval = interval
+        self.factor = 1.0
+        self._bytes = TokenBucket(bytes_per_second) if bytes_per_second else None
+        self._rows = TokenBucket(rows_per_second) if rows_per_second else None
+        # Bytes loaded since the last health check, and the rate learned from them
+        self._window = 0
+        self._window_start = time.monotonic()
+        self._learned: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def consume(self, size: int, rows: int = 0) -> None:
+        """Account for ``size`` bytes and ``rows`` rows, sleeping if over the caps."""
+        if self.health is not None:
+            self._check(size)
+        byte_bucket, row_bucket = self._bytes, self._rows
+        if byte_bucket is not None and size:
+            byte_bucket.take(size)
+        if row_bucket is not None and rows:
+            row_bucket.take(rows)
+
+    def _check(self, size: int) -> None:
+        """Run the health check once an interval has passed, and adapt the rates."""
+        with self._lock:
+            self._window += size
+            now = time.monotonic()
+            elapsed = now - self._window_start
+            if elapsed < self.interval:
+                return
+            observed = self._window / elapsed
+            self._window = 0
+            self._window_start = now
+
+            try:
+                # An unknown health, like a failed check, counts as healthy
+                healthy = self.health is None or self.health() is not False
+            except Exception as e:
+                logger.debug(f"Health check failed, assuming healthy: {str(e)}")
+                healthy = True
+
+            if healthy:
+                if self.factor >= 1.0:
+                    return
+                self.factor = min(1.0, self.factor * RECOVERY)
+            else:
+                if self.bytes_per_second is None and self._learned is None:
+                    self._learned = observed
+                self.factor = max(MIN_FACTOR, self.factor * BACKOFF)
+                logger.warning(
+                    f"Server unhealthy, throttling the load to {self.factor:.0%} "
+                    "of its rate"
+                )
+            self._apply()
+
+    def _apply(self) -> None:
+        """Set the bucket rates from the caps and the current factor."""
+        base = self.bytes_per_second or self._learned
+        if base:
+            if self.bytes_per_second is None and self.factor >= 1.0:
+                # Recovered without a configured cap, so lift the learned one
+                self._learned = None
+                self._bytes = None
+                logger.info("Server healthy again, no longer throttling the load")
+            elif self._bytes is None:
+                self._bytes = TokenBucket(base * self.factor)
+            else:
+                self._bytes.rate = base * self.factor
+        if self._rows is not None and self.rows_per_second:
+            self._rows.rate = self.rows_per_second * self.factor
+
+
+class ThrottledReader:
+    """A read-only file object that draws what it reads from a throttle.
+
+    ``counter`` is also told the size and lines of each read, for counting the
+    throughput of a table.
+    """
+
+    def __init__(
+        self,
+        f: TextStream,
+        throttle: Optional[Throttle],
+        counter: Optional[Callable[[int, int], None]] = None,
+    ) -> None:
+        self.f = f
+        self.throttle = throttle
+        self.counter = counter
+
+    def _consume(self, data: str) -> str:
+        if data:
+            rows = data.count("\n")
+            if self.throttle is not None:
+                self.throttle.consume(len(data), rows)
+            if self.counter is not None:
+                self.counter(len(data), rows)
+        return data
+
+    def read(self, size: int = -1) -> str:
+        return self._consume(self.f.read(size))
+
+    def readline(self, size: int = -1) -> str:
+        return self._consume(self.f.readline(size))
+
+    def __iter__(self) -> Iterator[str]:
+        while line := self.readline():
+            yield line
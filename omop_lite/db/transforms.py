@@ -0,0 +1,150 @@
+"""Column transforms applied to data files as they stream into the database.
+
+Athena vocabulary files write their validity dates as ``YYYYMMDD``. Transforms
+are declared per table in ``TABLE_TRANSFORMS`` and applied to each chunk of
+records on its way to COPY, so a file is never rewritten on disk.
+"""
+
+import csv
+import io
+import re
+from typing import Callable, Iterable, Iterator, Optional
+
+Transform = Callable[[str], str]
+
+_YYYYMMDD = re.compile(r"^(\d{4})(\d{2})(\d{2})$")
+
+
+def iso_date(value: str) -> str:
+    """Rewrite a ``YYYYMMDD`` date as ``YYYY-MM-DD``, leaving anything else as is."""
+    match = _YYYYMMDD.match(value)
+    if match is None:
+        return value
+    return "-".join(match.groups())
+
+
+TRANSFORMS: dict[str, Transform] = {
+    "iso_date": iso_date,
+}
+
+# The transform applied to each column, by table
+TABLE_TRANSFORMS: dict[str, dict[str, str]] = {
+    "concept": {"valid_start_date": "iso_date", "valid_end_date": "iso_date"},
+    "concept_relationship": {
+        "valid_start_date": "iso_date",
+        "valid_end_date": "iso_date",
+    },
+    "drug_strength": {"valid_start_date": "iso_date", "valid_end_date": "iso_date"},
+    "source_to_concept_map": {
+        "valid_start_date": "iso_date",
+        "valid_end_date": "iso_date",
+    },
+}
+
+
+def column_transforms(table_name: str, columns: list[str]) -> dict[int, Transform]:
+    """Return the transforms of a table's file, keyed by column position."""
+    declared = TABLE_TRANSFORMS.get(table_name.lower(), {})
+    return {
+        position: TRANSFORMS[declared[column.strip().lower()]]
+        for position, column in enumerate(columns)
+        if column.strip().lower() in declared
+    }
+
+
+def null(value: str) -> str:
+    """Empty a value, which COPY loads as NULL."""
+    return ""
+
+
+def project_row(row: list[str], positions: list[int]) -> list[str]:
+    """Keep the fields of a parsed row at ``positions``, in that order."""
+    return [row[position] if position < len(row) else "" for position in positions]
+
+
+def transform_row(row: list[str], transforms: dict[int, Transform]) -> list[str]:
+    """Apply the transforms to a parsed row."""
+    for position, transform in transforms.items():
+        if position < len(row):
+            row[position] = transform(row[position])
+    return row
+
+
+def transform_records(
+    records: list[str],
+    transforms: dict[int, Transform],
+    delimiter: str,
+    quote: str,
+    keep: Optional[Callable[[list[str]], bool]] = None,
+    positions: Optional[list[int]] = None,
+) -> str:
+    """Apply the transforms to a batch of CSV records, returning them joined.
+
+    Records without a quote character are split on the delimiter and only the
+    transformed fields touched. Quoted records are parsed and rewritten with the
+    csv module, which keeps quoted delimiters and newlines intact. Records that
+    ``keep`` returns False for are dropped, and with ``positions`` only the
+    fields at those positions are kept.
+    """
+    rewrite = bool(transforms) or positions is not None
+    out: list[str] = []
+    quoted: list[int] = []
+    for record in records:
+        if quote and quote in record:
+            quoted.append(len(out))
+            out.append(record)
+            continue
+        body = record.rstrip("\r\n")
+        fields = body.split(delimiter)
+        if keep is not None and not keep(fields):
+            continue
+        if rewrite:
+            fields = transform_row(fields, transforms)
+            if positions is not None:
+                fields = project_row(fields, positions)
+            record = delimiter.join(fields) + record[len(body) :]
+        out.append(record)
+
+    if quoted:
+        rows = csv.reader(
+            (out[n] for n in quoted), delimiter=delimiter, quotechar=quote
+        )
+        buffer = io.StringIO()
+        writer = csv.writer(
+            buffer, delimiter=delimiter, quotechar=quote, lineterminator="\n"
+        )
+        for n, row in zip(quoted, rows):
+            if keep is not None and not keep(row):
+                out[n] = ""
+            elif rewrite:
+                row = transform_row(row, transforms)
+                if positions is not None:
+                    row = project_row(row, positions)
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerow(row)
+                out[n] = buffer.getvalue()
+    return "".join(out)
+
+
+def transform_chunks(
+    records: Iterable[str],
+    transforms: dict[int, Transform],
+    delimiter: str,
+    quote: str,
+    batch: int = 10000,
+    keep: Optional[Callable[[list[str]], bool]] = None,
+    positions: Optional[list[int]] = None,
+) -> Iterator[str]:
+    """Transform, filter and project records ``batch`` at a time, yielding one
+    chunk per batch."""
+    pending: list[str] = []
+    for record in records:
+        pending.append(record)
+        if len(pending) >= batch:
+            yield transform_records(
+                pending, transforms, delimiter, quote, keep, positions
+            )
+            pending = []
+    if pending:
+        yield transform_records(pending, transforms, delimiter, quote, keep, positions)
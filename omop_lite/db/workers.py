@@ -0,0 +1,174 @@
+"""Running independent load and index jobs concurrently.
+
+With adaptive workers, the number of jobs running at once is tuned as they run.
+It starts small, and every few seconds the throughput since the last step is
+compared with the one before: while it improves the count keeps moving the same
+way, and once it stops improving it turns back. The count stays between one and
+the configured number of workers, and stops changing once every job has started,
+as the last jobs finishing would read as a drop in throughput.
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds between adjustments of the number of workers
+ADJUST_INTERVAL = 10.0
+
+# Relative change in throughput taken as a real improvement rather than noise
+TOLERANCE = 0.05
+
+
+def run_parallel(jobs: Iterable[Callable[[], None]], workers: int) -> None:
+    """Run jobs on up to ``workers`` threads, waiting for all of them to finish.
+
+    Jobs handle their own errors; an exception escaping a job is logged so that it
+    does not stop the others.
+    """
+    jobs = list(jobs)
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            _run(job)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in [executor.submit(_run, job) for job in jobs]:
+            future.result()
+
+
+def _run(job: Callable[[], None]) -> None:
+    try:
+        job()
+    except Exception as e:
+        logger.error(f"Error in worker: {str(e)}")
+
+
+class Throughput:
+    """Bytes and rows loaded per table, counted by every worker as it reads."""
+
+    def __init__(self) -> None:
+        self.bytes: dict[str, int] = defaultdict(int)
+        self.rows: dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, table_name: str, size: int, rows: int = 0) -> None:
+        with self._lock:
+            self.bytes[table_name] += size
+            self.rows[table_name] += rows
+
+    def total(self) -> int:
+        """Return the bytes loaded into all tables so far."""
+        with self._lock:
+            return sum(self.bytes.values())
+
+
+class HillClimber:
+    """Picks a number of workers between ``low`` and ``high`` by hill climbing."""
+
+    def __init__(
+        self,
+        low: int,
+        high: int,
+        start: Optional[int] = None,
+        tolerance: float = TOLERANCE,
+    ) -> None:
+        self.low = low
+        self.high = high
+        self.tolerance = tolerance
+        self.workers = min(high, max(low, start or low))
+        self.direction = 1
+        self.previous: Optional[float] = None
+        # The number of workers and the throughput seen at each step
+        self.history: list[tuple[int, float]] = []
+
+    @property
+    def best(self) -> Optional[tuple[int, float]]:
+        """Return the number of workers that ran fastest, and its throughput."""
+        return max(self.history, key=lambda step: step[1], default=None)
+
+    def update(self, throughput: float) -> int:
+        """Record the throughput of the current step and return the next count."""
+        self.history.append((self.workers, throughput))
+        previous, self.previous = self.previous, throughput
+        if previous is not None and throughput <= previous * (1 + self.tolerance):
+            # No better than the last step, so head back the other way
+            self.direction = -self.direction
+        step = self.workers + self.direction
+        if not self.low <= step <= self.high:
+            self.direction = -self.direction
+            step = self.workers + self.direction
+        self.workers = min(self.high, max(self.low, step))
+        return self.workers
+
+
+def run_adaptive(
+    jobs: Iterable[Callable[[], None]],
+    workers: int,
+    progress: Optional[Callable[[], float]] = None,
+    label: str = "Jobs",
+    unit: str = "jobs",
+    start: int = 1,
+    interval: float = ADJUST_INTERVAL,
+) -> int:
+    """Run jobs like :func:`run_parallel`, tuning the number running at once.
+
+    ``progress`` returns the work done so far in ``unit``, such as the MB loaded;
+    without it, finished jobs are counted. The workers start at ``start``. Returns
+    the number of workers settled on.
+    """
+    jobs = deque(jobs)
+    if workers <= 1 or len(jobs) <= 1:
+        run_parallel(jobs, 1)
+        return 1
+
+    climber = HillClimber(1, workers, start=start)
+    condition = threading.Condition()
+    running = 0
+    finished = 0
+
+    def run(job: Callable[[], None]) -> None:
+        nonlocal running, finished
+        try:
+            _run(job)
+        finally:
+            with condition:
+                running -= 1
+                finished += 1
+                condition.notify()
+
+    measure = progress or (lambda: finished)
+    with ThreadPoolExecutor(max_workers=workers) as executor, condition:
+        done = measure()
+        window_start = time.monotonic()
+        while jobs or running:
+            while jobs and running < climber.workers:
+                executor.submit(run, jobs.popleft())
+                running += 1
+            remaining = window_start + interval - time.monotonic()
+            condition.wait(timeout=max(0.0, remaining))
+            now = time.monotonic()
+            if now - window_start < interval:
+                continue
+            if jobs:
+                current = measure()
+                before = climber.workers
+                after = climber.update((current - done) / (now - window_start))
+                if after != before:
+                    logger.debug(f"{label}: {before} -> {after} workers")
+                done = current
+            window_start = now
+
+    best = climber.best
+    if best is None:
+        logger.info(f"{label}: ran on {climber.workers} workers")
+    else:
+        logger.info(
+            f"{label}: settled on {climber.workers} workers, "
+            f"fastest at {best[0]} ({best[1]:,.1f} {unit}/s)"
+        )
+    return climber.workers
@@ -0,0 +1,14 @@
+/*postgresql OMOP CDM BRIN index profile
+  BRIN indices on the date and datetime columns of the large, date-ordered fact tables.
+  They are a fraction of the size of a B-tree index and quick to build, but only narrow
+  a range scan down when rows are stored roughly in date order, as they are when an
+  extract is appended over time.
+*/
+CREATE INDEX idx_measurement_date_brin ON @cdmDatabaseSchema.measurement USING BRIN (measurement_date) WITH (autosummarize = on);
+CREATE INDEX idx_measurement_datetime_brin ON @cdmDatabaseSchema.measurement USING BRIN (measurement_datetime) WITH (autosummarize = on);
+CREATE INDEX idx_observation_date_brin ON @cdmDatabaseSchema.observation USING BRIN (observation_date) WITH (autosummarize = on);
+CREATE INDEX idx_observation_datetime_brin ON @cdmDatabaseSchema.observation USING BRIN (observation_datetime) WITH (autosummarize = on);
+CREATE INDEX idx_visit_start_date_brin ON @cdmDatabaseSchema.visit_occurrence USING BRIN (visit_start_date) WITH (autosummarize = on);
+CREATE INDEX idx_visit_start_datetime_brin ON @cdmDatabaseSchema.visit_occurrence USING BRIN (visit_start_datetime) WITH (autosummarize = on);
+CREATE INDEX idx_visit_end_date_brin ON @cdmDatabaseSchema.visit_occurrence USING BRIN (visit_end_date) WITH (autosummarize = on);
+CREATE INDEX idx_visit_end_datetime_brin ON @cdmDatabaseSchema.visit_occurrence USING BRIN (visit_end_datetime) WITH (autosummarize = on);
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Literal
+from typing import Literal, Optional
 from pydantic import Field
 
 
@@ -20,12 +20,176 @@ class Settings(BaseSettings):
     dialect: Literal["postgresql", "mssql"] = Field(
         default="postgresql", description="Database dialect"
     )
-    omop_version: Literal['omop5_3', 'omop5_4'] = Field(default='omop5_4', description="Version of the OMOP-CDM specification to use")
+    omop_version: Literal["omop5_3", "omop5_4"] = Field(
+        default="omop5_4", description="Version of the OMOP-CDM specification to use"
+    )
     log_level: str = Field(default="INFO", description="Logging level")
     fts_create: bool = Field(
         default=False, description="Create full-text search indexes"
     )
     delimiter: str = Field(default="\t", description="CSV delimiter")
+    skip_redundant_indices: bool = Field(
+        default=False,
+        description="Skip indices already covered by another index or key",
+    )
+    online_indices: bool = Field(
+        default=False, description="Build indices without blocking writes"
+    )
+    index_profile: Literal["default", "brin"] = Field(
+        default="default",
+        description="Index profile, brin adds BRIN indices on fact table dates",
+    )
+    index_retries: int = Field(
+        default=2, description="Retries for a failed online index build"
+    )
+    ddl_profile: Literal["default", "compact"] = Field(
+        default="default",
+        description="DDL profile, compact reorders columns to minimise row padding",
+    )
+    narrow_types: bool = Field(
+        default=False,
+        description="Narrow low-cardinality code columns in the compact DDL profile",
+    )
+    load_profile: Optional[str] = Field(
+        default=None,
+        description="TOML file of the columns to drop or null out, per table",
+    )
+    text_compression: Literal["default", "pglz", "lz4"] = Field(
+        default="default",
+        description="Compression method for the long text columns of NOTE and NOTE_NLP",
+    )
+    toast_tuple_target: Optional[int] = Field(
+        default=None,
+        description="Row size in bytes above which NOTE and NOTE_NLP values are toasted",
+    )
+    fillfactor: Optional[int] = Field(
+        default=None, description="Fillfactor of the tables, 10 to 100"
+    )
+    partitioning: Literal["none", "hash", "range"] = Field(
+        default="none",
+        description="Partition the clinical event tables by person_id hash or date range",
+    )
+    partition_count: int = Field(
+        default=8, description="Number of hash partitions per table"
+    )
+    partition_start_year: int = Field(
+        default=2000, description="First year with its own range partition"
+    )
+    partition_end_year: int = Field(
+        default=2030, description="Last year with its own range partition"
+    )
+    distributed: bool = Field(
+        default=False,
+        description="Distribute the tables over a Citus cluster as ddl.sql hints",
+    )
+    targets: Optional[str] = Field(
+        default=None,
+        description="Comma-separated postgresql:// URLs of more databases to load",
+    )
+    throttle_mb_per_second: Optional[float] = Field(
+        default=None, description="Cap on the data loaded per second, in MB"
+    )
+    throttle_rows_per_second: Optional[int] = Field(
+        default=None, description="Cap on the rows loaded per second"
+    )
+    adaptive_throttle: bool = Field(
+        default=False,
+        description="Slow the load down while the server is unhealthy",
+    )
+    max_replication_lag: float = Field(
+        default=10.0,
+        description="Replication lag in seconds above which the server is unhealthy",
+    )
+    read_ahead_buffers: int = Field(
+        default=4,
+        description="Buffers each loader reads ahead of the database, 0 for none",
+    )
+    read_buffer_size: int = Field(
+        default=1 << 20, description="Characters read into each read-ahead buffer"
+    )
+    convert_workers: int = Field(
+        default=1,
+        description="Processes converting transformed files for COPY, 1 for none",
+    )
+    load_engine: Literal["sync", "async"] = Field(
+        default="sync",
+        description="Load on threads, or on an event loop with psycopg 3",
+    )
+    load_workers: int = Field(
+        default=1, description="Tables, or COPY streams per table, loaded at once"
+    )
+    server_side_copy: bool = Field(
+        default=False,
+        description="Have the server read the data files directly when it can",
+    )
+    server_data_dir: Optional[str] = Field(
+        default=None,
+        description="Path at which the database server sees the data directory",
+    )
+    part_pattern: str = Field(
+        default="{table}/*.csv",
+        description="Part files of a table without a single <TABLE>.csv",
+    )
+    part_headers: bool = Field(
+        default=True, description="Whether each part file starts with a header"
+    )
+    load_retries: int = Field(
+        default=2, description="Retries for a data file that failed to load"
+    )
+    load_state_file: Optional[str] = Field(
+        default=None,
+        description="JSON file recording loaded files, so a load can resume",
+    )
+    s3_endpoint_url: Optional[str] = Field(
+        default=None,
+        description="Endpoint of an S3-compatible store for an s3:// data directory",
+    )
+    s3_part_size: int = Field(
+        default=8 << 20, description="Bytes fetched per ranged GET from S3"
+    )
+    s3_read_ahead: int = Field(
+        default=4, description="Ranges fetched ahead of the reader from S3"
+    )
+    commit_rows: Optional[int] = Field(
+        default=None, description="Commit a file's rows in chunks of this many"
+    )
+    commit_bytes: Optional[int] = Field(
+        default=None,
+        description="Commit a file's rows in chunks of about this many bytes",
+    )
+    sample_persons: Optional[float] = Field(
+        default=None,
+        description="Load this fraction of persons, picked by a hash of person_id",
+    )
+    person_ids_file: Optional[str] = Field(
+        default=None, description="File of the person ids to load, one per line"
+    )
+    prune_vocabulary: bool = Field(
+        default=False,
+        description="Load only the concepts the loaded rows refer to",
+    )
+    on_error: Literal["skip", "quarantine"] = Field(
+        default="skip",
+        description="On a bad row, skip the file or quarantine the row and load the rest",
+    )
+    reject_file: str = Field(
+        default="rejects.csv", description="CSV file quarantined rows are written to"
+    )
+    normalise_dates: bool = Field(
+        default=False,
+        description="Rewrite YYYYMMDD vocabulary dates as ISO dates while loading",
+    )
+    suspend_autovacuum: bool = Field(
+        default=False,
+        description="Turn autovacuum off during the load and vacuum once afterwards",
+    )
+    index_workers: int = Field(
+        default=1, description="Tables or partitions indexed at once"
+    )
+    adaptive_workers: bool = Field(
+        default=False,
+        description="Tune the load and index workers up to load_workers and index_workers",
+    )
 
     class Config:
         env_file = ".env"
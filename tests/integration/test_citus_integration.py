@@ -0,0 +1,73 @@
+import os
+
+import pytest
+from sqlalchemy import text
+
+from omop_lite.db.postgres import PostgresDatabase
+from omop_lite.settings import Settings
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("CITUS_DB_HOST"), reason="No Citus database configured"
+)
+
+
+@pytest.fixture
+def citus_settings():
+    """Create settings for a single-node Citus database."""
+    return Settings(
+        db_host=os.getenv("CITUS_DB_HOST", "localhost"),
+        db_port=int(os.getenv("CITUS_DB_PORT", "5433")),
+        db_user=os.getenv("CITUS_DB_USERNAME", "postgres"),
+        db_password=os.getenv("CITUS_DB_PASSWORD", "postgres"),
+        db_name=os.getenv("CITUS_DB_DATABASE", "postgres"),
+        schema_name=os.getenv("CITUS_DB_SCHEMA", "test_cdm"),
+        dialect="postgresql",
+        synthetic=True,
+        distributed=True,
+        load_workers=4,
+    )
+
+
+@pytest.fixture
+def citus_db(citus_settings):
+    """Create a Citus database connection."""
+    db = PostgresDatabase(citus_settings)
+    yield db
+    try:
+        db.drop_schema(citus_settings.schema_name)
+    except Exception:
+        pass
+
+
+def test_distributed_pipeline_integration(citus_db, citus_settings: Settings):
+    """Integration test for the distributed pipeline on Citus."""
+    # Arrange
+    citus_db.create_schema(citus_settings.schema_name)
+
+    # Act
+    citus_db.create_tables()
+    citus_db.load_data()
+    citus_db.add_all_constraints()
+
+    # Assert
+    distributed = citus_db.distributed_tables()
+    assert distributed["measurement"] == "person_id"
+    assert distributed["person"] == "person_id"
+    assert distributed["concept"] is None
+
+    with citus_db.engine.connect() as conn:
+        persons = conn.execute(
+            text(f"SELECT COUNT(*) FROM {citus_settings.schema_name}.person")
+        ).scalar()
+        assert persons > 0, "Person should be loaded through the coordinator"
+
+        result = conn.execute(
+            text(f"""
+            SELECT COUNT(*)
+            FROM information_schema.table_constraints
+            WHERE constraint_type = 'PRIMARY KEY'
+            AND table_schema = '{citus_settings.schema_name}'
+            AND table_name = 'measurement'
+        """)
+        )
+        assert result.scalar() == 1, "Measurement should have a primary key"
@@ -1,4 +1,7 @@
+import io
+import os
 import pytest
+import zipfile
 from unittest.mock import Mock, patch
 from pathlib import Path
 from typing import Union
@@ -13,7 +16,12 @@ class TestDatabase(Database):
     def create_schema(self, schema_name: str) -> None:
         pass
 
-    def _bulk_load(self, table_name: str, file_path: Union[Path, str]) -> None:
+    def _bulk_load(
+        self, table_name: str, file_path: Union[Path, str], header: bool = True
+    ) -> None:
+        pass
+
+    def swap_schema(self, replacement: str, previous: str) -> None:
         pass
 
 
@@ -59,6 +67,179 @@ class TestDatabaseBase:
             file_path = Path("/test/file.csv")
             assert database._file_exists(file_path) is True
 
+    def test_file_exists_with_fifo(self, database, tmp_path):
+        """Test _file_exists accepts a named pipe."""
+        fifo = tmp_path / "PERSON.csv"
+        os.mkfifo(fifo)
+        assert database._file_exists(fifo) is True
+        assert database._file_exists(tmp_path / "MISSING.csv") is False
+
+    def test_open_stdin(self, database):
+        """Test _open reads standard input for -."""
+        with patch("sys.stdin", io.StringIO("person_id\n1\n")):
+            with database._open("-") as f:
+                assert f.read() == "person_id\n1\n"
+
+    def test_load_file(self, database, tmp_path):
+        """Test load_file loads one table from the given file."""
+        data = tmp_path / "drug.csv"
+        data.write_text("drug_exposure_id\n")
+        with patch.object(database, "_bulk_load") as mock_bulk_load:
+            database.load_file("DRUG_EXPOSURE", str(data))
+            database.load_file("drug_exposure", "-")
+        assert mock_bulk_load.call_args_list == [
+            (("drug_exposure", data),),
+            (("drug_exposure", "-"),),
+        ]
+
+    def test_load_file_errors(self, database, tmp_path):
+        """Test load_file raises for an unknown table or a missing file."""
+        with pytest.raises(ValueError, match="Unknown table"):
+            database.load_file("NOT_A_TABLE", "-")
+        with pytest.raises(FileNotFoundError):
+            database.load_file("PERSON", str(tmp_path / "PERSON.csv"))
+
+    def test_load_data_parts(self, database, tmp_path):
+        """Test a table's part files are each loaded, without headers if set."""
+        parts = tmp_path / "MEASUREMENT"
+        parts.mkdir()
+        (parts / "part-0000.csv").write_text("1\n")
+        (parts / "part-0001.csv").write_text("2\n")
+        (tmp_path / "PERSON.csv").write_text("person_id\n1\n")
+        database.settings.data_dir = str(tmp_path)
+        database.settings.part_headers = False
+
+        with patch.object(database, "_bulk_load") as mock_bulk_load:
+            database.load_data()
+
+        assert sorted(
+            (call.args[0], call.args[1].name, call.kwargs.get("header", True))
+            for call in mock_bulk_load.call_args_list
+        ) == [
+            ("measurement", "part-0000.csv", False),
+            ("measurement", "part-0001.csv", False),
+            ("person", "PERSON.csv", True),
+        ]
+
+    def test_load_data_retries_and_resumes(self, database, tmp_path):
+        """Test a failed part is retried, and loaded parts skipped on a rerun."""
+        parts = tmp_path / "MEASUREMENT"
+        parts.mkdir()
+        (parts / "part-0000.csv").write_text("measurement_id\n1\n")
+        (parts / "part-0001.csv").write_text("measurement_id\n2\n")
+        database.settings.data_dir = str(tmp_path)
+        database.settings.load_retries = 1
+        database.settings.load_state_file = str(tmp_path / "state.json")
+
+        def fail_second(table_name, file_path, header=True):
+            if file_path.name == "part-0001.csv":
+                raise ConnectionError("connection lost")
+
+        with patch.object(
+            database, "_bulk_load", side_effect=fail_second
+        ) as mock_bulk_load:
+            database.load_data()
+        assert mock_bulk_load.call_count == 3
+
+        with patch.object(database, "_bulk_load") as mock_bulk_load:
+            database.load_data()
+        assert [call.args[1].name for call in mock_bulk_load.call_args_list] == [
+            "part-0001.csv"
+        ]
+
+    def test_load_data_does_not_retry_bad_data(self, database, tmp_path):
+        """Test an error in the data fails the file at once, without retries."""
+        (tmp_path / "PERSON.csv").write_text("person_id\nx\n")
+        database.settings.data_dir = str(tmp_path)
+        database.settings.load_retries = 3
+
+        with patch.object(
+            database, "_bulk_load", side_effect=ValueError("invalid integer")
+        ) as mock_bulk_load:
+            failed = database.load_data()
+
+        assert mock_bulk_load.call_count == 1
+        assert failed == ["PERSON/PERSON.csv"]
+
+    def test_load_data_from_zip(self, database, tmp_path):
+        """Test the tables and their parts are read out of a ZIP data directory."""
+        archive = tmp_path / "vocabulary.zip"
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("CONCEPT.csv", "concept_id\n1\n")
+            zf.writestr("MEASUREMENT/part-0000.csv", "measurement_id\n1\n")
+        database.settings.data_dir = str(archive)
+        loaded = {}
+
+        def read(table_name, file_path, header=True):
+            with database._open(file_path) as f:
+                loaded[table_name] = f.read()
+
+        with patch.object(database, "_bulk_load", side_effect=read):
+            database.load_data()
+
+        assert loaded == {
+            "concept": "concept_id\n1\n",
+            "measurement": "measurement_id\n1\n",
+        }
+
+    def test_refresh_builds_shadow_schema_then_swaps(self, database):
+        """Test refresh runs every phase in <schema>_new before swapping it in."""
+        calls = []
+
+        def record(name):
+            def method(db, *args):
+                calls.append((name, db.settings.schema_name, *args))
+
+            return method
+
+        with (
+            patch.object(TestDatabase, "schema_exists", return_value=True),
+            patch.object(TestDatabase, "drop_schema", record("drop_schema")),
+            patch.object(TestDatabase, "create_schema", record("create_schema")),
+            patch.object(TestDatabase, "create_tables", record("create_tables")),
+            patch.object(TestDatabase, "load_data", record("load_data")),
+            patch.object(
+                TestDatabase, "add_all_constraints", record("add_all_constraints")
+            ),
+            patch.object(TestDatabase, "swap_schema", record("swap_schema")),
+            patch.object(TestDatabase, "refresh_metadata"),
+        ):
+            database.refresh()
+
+        assert calls == [
+            ("drop_schema", "test_schema_new", "test_schema_new"),
+            ("create_schema", "test_schema_new", "test_schema_new"),
+            ("create_tables", "test_schema_new"),
+            ("load_data", "test_schema_new"),
+            ("add_all_constraints", "test_schema_new"),
+            ("swap_schema", "test_schema", "test_schema_new", "test_schema_old"),
+        ]
+
+    def test_refresh_stops_before_swap_when_a_phase_fails(self, database):
+        """Test a failed load or index leaves the live schema where it is."""
+        for failed_load, failed_index in ((["PERSON/PERSON.csv"], []), ([], ["x"])):
+            with (
+                patch.object(TestDatabase, "schema_exists", return_value=False),
+                patch.object(TestDatabase, "create_tables"),
+                patch.object(TestDatabase, "load_data", return_value=failed_load),
+                patch.object(
+                    TestDatabase, "add_all_constraints", return_value=failed_index
+                ),
+                patch.object(TestDatabase, "swap_schema") as mock_swap,
+                pytest.raises(RuntimeError, match="'test_schema' is unchanged"),
+            ):
+                database.refresh()
+
+            mock_swap.assert_not_called()
+
+    def test_rollback_refresh_without_old_schema(self, database):
+        """Test a rollback fails when no refresh has kept an old schema."""
+        with (
+            patch.object(TestDatabase, "schema_exists", return_value=False),
+            pytest.raises(RuntimeError, match="test_schema_old"),
+        ):
+            database.rollback_refresh()
+
     def test_refresh_metadata_without_engine(self, database):
         """Test refresh_metadata raises error when engine is None."""
         with pytest.raises(RuntimeError, match="Database not properly initialized"):
@@ -275,3 +456,96 @@ class TestDatabaseBase:
         mock_connection.commit.assert_called_once()
         mock_cursor.close.assert_called_once()
         mock_connection.close.assert_called_once()
+
+    def test_add_all_constraints_reports_failed_scripts(self, database):
+        """Test a script that fails is logged and returned, and the rest still run."""
+        database.engine = Mock()
+        cursor = database.engine.raw_connection.return_value.cursor.return_value
+        cursor.execute.side_effect = [Exception("duplicate key"), None, None]
+        database.file_path = Mock()
+        database.file_path.joinpath.side_effect = lambda name: name
+
+        with patch.object(database, "_read_sql_file", return_value="SELECT 1"):
+            failed = database.add_all_constraints()
+
+        assert failed == ["primary_keys.sql: duplicate key"]
+        assert cursor.execute.call_count == 3
+
+    @patch("omop_lite.db.base.Database._execute_sql")
+    @patch("omop_lite.db.base.Database._read_sql_file")
+    @patch("omop_lite.db.base.Database.existing_indices")
+    def test_add_indices_skip_redundant(
+        self, mock_existing, mock_read_sql, mock_execute_sql, database
+    ):
+        """Test add_indices leaves out indices covered by an existing key."""
+        from omop_lite.db.scripts import IndexDefinition
+
+        database.settings.skip_redundant_indices = True
+        database.file_path = Mock()
+        mock_read_sql.return_value = (
+            "CREATE INDEX idx_person_id ON test_schema.person (person_id ASC);\n"
+            "CLUSTER test_schema.person USING idx_person_id;\n"
+        )
+        mock_existing.return_value = [
+            IndexDefinition("xpk_person", "person", ("person_id",), unique=True)
+        ]
+
+        database.add_indices()
+
+        mock_execute_sql.assert_called_once_with(
+            "CLUSTER test_schema.person USING xpk_person", "indices.sql"
+        )
+
+    @patch("omop_lite.db.base.Database._execute_sql")
+    @patch("omop_lite.db.base.Database._read_sql_file")
+    def test_add_indices_workers_group_by_table(
+        self, mock_read_sql, mock_execute_sql, database
+    ):
+        """Test index_workers builds the indices of each table as a separate job."""
+        database.settings.index_workers = 2
+        database.file_path = Mock()
+        mock_read_sql.return_value = (
+            "CREATE INDEX idx_person_id ON test_schema.person (person_id ASC);\n"
+            "CREATE INDEX idx_concept_code ON test_schema.concept (concept_code ASC);\n"
+            "CLUSTER test_schema.person USING idx_person_id;\n"
+        )
+
+        database.add_indices()
+
+        assert sorted(call.args[0] for call in mock_execute_sql.call_args_list) == [
+            "CREATE INDEX idx_concept_code ON test_schema.concept (concept_code ASC)",
+            "CREATE INDEX idx_person_id ON test_schema.person (person_id ASC);\n"
+            "CLUSTER test_schema.person USING idx_person_id",
+        ]
+
+    @patch("omop_lite.db.base.Database._drop_invalid_index")
+    @patch("omop_lite.db.base.Database.invalid_indices")
+    @patch("omop_lite.db.base.Database._execute_autocommit")
+    def test_add_indices_online_retries_invalid(
+        self, mock_autocommit, mock_invalid, mock_drop, database
+    ):
+        """Test a failed online build drops the invalid index and retries."""
+        database.settings.index_retries = 1
+        mock_autocommit.side_effect = [Exception("deadlock"), None]
+        mock_invalid.side_effect = [["idx_gender"], []]
+
+        database._add_indices_online(
+            ["CREATE INDEX idx_gender ON test_schema.person (gender_concept_id ASC)"]
+        )
+
+        assert mock_autocommit.call_count == 2
+        mock_drop.assert_called_once_with("idx_gender")
+
+    @patch("omop_lite.db.base.Database._execute_sql")
+    def test_add_indices_brin_profile(self, mock_execute_sql, database):
+        """Test the BRIN profile adds its script to the index phase."""
+        from importlib.resources import files
+
+        database.settings.index_profile = "brin"
+        database.file_path = files("omop_lite.scripts.pg.omop5_4")
+
+        database.add_indices()
+
+        sql = mock_execute_sql.call_args[0][0]
+        assert "idx_gender" in sql
+        assert "USING BRIN (measurement_date)" in sql
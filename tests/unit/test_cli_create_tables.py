@@ -98,6 +98,17 @@ class TestCreateTablesCommand:
                 schema_name="custom-schema",
                 dialect="mssql",
                 log_level="DEBUG",
+                ddl_profile="default",
+                narrow_types=False,
+                load_profile=None,
+                text_compression="default",
+                toast_tuple_target=None,
+                fillfactor=None,
+                partitioning="none",
+                partition_count=8,
+                partition_start_year=2000,
+                partition_end_year=2030,
+                distributed=False,
             )
 
     def test_create_tables_command_schema_exists(self, runner, app):
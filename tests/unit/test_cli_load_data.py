@@ -99,6 +99,36 @@ class TestLoadDataCommand:
                 dialect="mssql",
                 log_level="DEBUG",
                 delimiter=",",
+                load_workers=1,
+                load_engine="sync",
+                adaptive_workers=False,
+                targets=None,
+                suspend_autovacuum=False,
+                server_side_copy=False,
+                server_data_dir=None,
+                part_pattern="{table}/*.csv",
+                part_headers=True,
+                load_retries=2,
+                load_state_file=None,
+                normalise_dates=False,
+                commit_rows=None,
+                commit_bytes=None,
+                on_error="skip",
+                reject_file="rejects.csv",
+                load_profile=None,
+                sample_persons=None,
+                person_ids_file=None,
+                prune_vocabulary=False,
+                throttle_mb_per_second=None,
+                throttle_rows_per_second=None,
+                adaptive_throttle=False,
+                max_replication_lag=10.0,
+                read_ahead_buffers=4,
+                read_buffer_size=1 << 20,
+                convert_workers=1,
+                s3_endpoint_url=None,
+                s3_part_size=8 << 20,
+                s3_read_ahead=4,
             )
 
     def test_load_data_command_synthetic_data(self, runner, app):
@@ -266,6 +296,36 @@ class TestLoadDataCommand:
             # Progress-related text should be in output
             assert "Loading data" in result.output
 
+    def test_load_data_command_single_table(self, runner, app):
+        """Test load_data loads one table from a file with --table and --file."""
+        with (
+            patch(
+                "omop_lite.cli.commands.database.load_data._create_settings"
+            ) as mock_create_settings,
+            patch(
+                "omop_lite.cli.commands.database.load_data.create_database"
+            ) as mock_create_db,
+        ):
+            mock_create_settings.return_value = self._create_mock_settings()
+            mock_db = self._create_mock_database()
+            mock_create_db.return_value = mock_db
+
+            result = runner.invoke(app, ["--table", "DRUG_EXPOSURE", "--file", "-"])
+
+            assert result.exit_code == 0
+            mock_db.load_file.assert_called_once_with("DRUG_EXPOSURE", "-")
+            mock_db.load_data.assert_not_called()
+
+    def test_load_data_command_file_needs_table(self, runner, app):
+        """Test --file without --table is rejected."""
+        with patch(
+            "omop_lite.cli.commands.database.load_data.create_database"
+        ) as mock_create_db:
+            result = runner.invoke(app, ["--file", "-"])
+
+            assert result.exit_code != 0
+            mock_create_db.assert_not_called()
+
     def _create_mock_settings(self):
         return Settings(
             db_host="localhost",
@@ -282,7 +342,25 @@ class TestLoadDataCommand:
             delimiter="\t",
         )
 
+    def test_load_data_command_reports_failed_files(self, runner, app):
+        """Test failed files are reported with a non-zero exit."""
+        with (
+            patch("omop_lite.cli.commands.database.load_data._create_settings"),
+            patch(
+                "omop_lite.cli.commands.database.load_data.create_database"
+            ) as mock_create_db,
+        ):
+            mock_db = self._create_mock_database()
+            mock_db.load_data.return_value = ["PERSON/PERSON.csv"]
+            mock_create_db.return_value = mock_db
+
+            result = runner.invoke(app)
+
+            assert result.exit_code == 1
+            assert "1 files failed to load" in result.output
+            assert "PERSON/PERSON.csv" in result.output
+
     def _create_mock_database(self):
         db = Mock()
-        db.load_data = Mock()
+        db.load_data = Mock(return_value=[])
         return db
@@ -7,6 +7,14 @@ from typer.testing import CliRunner
 from omop_lite.cli.main import app, main_cli
 
 
+def _mock_database():
+    """Return a mocked database whose phases all succeed."""
+    db = Mock()
+    db.load_data.return_value = []
+    db.add_all_constraints.return_value = []
+    return db
+
+
 class TestMainCLI:
     """Test cases for the main CLI entry point."""
 
@@ -39,7 +47,7 @@ class TestMainCLI:
             mock_settings.dialect = "postgresql"
             mock_create_settings.return_value = mock_settings
 
-            mock_db = Mock()
+            mock_db = _mock_database()
             mock_db.schema_exists.return_value = False
             mock_create_db.return_value = mock_db
             mock_version.return_value = "1.0.0"
@@ -62,7 +70,7 @@ class TestMainCLI:
             mock_settings.schema_name = "test_schema"
             mock_create_settings.return_value = mock_settings
 
-            mock_db = Mock()
+            mock_db = _mock_database()
             mock_db.schema_exists.return_value = True
             mock_create_db.return_value = mock_db
 
@@ -82,7 +90,7 @@ class TestMainCLI:
             mock_settings.schema_name = "public"
             mock_create_settings.return_value = mock_settings
 
-            mock_db = Mock()
+            mock_db = _mock_database()
             mock_db.schema_exists.return_value = False
             mock_create_db.return_value = mock_db
 
@@ -104,7 +112,7 @@ class TestMainCLI:
             patch("omop_lite.cli.commands.database.drop.Confirm.ask") as mock_confirm,
         ):
             mock_create_settings.return_value = Mock()
-            mock_create_db.return_value = Mock()
+            mock_create_db.return_value = _mock_database()
             mock_confirm.return_value = True
 
             result = runner.invoke(app, ["drop", "--confirm"])
@@ -118,7 +126,7 @@ class TestMainCLI:
             patch("omop_lite.cli.main.create_database") as mock_create_db,
         ):
             mock_create_settings.return_value = Mock()
-            mock_create_db.return_value = Mock()
+            mock_create_db.return_value = _mock_database()
 
             result = runner.invoke(
                 app,
@@ -149,7 +157,7 @@ class TestMainCLI:
             patch("omop_lite.cli.main.create_database") as mock_create_db,
         ):
             mock_create_settings.return_value = Mock()
-            mock_create_db.return_value = Mock()
+            mock_create_db.return_value = _mock_database()
 
             result = runner.invoke(
                 app,
@@ -194,7 +202,7 @@ class TestMainCLI:
             mock_settings.schema_name = "test_schema"
             mock_create_settings.return_value = mock_settings
 
-            mock_db = Mock()
+            mock_db = _mock_database()
             mock_db.schema_exists.return_value = False
             mock_create_db.return_value = mock_db
 
@@ -212,7 +220,7 @@ class TestMainCLI:
             patch("omop_lite.cli.main.version") as mock_version,
         ):
             mock_create_settings.return_value = Mock()
-            mock_create_db.return_value = Mock()
+            mock_create_db.return_value = _mock_database()
             mock_version.return_value = "2.1.0"
 
             result = runner.invoke(app)
@@ -227,7 +235,7 @@ class TestMainCLI:
             patch("omop_lite.cli.main.create_database") as mock_create_db,
         ):
             mock_create_settings.return_value = Mock()
-            mock_create_db.return_value = Mock()
+            mock_create_db.return_value = _mock_database()
 
             result = runner.invoke(app, ["--synthetic", "--synthetic-number", "1000"])
 
@@ -243,7 +251,7 @@ class TestMainCLI:
             patch("omop_lite.cli.main.create_database") as mock_create_db,
         ):
             mock_create_settings.return_value = Mock()
-            mock_create_db.return_value = Mock()
+            mock_create_db.return_value = _mock_database()
 
             result = runner.invoke(app, ["--fts-create", "--delimiter", ";"])
 
@@ -293,7 +301,7 @@ class TestMainCLI:
             patch("omop_lite.cli.main.create_database") as mock_create_db,
         ):
             mock_create_settings.return_value = Mock()
-            mock_create_db.return_value = Mock()
+            mock_create_db.return_value = _mock_database()
 
             for false_value in ("False", "false", "FALSE", "0", "no", "off"):
                 result = runner.invoke(app, env={"SYNTHETIC": false_value})
@@ -310,7 +318,7 @@ class TestMainCLI:
             patch("omop_lite.cli.main.create_database") as mock_create_db,
         ):
             mock_create_settings.return_value = Mock()
-            mock_create_db.return_value = Mock()
+            mock_create_db.return_value = _mock_database()
 
             for true_value in ("True", "true", "TRUE", "1", "yes", "on"):
                 result = runner.invoke(app, env={"SYNTHETIC": true_value})
@@ -319,3 +327,56 @@ class TestMainCLI:
                 assert (
                     call_args["synthetic"] is True
                 ), f"Expected synthetic=True for SYNTHETIC={true_value!r}, got {call_args['synthetic']}"
+
+    def test_main_cli_partition_years_envvars(self, runner):
+        """Test the range partition years are read from the environment."""
+        with (
+            patch("omop_lite.cli.main._create_settings") as mock_create_settings,
+            patch("omop_lite.cli.main.create_database") as mock_create_db,
+        ):
+            mock_create_settings.return_value = Mock()
+            mock_create_db.return_value = _mock_database()
+
+            result = runner.invoke(
+                app,
+                env={"PARTITION_START_YEAR": "1990", "PARTITION_END_YEAR": "2025"},
+            )
+
+            assert result.exit_code == 0
+            call_args = mock_create_settings.call_args[1]
+            assert call_args["partition_start_year"] == 1990
+            assert call_args["partition_end_year"] == 2025
+
+    def test_main_cli_reports_failed_phases(self, runner):
+        """Test failed files and constraints are reported with a non-zero exit."""
+        with (
+            patch("omop_lite.cli.main._create_settings") as mock_create_settings,
+            patch("omop_lite.cli.main.create_database") as mock_create_db,
+        ):
+            mock_create_settings.return_value = Mock(schema_name="public")
+            mock_db = _mock_database()
+            mock_db.load_data.return_value = ["PERSON/PERSON.csv"]
+            mock_db.add_all_constraints.return_value = ["[cdm].sql: duplicate key"]
+            mock_create_db.return_value = mock_db
+
+            result = runner.invoke(app)
+
+            assert result.exit_code == 1
+            assert "created with errors" in result.output
+            assert "PERSON/PERSON.csv" in result.output
+            assert "[cdm].sql: duplicate key" in result.output
+            assert "created successfully" not in result.output
+
+    def test_main_cli_index_retries_envvar(self, runner):
+        """Test INDEX_RETRIES reaches the settings of the default pipeline."""
+        with (
+            patch("omop_lite.cli.main._create_settings") as mock_create_settings,
+            patch("omop_lite.cli.main.create_database") as mock_create_db,
+        ):
+            mock_create_settings.return_value = Mock()
+            mock_create_db.return_value = _mock_database()
+
+            result = runner.invoke(app, env={"INDEX_RETRIES": "5"})
+
+            assert result.exit_code == 0
+            assert mock_create_settings.call_args[1]["index_retries"] == 5
@@ -0,0 +1,86 @@
+"""Unit tests for the refresh CLI command."""
+
+import pytest
+from unittest.mock import Mock, patch
+from typer.testing import CliRunner
+
+from omop_lite.cli.commands.database.refresh import refresh_command
+
+
+class TestRefreshCommand:
+    """Test cases for the refresh CLI command."""
+
+    @pytest.fixture
+    def runner(self):
+        """Create a CLI runner for testing."""
+        return CliRunner()
+
+    @pytest.fixture
+    def app(self):
+        """Create the refresh command app."""
+        return refresh_command()
+
+    def test_refresh_command(self, runner, app):
+        """Test refresh builds and swaps in the shadow schema."""
+        with (
+            patch(
+                "omop_lite.cli.commands.database.refresh._create_settings"
+            ) as mock_create_settings,
+            patch(
+                "omop_lite.cli.commands.database.refresh.create_database"
+            ) as mock_create_db,
+        ):
+            mock_db = Mock()
+            mock_create_db.return_value = mock_db
+
+            result = runner.invoke(app, ["--schema-name", "cdm", "--load-workers", "4"])
+
+            assert result.exit_code == 0
+            assert mock_create_settings.call_args.kwargs["schema_name"] == "cdm"
+            assert mock_create_settings.call_args.kwargs["load_workers"] == 4
+            mock_db.refresh.assert_called_once()
+            mock_db.rollback_refresh.assert_not_called()
+            assert "cdm_old" in result.stdout
+
+    def test_refresh_command_keeps_layout_settings(self, runner, app):
+        """Test the shadow schema is built with the layout set in the environment."""
+        with (
+            patch(
+                "omop_lite.cli.commands.database.refresh._create_settings"
+            ) as mock_create_settings,
+            patch("omop_lite.cli.commands.database.refresh.create_database"),
+        ):
+            result = runner.invoke(
+                app,
+                [],
+                env={
+                    "PARTITIONING": "hash",
+                    "DDL_PROFILE": "compact",
+                    "ONLINE_INDICES": "true",
+                    "TARGETS": "postgresql://replica/omop",
+                },
+            )
+
+            assert result.exit_code == 0
+            kwargs = mock_create_settings.call_args.kwargs
+            assert kwargs["partitioning"] == "hash"
+            assert kwargs["ddl_profile"] == "compact"
+            assert kwargs["online_indices"] is True
+            assert kwargs["targets"] == "postgresql://replica/omop"
+
+    def test_refresh_command_rollback(self, runner, app):
+        """Test --rollback swaps the old schema back in without rebuilding."""
+        with (
+            patch("omop_lite.cli.commands.database.refresh._create_settings"),
+            patch(
+                "omop_lite.cli.commands.database.refresh.create_database"
+            ) as mock_create_db,
+        ):
+            mock_db = Mock()
+            mock_create_db.return_value = mock_db
+
+            result = runner.invoke(app, ["--rollback"])
+
+            assert result.exit_code == 0
+            mock_db.rollback_refresh.assert_called_once()
+            mock_db.refresh.assert_not_called()
@@ -261,3 +261,21 @@ class TestCLIUtils:
         # Test with custom level
         settings = _create_settings(log_level="CUSTOM")
         assert settings.log_level == "CUSTOM"
+
+    def test_create_settings_partition_validation(self):
+        """Test _create_settings rejects partitions that cannot be created."""
+        with pytest.raises(BadParameter, match="partition count must be at least 1"):
+            _create_settings(partitioning="hash", partition_count=0)
+
+        with pytest.raises(BadParameter, match="start year must not be after"):
+            _create_settings(partition_start_year=2030, partition_end_year=2000)
+
+    def test_create_settings_worker_validation(self):
+        """Test _create_settings rejects fewer than one worker."""
+        for name in ("load_workers", "index_workers", "convert_workers"):
+            label = name.replace("_", " ")
+            with pytest.raises(BadParameter, match=f"{label} must be at least 1"):
+                _create_settings(**{name: 0})
+
+        with pytest.raises(BadParameter, match="retries cannot be negative"):
+            _create_settings(load_retries=-1)
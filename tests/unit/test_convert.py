@@ -0,0 +1,69 @@
+"""Unit tests for converting data files on a pool of processes."""
+
+import pytest
+
+from omop_lite.db.convert import (
+    ConversionPool,
+    _take,
+    convert_range,
+    record_ranges,
+)
+from omop_lite.db.streams import iter_records
+from omop_lite.db.transforms import iso_date, transform_chunks
+
+
+@pytest.fixture
+def concept_file(tmp_path):
+    path = tmp_path / "CONCEPT.csv"
+    lines = ["concept_id\tconcept_name\tvalid_start_date\n"]
+    for n in range(200):
+        name = f'"Line {n}\nand more"' if n % 7 == 0 else f"Name {n}"
+        lines.append(f"{n}\t{name}\t2000010{n % 9 + 1}\n")
+    path.write_text("".join(lines))
+    return path
+
+
+def test_record_ranges_end_on_record_boundaries(concept_file):
+    """Test ranges cover the records after the header, never splitting a quote."""
+    data = concept_file.read_bytes()
+    ranges = list(record_ranges(concept_file, True, '"', size=64))
+
+    assert ranges[0][0] == data.index(b"\n") + 1
+    assert ranges[-1][1] == len(data)
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    for start, end in ranges:
+        assert data[start:end].count(b'"') % 2 == 0
+        assert data[end - 1 : end] == b"\n"
+
+
+def test_convert_range_hands_back_shared_memory(concept_file):
+    """Test a range is transformed and its data read back from shared memory."""
+    start, end = next(record_ranges(concept_file, True, '"', size=1 << 20))
+
+    name, length = convert_range(
+        str(concept_file), start, end, {2: iso_date}, "\t", '"', None
+    )
+    data = _take(name, length)
+
+    assert data.startswith('0\t"Line 0\nand more"\t2000-01-01\n1\tName 1\t2000-01-02\n')
+
+
+def test_pool_converts_like_the_loader(concept_file):
+    """Test the pool's output matches converting the file in the loader."""
+    with open(concept_file) as f:
+        f.readline()
+        expected = "".join(
+            transform_chunks(
+                iter_records(f, '"'), {2: iso_date}, "\t", '"', positions=[0, 2]
+            )
+        )
+
+    pool = ConversionPool(2, range_size=256)
+    try:
+        converted = "".join(
+            pool.convert(concept_file, True, {2: iso_date}, "\t", '"', [0, 2])
+        )
+    finally:
+        pool.close()
+
+    assert converted == expected
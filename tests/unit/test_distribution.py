@@ -0,0 +1,56 @@
+from omop_lite.db.distribution import (
+    adapt_distributed_constraints,
+    distribution_statements,
+)
+from omop_lite.db.scripts import parse_tables
+
+
+def test_distribution_statements_follow_hints():
+    """Test hinted tables are distributed and the rest are reference tables."""
+    tables = parse_tables(
+        """
+--HINT DISTRIBUTE ON KEY (person_id)
+CREATE TABLE cdm.measurement (
+\t\t\tmeasurement_id integer NOT NULL,
+\t\t\tperson_id integer NOT NULL );
+--HINT DISTRIBUTE ON RANDOM
+CREATE TABLE cdm.concept (
+\t\t\tconcept_id integer NOT NULL );
+"""
+    )
+
+    assert distribution_statements(tables) == [
+        "SELECT create_distributed_table('cdm.measurement', 'person_id')",
+        "SELECT create_reference_table('cdm.concept')",
+    ]
+
+
+def test_adapt_distributed_constraints():
+    """Test only foreign keys Citus can enforce are kept."""
+    distributed = {
+        "person": "person_id",
+        "measurement": "person_id",
+        "payer_plan_period": "person_id",
+        "concept": None,
+        "episode_event": None,
+    }
+    to_person = (
+        "ALTER TABLE cdm.measurement ADD CONSTRAINT fpk_measurement_person_id "
+        "FOREIGN KEY (person_id) REFERENCES cdm.person (person_id)"
+    )
+    to_concept = (
+        "ALTER TABLE cdm.measurement ADD CONSTRAINT fpk_measurement_concept_id "
+        "FOREIGN KEY (measurement_concept_id) REFERENCES cdm.concept (concept_id)"
+    )
+    other_column = (
+        "ALTER TABLE cdm.payer_plan_period ADD CONSTRAINT fpk_payer_plan_period_id "
+        "FOREIGN KEY (payer_plan_period_id) REFERENCES cdm.person (person_id)"
+    )
+    from_reference = (
+        "ALTER TABLE cdm.episode_event ADD CONSTRAINT fpk_episode_event_episode_id "
+        "FOREIGN KEY (episode_id) REFERENCES cdm.measurement (person_id)"
+    )
+
+    assert adapt_distributed_constraints(
+        [to_person, to_concept, other_column, from_reference], distributed
+    ) == [to_person, to_concept]
@@ -0,0 +1,168 @@
+from importlib.resources import files
+
+from omop_lite.db.indexes import find_redundant_indices, plan_indices
+from omop_lite.db.scripts import (
+    IndexDefinition,
+    parse_cluster,
+    parse_index,
+    split_statements,
+)
+
+
+def test_split_statements_drops_comments():
+    """Test that comments are dropped and statements split on semicolons."""
+    sql = """/* header; with a semicolon */
+--HINT DISTRIBUTE ON KEY (person_id)
+CREATE INDEX a ON s.t (x ASC);
+COMMENT ON TABLE s.t IS 'one; two';
+"""
+    assert split_statements(sql) == [
+        "CREATE INDEX a ON s.t (x ASC)",
+        "COMMENT ON TABLE s.t IS 'one; two'",
+    ]
+
+
+def test_parse_index_postgres():
+    """Test parsing a Postgres CREATE INDEX statement."""
+    index = parse_index("CREATE INDEX idx_gender ON cdm.person (gender_concept_id ASC)")
+    assert index == IndexDefinition(
+        name="idx_gender", table="person", columns=("gender_concept_id",)
+    )
+
+
+def test_parse_index_sqlserver_clustered():
+    """Test parsing a SQL Server clustered index."""
+    index = parse_index(
+        "CREATE CLUSTERED INDEX idx_person_id ON cdm.person (person_id ASC)"
+    )
+    assert index.clustered is True
+
+
+def test_parse_primary_key():
+    """Test parsing a primary key constraint."""
+    index = parse_index(
+        "ALTER TABLE cdm.person ADD CONSTRAINT xpk_person PRIMARY KEY NONCLUSTERED (person_id)"
+    )
+    assert index.name == "xpk_person"
+    assert index.unique is True
+    assert index.clustered is False
+    assert index.columns == ("person_id",)
+
+
+def test_parse_other_statements():
+    """Test that statements which create no index are ignored."""
+    assert parse_index("CLUSTER cdm.person USING idx_person_id") is None
+    assert (
+        parse_index(
+            "ALTER TABLE cdm.person ADD CONSTRAINT fpk_x FOREIGN KEY (x) REFERENCES cdm.concept (concept_id)"
+        )
+        is None
+    )
+    assert parse_cluster("CLUSTER cdm.person  USING idx_person_id ") == (
+        "person",
+        "idx_person_id",
+    )
+
+
+def test_find_redundant_identical_and_prefix():
+    """Test identical and left-prefix indices are reported."""
+    pk = IndexDefinition("xpk_t", "t", ("id",), unique=True)
+    candidates = [
+        IndexDefinition("idx_id", "t", ("id",)),
+        IndexDefinition("idx_a", "t", ("a",)),
+        IndexDefinition("idx_a_b", "t", ("a", "b")),
+        IndexDefinition("idx_b_a", "t", ("b", "a")),
+    ]
+
+    redundant = find_redundant_indices(candidates, [pk])
+
+    assert [(r.index.name, r.covered_by.name, r.reason) for r in redundant] == [
+        ("idx_id", "xpk_t", "identical"),
+        ("idx_a", "idx_a_b", "left-prefix"),
+    ]
+
+
+def test_find_redundant_keeps_clustered_and_unique():
+    """Test clustered and unique indices are not covered by plain indices."""
+    pk = IndexDefinition("xpk_t", "t", ("id",), unique=True)
+    clustered = IndexDefinition("idx_id", "t", ("id",), clustered=True)
+    unique = IndexDefinition("idx_u", "t", ("a",), unique=True)
+    wider = IndexDefinition("idx_a_b", "t", ("a", "b"))
+
+    assert find_redundant_indices([clustered, unique, wider], [pk]) == []
+
+
+def test_find_redundant_ignores_other_methods():
+    """Test that a B-tree index does not cover an index of another method."""
+    btree = IndexDefinition("idx_d", "t", ("d",))
+    brin = IndexDefinition("idx_d_brin", "t", ("d",), method="brin")
+
+    assert find_redundant_indices([brin], [btree]) == []
+
+
+def test_plan_indices_rewrites_cluster():
+    """Test that CLUSTER uses the covering index when its own index is skipped."""
+    statements = [
+        "CREATE INDEX idx_person_id ON cdm.person (person_id ASC)",
+        "CLUSTER cdm.person USING idx_person_id",
+        "CREATE INDEX idx_gender ON cdm.person (gender_concept_id ASC)",
+    ]
+    pk = IndexDefinition("xpk_person", "person", ("person_id",), unique=True)
+
+    plan = plan_indices(statements, [pk])
+
+    assert plan.statements == [
+        "CLUSTER cdm.person USING xpk_person",
+        "CREATE INDEX idx_gender ON cdm.person (gender_concept_id ASC)",
+    ]
+    assert [r.index.name for r in plan.redundant] == ["idx_person_id"]
+
+
+def test_plan_indices_defers_cluster_to_later_covering_index():
+    """Test CLUSTER waits for a covering index that is created later."""
+    statements = [
+        "CREATE INDEX idx_a ON cdm.t (a ASC)",
+        "CLUSTER cdm.t USING idx_a",
+        "CREATE INDEX idx_a_b ON cdm.t (a ASC, b ASC)",
+    ]
+
+    plan = plan_indices(statements)
+
+    assert plan.statements == [
+        "CREATE INDEX idx_a_b ON cdm.t (a ASC, b ASC)",
+        "CLUSTER cdm.t USING idx_a_b",
+    ]
+
+
+def test_plan_indices_skips_existing_names():
+    """Test that indices which already exist are skipped."""
+    existing = [IndexDefinition("idx_gender", "person", ("gender_concept_id",))]
+
+    plan = plan_indices(
+        ["CREATE INDEX idx_gender ON cdm.person (gender_concept_id ASC)"], existing
+    )
+
+    assert plan.statements == []
+    assert plan.redundant[0].reason == "exists"
+
+
+def test_shipped_postgres_scripts_have_pk_duplicates():
+    """Test the shipped Postgres index script duplicates its primary keys."""
+    scripts = files("omop_lite.scripts.pg.omop5_4")
+    keys = [
+        parse_index(statement)
+        for statement in split_statements(
+            scripts.joinpath("primary_keys.sql").read_text()
+        )
+    ]
+    candidates = [
+        index
+        for statement in split_statements(scripts.joinpath("indices.sql").read_text())
+        if (index := parse_index(statement)) is not None
+    ]
+
+    redundant = {r.index.name for r in find_redundant_indices(candidates, keys)}
+
+    assert "idx_person_id" in redundant
+    assert "idx_concept_concept_id" in redundant
+    assert "idx_gender" not in redundant
@@ -0,0 +1,60 @@
+from omop_lite.db.layout import compact_table, row_size, value_size
+from omop_lite.db.scripts import parse_tables
+
+DDL = """
+CREATE TABLE cdm.person (
+\t\t\tperson_id integer NOT NULL,
+\t\t\tbirth_datetime TIMESTAMP NULL,
+\t\t\tyear_of_birth integer NOT NULL,
+\t\t\tperson_source_value varchar(50) NULL,
+\t\t\tprovider_id integer NULL );
+"""
+
+
+def test_compact_table_orders_by_alignment():
+    """Test fixed-length columns come first, widest alignment first."""
+    (person,) = parse_tables(DDL)
+
+    compact = compact_table(person)
+
+    assert [column.name for column in compact.columns] == [
+        "birth_datetime",
+        "person_id",
+        "year_of_birth",
+        "provider_id",
+        "person_source_value",
+    ]
+
+
+def test_compact_table_narrows_code_columns():
+    """Test narrowing gives birth fields a smallint type."""
+    (person,) = parse_tables(DDL)
+
+    compact = compact_table(person, narrow=True)
+
+    assert compact.column("year_of_birth").type == "smallint"
+    assert compact.column("person_id").type == "integer"
+
+
+def test_row_size_counts_padding():
+    """Test the compact order avoids padding before an 8-byte value."""
+    (person,) = parse_tables(DDL)
+    values = {
+        "person_id": "1",
+        "year_of_birth": "1970",
+        "birth_datetime": "1970-01-01 00:00:00",
+        "person_source_value": "abc",
+        "provider_id": "2",
+    }
+
+    # Header 24, then 24 bytes of data in the compact order, but the default order
+    # pads the integer before the timestamp and the one after the varchar
+    assert row_size(person.columns, values) == 56
+    assert row_size(compact_table(person).columns, values) == 48
+
+
+def test_value_size_short_varlena():
+    """Test short variable-length values take a 1-byte header and no alignment."""
+    assert value_size("varchar(50)", "abc") == (4, 1)
+    assert value_size("NUMERIC", "12.5") == (7, 1)
+    assert value_size("integer", "12") == (4, 4)
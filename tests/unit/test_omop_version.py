@@ -5,6 +5,7 @@ from unittest.mock import Mock, patch
 from omop_lite.settings import Settings
 from omop_lite.db.postgres import PostgresDatabase
 
+
 @pytest.fixture
 def omop_5_4_settings():
     return Settings(
@@ -15,9 +16,10 @@ def omop_5_4_settings():
         db_name="omop",
         schema_name="cdm",
         dialect="postgresql",
-        omop_version="omop5_4"
+        omop_version="omop5_4",
     )
 
+
 @pytest.fixture
 def omop_5_3_settings():
     return Settings(
@@ -28,9 +30,10 @@ def omop_5_3_settings():
         db_name="omop",
         schema_name="cdm",
         dialect="postgresql",
-        omop_version="omop5_3"
+        omop_version="omop5_3",
     )
 
+
 def test_5_3_db(omop_5_3_settings):
     with (
         patch("omop_lite.db.postgres.create_engine") as mock_create_engine,
@@ -50,6 +53,7 @@ def test_5_3_db(omop_5_3_settings):
         assert "EPISODE" not in db.omop_tables
         assert "EPISODE_EVENT" not in db.omop_tables
 
+
 def test_5_4_db(omop_5_4_settings):
     with (
         patch("omop_lite.db.postgres.create_engine") as mock_create_engine,
@@ -0,0 +1,162 @@
+import queue
+
+from omop_lite.db.partitioning import (
+    PartitionInfo,
+    adapt_constraints,
+    adapt_primary_keys,
+    partition_ddl,
+    partition_index_jobs,
+)
+from omop_lite.db.scripts import parse_tables
+from omop_lite.db.streams import QueueReader, iter_chunks, iter_records
+from omop_lite.db.workers import run_parallel
+
+DDL = """
+--HINT DISTRIBUTE ON KEY (person_id)
+CREATE TABLE cdm.measurement (
+\t\t\tmeasurement_id integer NOT NULL,
+\t\t\tperson_id integer NOT NULL,
+\t\t\tmeasurement_date date NOT NULL,
+\t\t\tvalue_as_number NUMERIC NULL );
+--HINT DISTRIBUTE ON RANDOM
+CREATE TABLE cdm.concept (
+\t\t\tconcept_id integer NOT NULL,
+\t\t\tconcept_name varchar(255) NOT NULL );
+"""
+
+
+def test_parse_tables_keeps_hints():
+    """Test that CREATE TABLE statements are parsed with their hints."""
+    measurement, concept = parse_tables(DDL)
+
+    assert measurement.name == "measurement"
+    assert measurement.distribution_key == "person_id"
+    assert measurement.column("value_as_number").type == "NUMERIC"
+    assert measurement.column("measurement_date").nullable is False
+    assert concept.distribution_key is None
+    assert concept.distributed_randomly is True
+
+
+def test_partition_ddl_hash():
+    """Test hash partitioning creates one partition per remainder."""
+    statements = partition_ddl(parse_tables(DDL), "hash", count=2)
+
+    assert statements[0].endswith("PARTITION BY HASH (person_id)")
+    assert statements[1:3] == [
+        "CREATE TABLE cdm.measurement_p0 PARTITION OF cdm.measurement "
+        "FOR VALUES WITH (MODULUS 2, REMAINDER 0)",
+        "CREATE TABLE cdm.measurement_p1 PARTITION OF cdm.measurement "
+        "FOR VALUES WITH (MODULUS 2, REMAINDER 1)",
+    ]
+    assert "PARTITION" not in statements[3]
+
+
+def test_partition_ddl_range():
+    """Test range partitioning creates yearly and default partitions."""
+    statements = partition_ddl(
+        parse_tables(DDL), "range", start_year=2020, end_year=2021
+    )
+
+    assert statements[0].endswith("PARTITION BY RANGE (measurement_date)")
+    assert "FROM ('2021-01-01') TO ('2022-01-01')" in statements[2]
+    assert statements[3] == (
+        "CREATE TABLE cdm.measurement_default PARTITION OF cdm.measurement DEFAULT"
+    )
+
+
+def test_adapt_primary_keys_adds_partition_key():
+    """Test the partition key is added to the primary key of a partitioned table."""
+    statements = adapt_primary_keys(
+        [
+            "ALTER TABLE cdm.measurement ADD CONSTRAINT xpk_measurement PRIMARY KEY (measurement_id)",
+            "ALTER TABLE cdm.concept ADD CONSTRAINT xpk_concept PRIMARY KEY (concept_id)",
+        ],
+        {"measurement": ("person_id",)},
+    )
+
+    assert statements == [
+        "ALTER TABLE cdm.measurement ADD CONSTRAINT xpk_measurement PRIMARY KEY (measurement_id, person_id)",
+        "ALTER TABLE cdm.concept ADD CONSTRAINT xpk_concept PRIMARY KEY (concept_id)",
+    ]
+
+
+def test_adapt_constraints_skips_references_to_partitioned_tables():
+    """Test foreign keys into a partitioned table are left out."""
+    keys = {"person": ("person_id",), "visit_occurrence": ("person_id",)}
+    to_person = (
+        "ALTER TABLE cdm.measurement ADD CONSTRAINT fpk_measurement_person_id "
+        "FOREIGN KEY (person_id) REFERENCES cdm.person (person_id)"
+    )
+    to_visit = (
+        "ALTER TABLE cdm.measurement ADD CONSTRAINT fpk_measurement_visit_occurrence_id "
+        "FOREIGN KEY (visit_occurrence_id) REFERENCES cdm.visit_occurrence (visit_occurrence_id)"
+    )
+
+    assert adapt_constraints([to_person, to_visit], keys) == [to_person]
+
+
+def test_partition_index_jobs():
+    """Test indices on a partitioned table are built and attached per partition."""
+    partitioned = {
+        "measurement": PartitionInfo(
+            key=("person_id",), partitions=["measurement_p0", "measurement_p1"]
+        )
+    }
+    statements = [
+        "CREATE INDEX idx_measurement_person_id ON cdm.measurement (person_id ASC)",
+        "CLUSTER cdm.measurement USING idx_measurement_person_id",
+        "CLUSTER cdm.measurement USING xpk_measurement",
+        "CREATE INDEX idx_concept_code ON cdm.concept (concept_code ASC)",
+    ]
+
+    parents, jobs = partition_index_jobs(statements, partitioned)
+
+    assert parents == [
+        "CREATE INDEX idx_measurement_person_id ON ONLY cdm.measurement (person_id ASC)"
+    ]
+    assert jobs == [
+        ["CREATE INDEX idx_concept_code ON cdm.concept (concept_code ASC)"],
+        [
+            "CREATE INDEX idx_measurement_person_id_p0 ON cdm.measurement_p0 (person_id ASC)",
+            "ALTER INDEX cdm.idx_measurement_person_id ATTACH PARTITION cdm.idx_measurement_person_id_p0",
+            "CLUSTER cdm.measurement_p0 USING idx_measurement_person_id_p0",
+        ],
+        [
+            "CREATE INDEX idx_measurement_person_id_p1 ON cdm.measurement_p1 (person_id ASC)",
+            "ALTER INDEX cdm.idx_measurement_person_id ATTACH PARTITION cdm.idx_measurement_person_id_p1",
+            "CLUSTER cdm.measurement_p1 USING idx_measurement_person_id_p1",
+        ],
+    ]
+
+
+def test_iter_records_keeps_quoted_newlines():
+    """Test a quoted value spanning lines stays in one record."""
+    lines = ['1,"a\n', 'b"\n', "2,c\n"]
+
+    assert list(iter_records(lines, '"')) == ['1,"a\nb"\n', "2,c\n"]
+
+
+def test_queue_reader_reads_chunks():
+    """Test the queue reader joins chunks until the end marker."""
+    chunks = queue.Queue()
+    for chunk in iter_chunks(["a,1\n", "b,2\n", "c,3\n"], size=5):
+        chunks.put(chunk)
+    chunks.put(None)
+    reader = QueueReader(chunks)
+
+    assert reader.readline() == "a,1\n"
+    assert reader.read(6) == "b,2\nc,"
+    assert reader.read() == "3\n"
+    assert reader.read() == ""
+
+
+def test_run_parallel_runs_every_job():
+    """Test a failing job does not stop the others."""
+    done = []
+
+    def fail():
+        raise RuntimeError("boom")
+
+    run_parallel([lambda: done.append(1), fail, lambda: done.append(2)], workers=2)
+
+    assert sorted(done) == [1, 2]
@@ -0,0 +1,45 @@
+"""Unit tests for part file discovery and the load state file."""
+
+from omop_lite.db.parts import LoadState, part_files
+
+
+def test_part_files_in_table_directory(tmp_path):
+    """Test the parts in a table directory are found in name order."""
+    parts = tmp_path / "MEASUREMENT"
+    parts.mkdir()
+    for name in ("part-0001.csv", "part-0000.csv", "_SUCCESS"):
+        (parts / name).write_text("")
+
+    found = part_files(tmp_path, "MEASUREMENT", "{table}/*.csv")
+
+    assert [path.name for path in found] == ["part-0000.csv", "part-0001.csv"]
+
+
+def test_part_files_glob_in_data_dir(tmp_path):
+    """Test a pattern can match parts next to the other data files."""
+    for name in ("MEASUREMENT-0.csv", "MEASUREMENT-1.csv", "PERSON.csv"):
+        (tmp_path / name).write_text("")
+
+    found = part_files(tmp_path, "MEASUREMENT", "{table}-*.csv")
+
+    assert [path.name for path in found] == ["MEASUREMENT-0.csv", "MEASUREMENT-1.csv"]
+
+
+def test_part_files_missing_directory(tmp_path):
+    """Test a table without parts has none."""
+    assert part_files(tmp_path, "MEASUREMENT", "{table}/*.csv") == []
+
+
+def test_load_state_round_trip(tmp_path):
+    """Test the state is saved on update and read back by a new run."""
+    path = tmp_path / "state.json"
+    state = LoadState(path)
+    state.update("MEASUREMENT/part-0000.csv", status="done", attempts=1)
+    state.update("MEASUREMENT/part-0001.csv", status="failed", attempts=3, error="boom")
+
+    resumed = LoadState(path)
+
+    assert resumed.done("MEASUREMENT/part-0000.csv")
+    assert not resumed.done("MEASUREMENT/part-0001.csv")
+    assert resumed.get("MEASUREMENT/part-0001.csv")["error"] == "boom"
+    assert not (tmp_path / "state.json.tmp").exists()
@@ -0,0 +1,192 @@
+"""Unit tests for loading PostgreSQL over asyncio."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from importlib.resources import files
+from unittest.mock import patch
+
+import pytest
+
+from omop_lite.db import create_database
+from omop_lite.db.postgres_async import AsyncPostgresDatabase
+from omop_lite.settings import Settings
+
+
+class FakePool:
+    """An async connection pool recording the COPY statements and data sent."""
+
+    instances: list["FakePool"] = []
+    # Data that fails the COPY it is written to
+    fail_on = ""
+
+    def __init__(self, kwargs, min_size, max_size, open):
+        self.kwargs = kwargs
+        self.max_size = max_size
+        # The data of each COPY stream, by statement
+        self.copies: dict[str, list[list[str]]] = {}
+        self.executed: list[str] = []
+        self.active = 0
+        self.peak = 0
+        FakePool.instances.append(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    @asynccontextmanager
+    async def connection(self):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            yield FakeConnection(self)
+        finally:
+            self.active -= 1
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def execute(self, sql):
+        self.pool.executed.append(sql)
+
+    @asynccontextmanager
+    async def cursor(self):
+        yield self
+
+    @asynccontextmanager
+    async def copy(self, sql):
+        data: list[str] = []
+        self.pool.copies.setdefault(sql, []).append(data)
+
+        class Copy:
+            async def write(inner, chunk):
+                # Give the other loads a turn, as a socket write would
+                await asyncio.sleep(0)
+                if self.pool.fail_on and self.pool.fail_on in chunk:
+                    raise OSError("connection reset")
+                data.append(chunk)
+
+        yield Copy()
+
+
+@pytest.fixture
+def async_db(tmp_path):
+    """Create an AsyncPostgresDatabase with its engine and pool faked."""
+    settings = Settings(
+        db_host="localhost",
+        db_name="omop",
+        schema_name="cdm",
+        dialect="postgresql",
+        load_engine="async",
+        load_workers=2,
+        load_retries=0,
+        data_dir=str(tmp_path),
+    )
+    FakePool.instances = []
+    FakePool.fail_on = ""
+    with (
+        patch("omop_lite.db.postgres.create_engine"),
+        patch("omop_lite.db.postgres.files"),
+        patch("omop_lite.db.postgres.MetaData"),
+        patch("omop_lite.db.postgres_async.AsyncConnectionPool", FakePool),
+    ):
+        db = create_database(settings)
+        db.file_path = files("omop_lite.scripts.pg.omop5_4")
+        yield db
+
+
+def test_create_database_picks_async_engine(async_db):
+    """Test the async engine is created for load_engine async."""
+    assert isinstance(async_db, AsyncPostgresDatabase)
+
+
+def test_async_engine_needs_psycopg():
+    """Test a clear error is raised when psycopg 3 is not installed."""
+    settings = Settings(dialect="postgresql", load_engine="async")
+    with patch("omop_lite.db.postgres_async.AsyncConnectionPool", None):
+        with pytest.raises(ImportError, match="omop-lite\\[async\\]"):
+            AsyncPostgresDatabase(settings)
+
+
+def test_load_parts_streams_files_on_one_loop(async_db, tmp_path):
+    """Test every file is copied, no more than load_workers at once."""
+    parts = []
+    for n in range(6):
+        path = tmp_path / f"part-{n}.csv"
+        path.write_text(f"person_id\tyear_of_birth\n{n}\t19{n}0\n")
+        parts.append(("person", path, True))
+    async_db.settings.read_buffer_size = 4
+
+    failed = []
+    async_db._load_parts(parts, failed)
+
+    pool = FakePool.instances[0]
+    assert pool.max_size == 2
+    assert pool.peak <= 2
+    assert pool.kwargs["dbname"] == "omop"
+    assert failed == []
+    (sql,) = pool.copies
+    assert sql.startswith('COPY cdm.person ("person_id", "year_of_birth") FROM STDIN')
+    streams = sorted("".join(chunks) for chunks in pool.copies[sql])
+    assert streams == [f"{n}\t19{n}0\n" for n in range(6)]
+
+
+def test_load_parts_records_failed_files(async_db, tmp_path):
+    """Test a file that fails to copy is reported while the rest load."""
+    good = tmp_path / "good.csv"
+    good.write_text("person_id\n1\n")
+    bad = tmp_path / "bad.csv"
+    bad.write_text("person_id\nboom\n")
+
+    FakePool.fail_on = "boom"
+
+    failed = []
+    async_db._load_parts([("person", good, True), ("person", bad, True)], failed)
+
+    assert failed == ["PERSON/bad.csv"]
+    pool = FakePool.instances[0]
+    (streams,) = pool.copies.values()
+    assert sorted("".join(chunks) for chunks in streams) == ["", "1\n"]
+
+
+def test_load_parts_retries_only_transient_errors(async_db, tmp_path):
+    """Test a lost connection is retried while an error in the data is not."""
+    lost = tmp_path / "lost.csv"
+    lost.write_text("person_id\n1\n")
+    bad = tmp_path / "bad.csv"
+    bad.write_text("person_id\n2\n")
+    async_db.settings.load_retries = 2
+    errors = {"lost.csv": [ConnectionError("connection reset")]}
+    calls = []
+
+    async def bulk_load(pool, table_name, file_path, header):
+        calls.append(file_path.name)
+        if file_path.name == "bad.csv":
+            raise ValueError("invalid integer")
+        if errors[file_path.name]:
+            raise errors[file_path.name].pop()
+
+    failed = []
+    with patch.object(async_db, "_bulk_load_async", side_effect=bulk_load):
+        async_db._load_parts([("person", lost, True), ("person", bad, True)], failed)
+
+    assert sorted(calls) == ["bad.csv", "lost.csv", "lost.csv"]
+    assert failed == ["PERSON/bad.csv"]
+
+
+def test_load_parts_uses_server_side_copy(async_db, tmp_path):
+    """Test files the server can read are copied by the server itself."""
+    path = tmp_path / "PERSON.csv"
+    path.write_text("person_id\n1\n")
+    async_db.settings.server_side_copy = True
+    async_db.settings.server_data_dir = "/data"
+
+    with patch.object(async_db, "_server_can_read", return_value=True):
+        async_db._load_parts([("person", path, True)], [])
+
+    pool = FakePool.instances[0]
+    assert pool.copies == {}
+    assert "FROM '/data/PERSON.csv'" in pool.executed[0]
@@ -1,9 +1,18 @@
+import io
+import threading
 import pytest
 from unittest.mock import Mock, patch
+from importlib.resources import files
 from pathlib import Path
 
+from sqlalchemy import MetaData
+
 from omop_lite.settings import Settings
+from omop_lite.db.parts import LoadState
+from omop_lite.db.projection import ColumnRule, LoadProfile
 from omop_lite.db.postgres import PostgresDatabase
+from omop_lite.db.retry import is_transient
+from omop_lite.db.sampling import Sample
 
 
 @pytest.fixture
@@ -35,6 +44,8 @@ def mock_postgres_db(postgres_settings):
         mock_metadata.return_value = Mock()
 
         db = PostgresDatabase(postgres_settings)
+        # The bundled scripts, for the columns of the CDM specification
+        db.file_path = files("omop_lite.scripts.pg.omop5_4")
         return db
 
 
@@ -57,6 +68,63 @@ def test_db_url_construction(
     assert db.db_url == expected_url
 
 
+@patch("omop_lite.db.postgres.create_engine")
+@patch("omop_lite.db.postgres.files")
+@patch("omop_lite.db.postgres.MetaData")
+def test_parallel_copy_shares_load_workers_streams(
+    mock_metadata, mock_files, mock_create_engine, postgres_settings
+):
+    """Test a parallel copy only adds the streams other files leave free."""
+    postgres_settings.load_workers = 6
+    db = PostgresDatabase(postgres_settings)
+    assert mock_create_engine.call_args.kwargs["pool_size"] == 6
+
+    copied = []
+
+    def copy_expert(sql, reader):
+        copied.append(reader.read())
+
+    db.engine.raw_connection.return_value.cursor.return_value.copy_expert = copy_expert
+    # The file's own stream, and one held by another file
+    db._streams.acquire()
+    db._streams.acquire()
+
+    db._parallel_copy("COPY", io.StringIO("1\n2\n"))
+
+    assert db.engine.raw_connection.call_count == 5
+    assert "".join(sorted(copied)) == "1\n2\n"
+    # The extra streams are given back, and the two held stay held
+    assert sum(db._streams.acquire(blocking=False) for _ in range(6)) == 4
+
+
+class OperationalError(Exception):
+    """Stands in for a driver's OperationalError, matched by name."""
+
+
+def test_parallel_copy_partial_commit_is_not_retried(mock_postgres_db):
+    """Test a commit failing after another stream committed is not transient."""
+    mock_postgres_db.settings.load_workers = 2
+    mock_postgres_db._streams = threading.BoundedSemaphore(2)
+    good, bad = Mock(), Mock()
+    done = threading.Event()
+    good.commit.side_effect = lambda: done.set()
+
+    def lost():
+        done.wait(5)
+        raise OperationalError("server closed the connection")
+
+    bad.commit.side_effect = lost
+    mock_postgres_db.engine.raw_connection.side_effect = [good, bad]
+    for connection in (good, bad):
+        connection.cursor.return_value.copy_expert = lambda sql, reader: reader.read()
+
+    with pytest.raises(RuntimeError, match="partly loaded") as excinfo:
+        mock_postgres_db._parallel_copy("COPY", io.StringIO("1\n2\n"))
+
+    good.commit.assert_called_once()
+    assert not is_transient(excinfo.value)
+
+
 def test_db_url_with_different_credentials():
     """Test database URL with different credentials."""
     settings = Settings(
@@ -242,3 +310,564 @@ def test_omop_tables_list(mock_postgres_db):
 
     # Test total count
     assert len(mock_postgres_db.omop_tables) == 39
+
+
+def test_online_index_statement_concurrently(mock_postgres_db):
+    """Test that online mode builds indices concurrently."""
+    statement = mock_postgres_db._online_index_statement(
+        "CREATE INDEX idx_gender ON cdm.person (gender_concept_id ASC)"
+    )
+    assert (
+        statement
+        == "CREATE INDEX CONCURRENTLY idx_gender ON cdm.person (gender_concept_id ASC)"
+    )
+
+
+def test_online_index_statement_keeps_on_only(mock_postgres_db):
+    """Test an index on only a partitioned parent is not built concurrently."""
+    statement = "CREATE INDEX idx_x ON ONLY cdm.measurement (person_id ASC)"
+    assert mock_postgres_db._online_index_statement(statement) == statement
+
+
+def test_online_index_statement_skips_cluster(mock_postgres_db):
+    """Test that online mode skips CLUSTER, which blocks reads."""
+    assert (
+        mock_postgres_db._online_index_statement(
+            "CLUSTER cdm.person USING idx_person_id"
+        )
+        is None
+    )
+
+
+def test_create_tables_distributed(mock_postgres_db):
+    """Test distributed mode distributes the tables after creating them."""
+    mock_postgres_db.settings.distributed = True
+    mock_postgres_db.file_path = Mock()
+    ddl = (
+        "--HINT DISTRIBUTE ON KEY (person_id)\n"
+        "CREATE TABLE cdm.person (person_id integer NOT NULL );\n"
+        "--HINT DISTRIBUTE ON RANDOM\n"
+        "CREATE TABLE cdm.concept (concept_id integer NOT NULL );\n"
+    )
+    with (
+        patch.object(mock_postgres_db, "_execute_sql_file"),
+        patch.object(mock_postgres_db, "refresh_metadata"),
+        patch.object(mock_postgres_db, "_read_sql_file", return_value=ddl),
+        patch.object(mock_postgres_db, "_citus_installed", return_value=True),
+        patch.object(mock_postgres_db, "_execute_autocommit") as mock_autocommit,
+    ):
+        mock_postgres_db.create_tables()
+
+    assert [call.args[0] for call in mock_autocommit.call_args_list] == [
+        "SELECT create_distributed_table('cdm.person', 'person_id')",
+        "SELECT create_reference_table('cdm.concept')",
+    ]
+
+
+def test_create_tables_distributed_requires_citus(mock_postgres_db):
+    """Test distributed mode fails without the citus extension."""
+    mock_postgres_db.settings.distributed = True
+    with (
+        patch.object(mock_postgres_db, "_execute_sql_file"),
+        patch.object(mock_postgres_db, "refresh_metadata"),
+        patch.object(mock_postgres_db, "_citus_installed", return_value=False),
+        pytest.raises(RuntimeError, match="citus"),
+    ):
+        mock_postgres_db.create_tables()
+
+
+def test_bulk_load_maps_columns_by_name(mock_postgres_db, tmp_path):
+    """Test COPY names the CSV header columns, so any column order loads."""
+    csv_file = tmp_path / "PERSON.csv"
+    csv_file.write_text("year_of_birth\tPerson_ID\n1970\t1\n")
+    mock_connection = Mock()
+    mock_cursor = Mock()
+    mock_connection.cursor.return_value = mock_cursor
+    mock_postgres_db.engine.raw_connection.return_value = mock_connection
+
+    mock_postgres_db._bulk_load("person", csv_file)
+
+    sql, f = mock_cursor.copy_expert.call_args[0]
+    assert sql.startswith('COPY cdm.person ("year_of_birth", "person_id") FROM STDIN')
+    assert "HEADER" not in sql
+    mock_connection.commit.assert_called_once()
+
+
+def test_bulk_load_strips_byte_order_mark(mock_postgres_db, tmp_path):
+    """Test a UTF-8 byte order mark is not taken as part of the first column."""
+    csv_file = tmp_path / "PERSON.csv"
+    csv_file.write_text("\ufeffperson_id\tyear_of_birth\n1\t1970\n", encoding="utf-8")
+    mock_connection = Mock()
+    mock_cursor = Mock()
+    mock_connection.cursor.return_value = mock_cursor
+    mock_postgres_db.engine.raw_connection.return_value = mock_connection
+
+    mock_postgres_db._bulk_load("person", csv_file)
+
+    sql, f = mock_cursor.copy_expert.call_args[0]
+    assert sql.startswith('COPY cdm.person ("person_id", "year_of_birth") FROM STDIN')
+
+
+def test_bulk_load_synthetic_death_by_position(mock_postgres_db):
+    """Test the bundled DEATH file, whose header is not tab separated, loads."""
+    death = files("omop_lite.synthetic.100").joinpath("DEATH.csv")
+    mock_postgres_db.metadata = MetaData()
+    copied = []
+    mock_connection = Mock()
+    mock_cursor = Mock()
+    mock_cursor.copy_expert.side_effect = lambda sql, f: copied.append((sql, f.read()))
+    mock_connection.cursor.return_value = mock_cursor
+    mock_postgres_db.engine.raw_connection.return_value = mock_connection
+
+    mock_postgres_db._bulk_load("death", death)
+
+    sql, data = copied[0]
+    assert sql.startswith(
+        'COPY cdm.death ("person_id", "death_date", "death_datetime", '
+        '"death_type_concept_id", "cause_concept_id", "cause_source_value", '
+        '"cause_source_concept_id") FROM STDIN'
+    )
+    assert data.startswith("7\t2025-11-16\t\t32822\t37169474\t\t\n")
+
+
+def test_bulk_load_without_header(mock_postgres_db, tmp_path):
+    """Test a part without a header is copied in the CDM specification order."""
+    csv_file = tmp_path / "part-0000.csv"
+    csv_file.write_text("1\t32817\n")
+    copied = []
+    mock_connection = Mock()
+    mock_cursor = Mock()
+    mock_cursor.copy_expert.side_effect = lambda sql, f: copied.append((sql, f.read()))
+    mock_connection.cursor.return_value = mock_cursor
+    mock_postgres_db.engine.raw_connection.return_value = mock_connection
+
+    with patch.object(
+        mock_postgres_db, "_spec_columns", return_value=["note_id", "person_id"]
+    ):
+        mock_postgres_db._bulk_load("note", csv_file, header=False)
+
+    [(sql, data)] = copied
+    assert sql.startswith('COPY cdm.note ("note_id", "person_id") FROM STDIN')
+    assert data == "1\t32817\n"
+
+
+def test_bulk_load_normalises_dates(mock_postgres_db, tmp_path):
+    """Test vocabulary dates are rewritten on the client, never copied server-side."""
+    csv_file = tmp_path / "CONCEPT.csv"
+    csv_file.write_text("concept_id\tvalid_start_date\n1\t19700101\n")
+    mock_postgres_db.settings.normalise_dates = True
+    mock_postgres_db.settings.server_side_copy = True
+    copied = []
+    mock_connection = Mock()
+    mock_cursor = Mock()
+    mock_cursor.copy_expert.side_effect = lambda sql, f: copied.append(f.read())
+    mock_connection.cursor.return_value = mock_cursor
+    mock_postgres_db.engine.raw_connection.return_value = mock_connection
+
+    with patch.object(mock_postgres_db, "_server_path") as mock_server_path:
+        mock_postgres_db._bulk_load("concept", csv_file)
+
+    mock_server_path.assert_not_called()
+    assert copied == ["1\t1970-01-01\n"]
+
+
+def test_bulk_load_quarantines_bad_rows(mock_postgres_db, tmp_path):
+    """Test quarantine mode loads the good rows and rejects the bad one."""
+    csv_file = tmp_path / "PERSON.csv"
+    csv_file.write_text("person_id\n1\nx\n3\n")
+    mock_postgres_db.settings.on_error = "quarantine"
+    mock_postgres_db.settings.reject_file = str(tmp_path / "rejects.csv")
+    mock_postgres_db._rejects.path = tmp_path / "rejects.csv"
+    copied = []
+
+    def copy_expert(sql, f):
+        data = f.read()
+        if "x" in data:
+            raise ValueError('invalid input syntax for type integer: "x"')
+        copied.append(data)
+
+    mock_connection = Mock()
+    mock_cursor = Mock()
+    mock_cursor.copy_expert.side_effect = copy_expert
+    mock_connection.cursor.return_value = mock_cursor
+    mock_postgres_db.engine.raw_connection.return_value = mock_connection
+
+    mock_postgres_db._bulk_load("person", csv_file)
+
+    assert "".join(copied) == "1\n3\n"
+    mock_cursor.execute.assert_any_call("ROLLBACK TO SAVEPOINT quarantine")
+    mock_connection.commit.assert_called_once()
+    rejects = (tmp_path / "rejects.csv").read_text().splitlines()
+    assert rejects[1] == (
+        f'person,{csv_file},3,"invalid input syntax for type integer: ""x""",x'
+    )
+
+
+def test_bulk_load_commits_in_chunks(mock_postgres_db, tmp_path):
+    """Test a file commits chunk by chunk, retrying a transient failure and
+    resuming after the committed rows."""
+    csv_file = tmp_path / "PERSON.csv"
+    csv_file.write_text("person_id\n1\n2\n3\n4\n5\n")
+    mock_postgres_db.settings.commit_rows = 2
+    mock_postgres_db.settings.load_state_file = str(tmp_path / "state.json")
+    mock_postgres_db._state = LoadState(tmp_path / "state.json")
+    copied = []
+    attempts = iter([None, ConnectionResetError("connection reset"), None, None])
+
+    def execute_copy(sql, f=None):
+        error = next(attempts)
+        if error:
+            raise error
+        copied.append(f.read())
+
+    with (
+        patch.object(mock_postgres_db, "_execute_copy", side_effect=execute_copy),
+        patch("omop_lite.db.retry.time.sleep"),
+    ):
+        mock_postgres_db._bulk_load("person", csv_file)
+
+    assert copied == ["1\n2\n", "3\n4\n", "5\n"]
+    assert LoadState(tmp_path / "state.json").get("PERSON/PERSON.csv") == {
+        "status": "loading",
+        "committed_rows": 5,
+    }
+
+    copied.clear()
+    mock_postgres_db._offsets.clear()
+    mock_postgres_db._state.update("PERSON/PERSON.csv", committed_rows=4)
+    with patch.object(
+        mock_postgres_db,
+        "_execute_copy",
+        side_effect=lambda sql, f: copied.append(f.read()),
+    ):
+        mock_postgres_db._bulk_load("person", csv_file)
+
+    assert copied == ["5\n"]
+
+
+def test_bulk_load_streams_stdin(mock_postgres_db):
+    """Test standard input streams from the client even with server-side copy."""
+    mock_postgres_db.settings.server_side_copy = True
+    mock_connection = Mock()
+    mock_cursor = Mock()
+    mock_connection.cursor.return_value = mock_cursor
+    mock_postgres_db.engine.raw_connection.return_value = mock_connection
+
+    with patch("sys.stdin", io.StringIO("person_id\n1\n")):
+        mock_postgres_db._bulk_load("person", "-")
+
+    sql, f = mock_cursor.copy_expert.call_args[0]
+    assert sql.startswith('COPY cdm.person ("person_id") FROM STDIN')
+
+
+def test_load_data_suspends_and_restores_autovacuum(mock_postgres_db):
+    """Test autovacuum is restored and the tables vacuumed after the load."""
+    mock_postgres_db.settings.suspend_autovacuum = True
+    previous = {"person": (None, None)}
+    with (
+        patch.object(
+            mock_postgres_db, "_suspend_autovacuum", return_value=previous
+        ) as mock_suspend,
+        patch("omop_lite.db.base.Database.load_data") as mock_load,
+        patch.object(mock_postgres_db, "_vacuum_analyze") as mock_vacuum,
+        patch.object(mock_postgres_db, "_restore_autovacuum") as mock_restore,
+    ):
+        mock_postgres_db.load_data()
+
+    mock_suspend.assert_called_once()
+    mock_load.assert_called_once()
+    mock_vacuum.assert_called_once()
+    mock_restore.assert_called_once_with(previous)
+
+
+def test_load_data_restores_autovacuum_on_failure(mock_postgres_db):
+    """Test autovacuum is restored, without vacuuming, when the load fails."""
+    mock_postgres_db.settings.suspend_autovacuum = True
+    with (
+        patch.object(mock_postgres_db, "_suspend_autovacuum", return_value={}),
+        patch("omop_lite.db.base.Database.load_data", side_effect=RuntimeError("boom")),
+        patch.object(mock_postgres_db, "_vacuum_analyze") as mock_vacuum,
+        patch.object(mock_postgres_db, "_restore_autovacuum") as mock_restore,
+        pytest.raises(RuntimeError),
+    ):
+        mock_postgres_db.load_data()
+
+    mock_vacuum.assert_not_called()
+    mock_restore.assert_called_once_with({})
+
+
+def test_load_data_restores_autovacuum_when_conversion_pool_fails(mock_postgres_db):
+    """Test autovacuum is restored when the conversion processes fail to start."""
+    mock_postgres_db.settings.suspend_autovacuum = True
+    mock_postgres_db.settings.convert_workers = 2
+    previous = {"person": (None, None)}
+    with (
+        patch.object(mock_postgres_db, "_suspend_autovacuum", return_value=previous),
+        patch("omop_lite.db.postgres.ConversionPool", side_effect=OSError("no spawn")),
+        patch.object(mock_postgres_db, "_restore_autovacuum") as mock_restore,
+        pytest.raises(OSError),
+    ):
+        mock_postgres_db.load_data()
+
+    mock_restore.assert_called_once_with(previous)
+
+
+def test_suspend_autovacuum_restores_altered_tables_on_failure(mock_postgres_db):
+    """Test a failed ALTER puts back the tables already altered, then raises."""
+    connection = Mock()
+    mock_postgres_db.engine.connect.return_value.__enter__ = Mock(
+        return_value=connection
+    )
+    mock_postgres_db.engine.connect.return_value.__exit__ = Mock(return_value=False)
+    connection.execute.return_value = [
+        ("person", None, None),
+        ("death", "true", None),
+    ]
+    with (
+        patch.object(
+            mock_postgres_db,
+            "_execute_autocommit",
+            side_effect=[None, RuntimeError("lock timeout")],
+        ),
+        patch.object(mock_postgres_db, "_restore_autovacuum") as mock_restore,
+        pytest.raises(RuntimeError, match="lock timeout"),
+    ):
+        mock_postgres_db._suspend_autovacuum()
+
+    mock_restore.assert_called_once_with({"person": (None, None)})
+
+
+def test_restore_autovacuum_resets_unset_options(mock_postgres_db):
+    """Test options unset before the load are reset and set ones put back."""
+    with patch.object(mock_postgres_db, "_execute_autocommit") as mock_autocommit:
+        mock_postgres_db._restore_autovacuum(
+            {"person": (None, None), "note": ("true", None)}
+        )
+
+    assert [call.args[0] for call in mock_autocommit.call_args_list] == [
+        'ALTER TABLE "cdm"."person" RESET (autovacuum_enabled, toast.autovacuum_enabled)',
+        'ALTER TABLE "cdm"."note" SET (autovacuum_enabled = true)',
+        'ALTER TABLE "cdm"."note" RESET (toast.autovacuum_enabled)',
+    ]
+
+
+def test_bulk_load_server_side_copy(mock_postgres_db, tmp_path):
+    """Test the server reads the file itself at the mapped path."""
+    csv_file = tmp_path / "PERSON.csv"
+    csv_file.write_text("person_id\n1\n")
+    mock_postgres_db.settings.server_side_copy = True
+    mock_postgres_db.settings.data_dir = str(tmp_path)
+    mock_postgres_db.settings.server_data_dir = "/data"
+    with (
+        patch.object(
+            mock_postgres_db, "_server_can_read", return_value=True
+        ) as mock_check,
+        patch.object(mock_postgres_db, "_execute_copy") as mock_copy,
+    ):
+        mock_postgres_db._bulk_load("person", csv_file)
+        mock_postgres_db._bulk_load("person", csv_file)
+
+    mock_check.assert_called_once_with("/data/PERSON.csv", csv_file.stat().st_size)
+    sql = mock_copy.call_args[0][0]
+    assert "FROM '/data/PERSON.csv'" in sql
+    assert "HEADER" in sql
+
+
+def test_bulk_load_server_side_copy_falls_back(mock_postgres_db, tmp_path):
+    """Test data is streamed from the client when the server cannot read it."""
+    csv_file = tmp_path / "PERSON.csv"
+    csv_file.write_text("person_id\n1\n")
+    mock_postgres_db.settings.server_side_copy = True
+    mock_postgres_db.settings.data_dir = str(tmp_path)
+    with (
+        patch.object(mock_postgres_db, "_server_can_read", return_value=False),
+        patch.object(mock_postgres_db, "_execute_copy") as mock_copy,
+    ):
+        mock_postgres_db._bulk_load("person", csv_file)
+
+    sql, f = mock_copy.call_args[0]
+    assert "FROM STDIN" in sql
+
+
+def test_bulk_load_throttled_streams_from_client(mock_postgres_db, tmp_path):
+    """Test a throttled load reads the file itself, drawing on the throttle."""
+    csv_file = tmp_path / "PERSON.csv"
+    csv_file.write_text("person_id\n1\n2\n")
+    mock_postgres_db.settings.server_side_copy = True
+    mock_postgres_db.settings.data_dir = str(tmp_path)
+    mock_postgres_db._throttle = Mock()
+    copied = []
+    with (
+        patch.object(mock_postgres_db, "_server_can_read", return_value=True),
+        patch.object(
+            mock_postgres_db,
+            "_execute_copy",
+            side_effect=lambda sql, f: copied.append(f.read()),
+        ) as mock_copy,
+    ):
+        mock_postgres_db._bulk_load("person", csv_file)
+
+    assert "FROM STDIN" in mock_copy.call_args[0][0]
+    assert copied == ["1\n2\n"]
+    mock_postgres_db._throttle.consume.assert_called_once_with(4, 2)
+
+
+def test_health_checks_lag_and_io_waits(mock_postgres_db):
+    """Test the server is unhealthy when a replica lags or I/O waits pile up."""
+    connection = Mock()
+    mock_postgres_db.engine.connect.return_value.__enter__ = Mock(
+        return_value=connection
+    )
+    mock_postgres_db.engine.connect.return_value.__exit__ = Mock(return_value=False)
+    mock_postgres_db.settings.max_replication_lag = 10.0
+
+    connection.execute.return_value.one.return_value = (None, 0)
+    assert mock_postgres_db._health() is True
+    connection.execute.return_value.one.return_value = (30.5, 0)
+    assert mock_postgres_db._health() is False
+    connection.execute.return_value.one.return_value = (1.0, 20)
+    assert mock_postgres_db._health() is False
+
+
+def test_bulk_load_converts_on_process_pool(mock_postgres_db, tmp_path):
+    """Test a transformed local file is converted by the load's process pool."""
+    csv_file = tmp_path / "CONCEPT.csv"
+    csv_file.write_text("concept_id\tvalid_start_date\n1\t20000101\n")
+    mock_postgres_db.settings.delimiter = "\t"
+    mock_postgres_db.settings.normalise_dates = True
+    mock_postgres_db._converter = Mock()
+    mock_postgres_db._converter.convert.return_value = iter(["1\t2000-01-01\n"])
+    copied = []
+    with patch.object(
+        mock_postgres_db,
+        "_execute_copy",
+        side_effect=lambda sql, f: copied.append(f.read()),
+    ):
+        mock_postgres_db._bulk_load("concept", csv_file)
+
+    assert copied == ["1\t2000-01-01\n"]
+    args = mock_postgres_db._converter.convert.call_args[0]
+    assert args[:2] == (csv_file, True)
+    assert list(args[2]) == [1]
+
+
+def test_bulk_load_filters_sampled_persons(mock_postgres_db, tmp_path):
+    """Test only the rows of sampled persons are streamed to COPY."""
+    csv_file = tmp_path / "OBSERVATION.csv"
+    csv_file.write_text(
+        'observation_id\tperson_id\tvalue_as_string\n1\t1\ta\n2\t2\t"b"\n3\t3\tc\n'
+    )
+    mock_postgres_db.settings.delimiter = "\t"
+    mock_postgres_db._sample = Sample(person_ids={"2", "3"})
+    copied = []
+    mock_connection = Mock()
+    mock_cursor = Mock()
+    mock_cursor.copy_expert.side_effect = lambda sql, f: copied.append(f.read())
+    mock_connection.cursor.return_value = mock_cursor
+    mock_postgres_db.engine.raw_connection.return_value = mock_connection
+
+    mock_postgres_db._bulk_load("observation", csv_file)
+
+    assert copied == ['2\t2\t"b"\n3\t3\tc\n']
+
+
+def test_bulk_load_projects_profiled_columns(mock_postgres_db, tmp_path):
+    """Test the columns a load profile drops are cut out of the stream and the
+    COPY column list, and the nulled columns load empty."""
+    csv_file = tmp_path / "PERSON.csv"
+    csv_file.write_text(
+        "person_id\tperson_source_value\trace_concept_id\n1\tabc\t8527\n"
+    )
+    mock_postgres_db._profile = LoadProfile(
+        [ColumnRule("*", drop=("*_source_value",), null=("race_concept_id",))]
+    )
+    copied = []
+    mock_connection = Mock()
+    mock_cursor = Mock()
+    mock_cursor.copy_expert.side_effect = lambda sql, f: copied.append((sql, f.read()))
+    mock_connection.cursor.return_value = mock_cursor
+    mock_postgres_db.engine.raw_connection.return_value = mock_connection
+
+    with (
+        patch.object(mock_postgres_db, "_required_columns", return_value={"person_id"}),
+        patch.object(mock_postgres_db, "_reflected_columns", return_value=None),
+    ):
+        mock_postgres_db._bulk_load("person", csv_file)
+
+    [(sql, data)] = copied
+    assert sql.startswith('COPY cdm.person ("person_id", "race_concept_id") FROM')
+    assert data == "1\t\n"
+
+
+def test_bulk_load_tees_into_targets(mock_postgres_db, tmp_path):
+    """Test a file is copied into every target, and a retry only copies into the
+    targets that failed."""
+    csv_file = tmp_path / "PERSON.csv"
+    csv_file.write_text("person_id\n1\n2\n")
+    target = Mock(target_name="staging:5432/omop")
+    mock_postgres_db.targets = [target]
+    copied = {}
+    calls = []
+
+    def connection(name, fail):
+        def connect():
+            calls.append(name)
+            cursor = Mock()
+            if fail and calls.count(name) == 1:
+                cursor.copy_expert.side_effect = ValueError("connection lost")
+            else:
+                cursor.copy_expert.side_effect = lambda sql, f: copied.update(
+                    {name: f.read()}
+                )
+            conn = Mock()
+            conn.cursor.return_value = cursor
+            return conn
+
+        return connect
+
+    mock_postgres_db.engine.raw_connection.side_effect = connection("primary", False)
+    target.engine.raw_connection.side_effect = connection("staging", True)
+
+    with pytest.raises(ValueError):
+        mock_postgres_db._bulk_load("person", csv_file)
+    mock_postgres_db._bulk_load("person", csv_file)
+
+    assert sorted(calls) == ["primary", "staging", "staging"]
+    assert copied == {"primary": "1\n2\n", "staging": "1\n2\n"}
+    assert mock_postgres_db.target_status == {
+        "localhost:5432/omop": {"PERSON/PERSON.csv": "loaded"},
+        "staging:5432/omop": {"PERSON/PERSON.csv": "loaded"},
+    }
+
+
+def test_swap_schema_renames_in_one_transaction(mock_postgres_db):
+    """Test the shadow schema is renamed in, and the old one dropped after."""
+    connection = Mock()
+    calls = []
+
+    def execute(sql, *args):
+        calls.append(str(sql))
+        return Mock()
+
+    connection.execute.side_effect = execute
+    mock_postgres_db.engine.begin.return_value.__enter__ = Mock(return_value=connection)
+    mock_postgres_db.engine.begin.return_value.__exit__ = Mock(
+        side_effect=lambda *args: calls.append("COMMIT")
+    )
+
+    with patch.object(
+        mock_postgres_db,
+        "drop_schema",
+        side_effect=lambda name: calls.append(f"DROP {name}"),
+    ):
+        mock_postgres_db.swap_schema("cdm_new", "cdm_old")
+
+    assert [call for call in calls if not call.startswith("SELECT")] == [
+        "DROP cdm_old_drop",
+        'ALTER SCHEMA "cdm_old" RENAME TO "cdm_old_drop"',
+        'ALTER SCHEMA "cdm" RENAME TO "cdm_swap"',
+        'ALTER SCHEMA "cdm_new" RENAME TO "cdm"',
+        'ALTER SCHEMA "cdm_swap" RENAME TO "cdm_old"',
+        "COMMIT",
+        "DROP cdm_old_drop",
+    ]
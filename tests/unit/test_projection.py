@@ -0,0 +1,58 @@
+"""Unit tests for load profiles that drop or null out columns."""
+
+import pytest
+
+from omop_lite.db.projection import LoadProfile
+from omop_lite.db.scripts import ColumnDefinition, TableDefinition
+
+
+def test_from_file_matches_globs(tmp_path):
+    """Test table and column globs select the columns to drop and null."""
+    path = tmp_path / "profile.toml"
+    path.write_text(
+        '["*"]\ndrop = ["*_source_value"]\n\n[NOTE]\nnull = ["note_text"]\n'
+    )
+
+    profile = LoadProfile.from_file(path)
+
+    assert profile.dropped("PERSON", "gender_source_value")
+    assert not profile.dropped("person", "gender_concept_id")
+    assert profile.nulled("note", "NOTE_TEXT")
+    assert not profile.nulled("note_nlp", "note_text")
+
+
+@pytest.mark.parametrize(
+    "content, message",
+    [
+        ("[person\n", "not valid TOML"),
+        ('person = "x"\n', "must be a table"),
+        ("[person]\nkeep = []\n", "unknown keys"),
+        ("[person]\ndrop = 'x'\n", "list of columns"),
+    ],
+)
+def test_from_file_rejects_invalid_profiles(tmp_path, content, message):
+    """Test a malformed profile says what is wrong with it."""
+    path = tmp_path / "profile.toml"
+    path.write_text(content)
+
+    with pytest.raises(ValueError, match=message):
+        LoadProfile.from_file(path)
+
+
+def test_slim_table_keeps_required_columns(tmp_path):
+    """Test dropped columns are left out of a table unless they are NOT NULL."""
+    path = tmp_path / "profile.toml"
+    path.write_text('[person]\ndrop = ["*_source_value", "person_id"]\n')
+    table = TableDefinition(
+        name="person",
+        qualified_name="cdm.person",
+        columns=(
+            ColumnDefinition("person_id", "integer", nullable=False),
+            ColumnDefinition("person_source_value", "varchar(50)"),
+            ColumnDefinition("year_of_birth", "integer", nullable=False),
+        ),
+    )
+
+    slim = LoadProfile.from_file(path).slim_table(table)
+
+    assert [column.name for column in slim.columns] == ["person_id", "year_of_birth"]
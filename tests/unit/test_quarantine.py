@@ -0,0 +1,63 @@
+"""Unit tests for quarantining bad rows by bisection."""
+
+import csv
+import io
+
+from omop_lite.db.quarantine import (
+    RejectWriter,
+    batches,
+    bisect_load,
+    numbered_records,
+)
+
+
+def test_numbered_records_multiline():
+    """Test records are numbered by the line they start on."""
+    f = io.StringIO('1\t"two\nlines"\n2\tone\n')
+
+    assert list(numbered_records(f, '"', first_line=2)) == [
+        (2, '1\t"two\nlines"\n'),
+        (4, "2\tone\n"),
+    ]
+
+
+def test_batches():
+    """Test records are grouped into batches of the given size."""
+    assert [len(batch) for batch in batches(range(5), size=2)] == [2, 2, 1]
+
+
+def test_bisect_load_isolates_bad_records():
+    """Test every good record loads and only the bad ones are rejected."""
+    loaded = []
+
+    def load(data):
+        if "bad" in data:
+            raise ValueError("invalid input syntax\nCONTEXT: COPY person, line 1")
+        loaded.append(data)
+
+    records = [(n, f"{'bad' if n in (3, 6) else n}\n") for n in range(1, 9)]
+
+    rejects = bisect_load(records, load)
+
+    assert rejects == [
+        (3, "bad\n", "invalid input syntax"),
+        (6, "bad\n", "invalid input syntax"),
+    ]
+    assert sorted("".join(loaded).split()) == sorted(["1", "2", "4", "5", "7", "8"])
+
+
+def test_reject_writer(tmp_path):
+    """Test rejects are appended under a single header."""
+    writer = RejectWriter(tmp_path / "rejects.csv")
+    writer.write("person", "PERSON.csv", [(3, "x\ty\n", "bad row")])
+    writer.write("person", "PERSON.csv", [(9, "z\n", "worse row")])
+    writer.write("person", "PERSON.csv", [])
+
+    with (tmp_path / "rejects.csv").open(newline="") as f:
+        rows = list(csv.reader(f))
+
+    assert rows == [
+        ["table", "file", "line", "reason", "record"],
+        ["person", "PERSON.csv", "3", "bad row", "x\ty"],
+        ["person", "PERSON.csv", "9", "worse row", "z"],
+    ]
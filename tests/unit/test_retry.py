@@ -0,0 +1,67 @@
+"""Unit tests for retrying transient database errors."""
+
+from unittest.mock import Mock, patch
+
+import pytest
+
+from omop_lite.db.retry import is_transient, with_retries
+
+
+class OperationalError(Exception):
+    """Stands in for a driver's OperationalError, matched by name."""
+
+
+def _pg_error(code):
+    error = Exception("error")
+    error.pgcode = code
+    return error
+
+
+def test_is_transient():
+    """Test connection, serialization and deadlock errors are transient."""
+    assert is_transient(_pg_error("40001"))
+    assert is_transient(_pg_error("40P01"))
+    assert is_transient(_pg_error("08006"))
+    assert is_transient(Exception("08S01", "[Microsoft] Communication link failure"))
+    assert is_transient(OperationalError("server closed the connection"))
+    assert is_transient(ConnectionResetError())
+    assert not is_transient(_pg_error("23505"))
+    assert not is_transient(ValueError("bad value"))
+
+
+def test_is_transient_reads_psycopg3_sqlstate():
+    """Test the SQLSTATE of a psycopg 3 error is read from its sqlstate."""
+    error = Exception("error")
+    error.sqlstate = "40P01"
+    assert is_transient(error)
+
+    error.sqlstate = "22P02"
+    assert not is_transient(error)
+
+
+def test_is_transient_unwraps_sqlalchemy_errors():
+    """Test the driver error inside a SQLAlchemy error is classified."""
+    wrapper = Exception("wrapped")
+    wrapper.orig = _pg_error("40001")
+
+    assert is_transient(wrapper)
+
+
+def test_with_retries_backs_off():
+    """Test transient errors are retried with a doubling delay."""
+    call = Mock(side_effect=[ConnectionResetError(), ConnectionResetError(), "done"])
+
+    with patch("omop_lite.db.retry.time.sleep") as mock_sleep:
+        assert with_retries(call, 2, "copying") == "done"
+
+    assert [c.args[0] for c in mock_sleep.call_args_list] == [1.0, 2.0]
+
+
+def test_with_retries_gives_up():
+    """Test other errors, and transient ones past the retries, are raised."""
+    with pytest.raises(ValueError):
+        with_retries(Mock(side_effect=ValueError()), 3, "copying")
+
+    with patch("omop_lite.db.retry.time.sleep"):
+        with pytest.raises(ConnectionResetError):
+            with_retries(Mock(side_effect=ConnectionResetError()), 1, "copying")
@@ -0,0 +1,90 @@
+"""Unit tests for loading a subset of persons and pruning the vocabulary."""
+
+from omop_lite.db.sampling import Sample, read_person_ids
+
+
+def test_keeps_person_is_deterministic():
+    """Test the same fraction picks the same persons, about that many of them."""
+    ids = [str(n) for n in range(10000)]
+
+    picked = {i for i in ids if Sample(0.1).keeps_person(i)}
+
+    assert picked == {i for i in ids if Sample(0.1).keeps_person(i)}
+    assert 800 < len(picked) < 1200
+    # A larger fraction keeps everyone a smaller one did
+    assert picked <= {i for i in ids if Sample(0.5).keeps_person(i)}
+
+
+def test_read_person_ids(tmp_path):
+    """Test person ids are read one per line, skipping a header and blanks."""
+    path = tmp_path / "ids.txt"
+    path.write_text("person_id\n1\n 22 \n\n3\n")
+
+    assert read_person_ids(path) == {"1", "22", "3"}
+
+
+def test_row_filter_by_person_ids():
+    """Test person-keyed rows are kept only for the listed persons."""
+    sample = Sample(person_ids={"1", "3"})
+    keep = sample.row_filter("CONDITION_OCCURRENCE", ["condition_id", "person_id"])
+
+    assert [keep([str(n), str(n)]) for n in range(1, 5)] == [True, False, True, False]
+    assert sample.row_filter("location", ["location_id", "city"]) is None
+
+
+def test_child_rows_follow_parent():
+    """Test NOTE_NLP keeps the rows of the notes that were kept."""
+    sample = Sample(person_ids={"1"})
+    keep_note = sample.row_filter("note", ["note_id", "person_id"])
+    assert keep_note(["10", "1"])
+    assert not keep_note(["20", "2"])
+
+    keep_nlp = sample.row_filter("note_nlp", ["note_nlp_id", "note_id"])
+
+    assert keep_nlp(["1", "10"])
+    assert not keep_nlp(["2", "20"])
+
+
+def test_waves():
+    """Test children load after their parents and the pruned vocabulary last."""
+    sample = Sample(0.5, prune_vocabulary=True)
+
+    waves = sample.waves(
+        ["CONCEPT", "PERSON", "NOTE_NLP", "NOTE", "DRUG_STRENGTH", "CONCEPT_SYNONYM"]
+    )
+
+    assert waves == [
+        ["PERSON", "NOTE"],
+        ["NOTE_NLP"],
+        ["DRUG_STRENGTH"],
+        ["CONCEPT_SYNONYM"],
+        ["CONCEPT"],
+    ]
+    assert Sample(0.5).waves(["CONCEPT", "NOTE_NLP"]) == [["CONCEPT"], ["NOTE_NLP"]]
+
+
+def test_prune_vocabulary():
+    """Test the vocabulary keeps the concepts referenced by the loaded rows."""
+    sample = Sample(prune_vocabulary=True)
+    keep_condition = sample.row_filter(
+        "condition_occurrence", ["person_id", "condition_concept_id"]
+    )
+    assert keep_condition(["1", "100"])
+    keep_strength = sample.row_filter(
+        "drug_strength", ["drug_concept_id", "ingredient_concept_id"]
+    )
+    assert keep_strength(["100", "200"])
+    assert not keep_strength(["300", "400"])
+
+    keep_concept = sample.row_filter("concept", ["concept_id", "concept_name"])
+    keep_relationship = sample.row_filter(
+        "concept_relationship", ["concept_id_1", "concept_id_2"]
+    )
+
+    assert [keep_concept([c, "x"]) for c in ("100", "200", "400")] == [
+        True,
+        True,
+        False,
+    ]
+    assert keep_relationship(["100", "200"])
+    assert not keep_relationship(["100", "400"])
@@ -1,9 +1,11 @@
 import pytest
 from unittest.mock import Mock, patch
+from importlib.resources import files
 from pathlib import Path
 
 from omop_lite.settings import Settings
 from omop_lite.db.sqlserver import SQLServerDatabase
+from omop_lite.db.transforms import iso_date
 
 
 @pytest.fixture
@@ -35,6 +37,8 @@ def mock_sqlserver_db(sqlserver_settings):
         mock_metadata.return_value = Mock()
 
         db = SQLServerDatabase(sqlserver_settings)
+        # The bundled scripts, for the columns of the CDM specification
+        db.file_path = files("omop_lite.scripts.mssql.omop5_4")
         return db
 
 
@@ -291,3 +295,154 @@ def test_column_name_escaping():
     columns = ", ".join(f"[{col}]" for col in headers)
     expected = "[id], [user name], [value]"
     assert columns == expected
+
+
+def test_bulk_load_commits_in_chunks(mock_sqlserver_db, tmp_path):
+    """Test rows are inserted with fast_executemany and committed per chunk."""
+    csv_file = tmp_path / "PERSON.csv"
+    csv_file.write_text("person_id\tyear_of_birth\n1\t1970\n2\n3\t1990\n")
+    mock_sqlserver_db.settings.commit_rows = 2
+    mock_connection = Mock()
+    mock_cursor = Mock()
+    mock_connection.cursor.return_value = mock_cursor
+    mock_sqlserver_db.engine.raw_connection.return_value = mock_connection
+
+    mock_sqlserver_db._bulk_load("person", csv_file)
+
+    assert mock_cursor.fast_executemany is True
+    assert [c.args[1] for c in mock_cursor.executemany.call_args_list] == [
+        [["1", "1970"], ["2", None]],
+        [["3", "1990"]],
+    ]
+    assert mock_connection.commit.call_count == 2
+    assert mock_sqlserver_db._committed_rows("PERSON/PERSON.csv") == 3
+
+
+def test_bulk_load_inserts_row_by_row_without_chunked_commits(
+    mock_sqlserver_db, tmp_path
+):
+    """Test fast_executemany is left off unless chunked commits are asked for."""
+    csv_file = tmp_path / "PERSON.csv"
+    csv_file.write_text("person_id\tyear_of_birth\n1\t\n2\t1980\n3\n")
+    mock_connection = Mock()
+    mock_cursor = Mock()
+    mock_connection.cursor.return_value = mock_cursor
+    mock_sqlserver_db.engine.raw_connection.return_value = mock_connection
+
+    mock_sqlserver_db._bulk_load("person", csv_file)
+
+    assert mock_cursor.fast_executemany is False
+    mock_cursor.executemany.assert_not_called()
+    assert [c.args[1] for c in mock_cursor.execute.call_args_list] == [
+        ["1", ""],
+        ["2", "1980"],
+        ["3", None],
+    ]
+    mock_connection.commit.assert_called_once()
+
+
+def test_rows_pads_short_rows_after_transforms(mock_sqlserver_db):
+    """Test a short row is padded with NULLs the transforms never see."""
+    rows = mock_sqlserver_db._rows(
+        [["1", "20240131"], ["2"]],
+        ["concept_id", "valid_start_date", "valid_end_date"],
+        {1: iso_date, 2: iso_date},
+        2,
+    )
+
+    assert list(rows) == [
+        (2, ["1", "2024-01-31", None]),
+        (3, ["2", None, None]),
+    ]
+
+
+def test_insert_rows_quarantines_bad_rows(mock_sqlserver_db):
+    """Test a failing batch is bisected under savepoints down to the bad row."""
+    mock_sqlserver_db.settings.on_error = "quarantine"
+    mock_connection = Mock()
+    mock_cursor = Mock()
+    mock_connection.cursor.return_value = mock_cursor
+    mock_sqlserver_db.engine.raw_connection.return_value = mock_connection
+    mock_cursor.execute.return_value.fetchone.return_value = (1,)
+
+    def executemany(sql, rows):
+        if ["x", "1980"] in rows:
+            raise Exception("Conversion failed\nmore detail")
+
+    mock_cursor.executemany.side_effect = executemany
+    rows = [(2, ["1", "1970"]), (3, ["x", "1980"]), (4, ["3", "1990"])]
+
+    rejects = mock_sqlserver_db._insert_rows("INSERT", rows, "\t")
+
+    assert rejects == [(3, "x\t1980", "Conversion failed")]
+    assert [c.args[1] for c in mock_cursor.executemany.call_args_list] == [
+        [["1", "1970"], ["x", "1980"], ["3", "1990"]],
+        [["1", "1970"]],
+        [["x", "1980"], ["3", "1990"]],
+        [["x", "1980"]],
+        [["3", "1990"]],
+    ]
+    mock_cursor.execute.assert_any_call("ROLLBACK TRANSACTION quarantine")
+    mock_connection.commit.assert_called_once()
+
+
+def test_insert_rows_raises_when_transaction_is_doomed(mock_sqlserver_db):
+    """Test an error that dooms the transaction fails the chunk rather than bisect."""
+    mock_sqlserver_db.settings.on_error = "quarantine"
+    mock_connection = Mock()
+    mock_cursor = Mock()
+    mock_connection.cursor.return_value = mock_cursor
+    mock_sqlserver_db.engine.raw_connection.return_value = mock_connection
+    mock_cursor.execute.return_value.fetchone.return_value = (-1,)
+    mock_cursor.executemany.side_effect = Exception("deadlock")
+
+    with pytest.raises(Exception, match="deadlock"):
+        mock_sqlserver_db._insert_rows("INSERT", [(2, ["1"]), (3, ["2"])], "\t")
+
+    assert mock_cursor.executemany.call_count == 1
+    mock_connection.commit.assert_not_called()
+
+
+def test_online_index_statement(mock_sqlserver_db):
+    """Test that online mode adds ONLINE = ON where supported."""
+    mock_sqlserver_db._online_supported = True
+    statement = mock_sqlserver_db._online_index_statement(
+        "CREATE INDEX idx_gender ON cdm.person (gender_concept_id ASC)"
+    )
+    assert statement.endswith("WITH (ONLINE = ON)")
+
+
+def test_online_index_statement_unsupported_edition(mock_sqlserver_db):
+    """Test that online mode falls back to offline builds on other editions."""
+    mock_sqlserver_db._online_supported = False
+    statement = "CREATE INDEX idx_gender ON cdm.person (gender_concept_id ASC)"
+    assert mock_sqlserver_db._online_index_statement(statement) == statement
+
+
+def test_swap_schema_transfers_tables(mock_sqlserver_db):
+    """Test the tables are moved between schemas in one transaction."""
+    connection = Mock()
+    mock_sqlserver_db.engine.begin.return_value.__enter__ = Mock(
+        return_value=connection
+    )
+    mock_sqlserver_db.engine.begin.return_value.__exit__ = Mock(return_value=False)
+    tables = {"cdm": ["person"], "cdm_new": ["person"], "cdm_swap": ["person"]}
+
+    with (
+        patch.object(mock_sqlserver_db, "drop_schema"),
+        patch.object(
+            SQLServerDatabase,
+            "_schema_tables",
+            side_effect=lambda connection, schema: tables[schema],
+        ),
+    ):
+        mock_sqlserver_db.swap_schema("cdm_new", "cdm_old")
+
+    statements = [str(call.args[0]) for call in connection.execute.call_args_list]
+    transfers = [s for s in statements if "TRANSFER" in s]
+    assert transfers == [
+        "ALTER SCHEMA [cdm_swap] TRANSFER [cdm].[person]",
+        "ALTER SCHEMA [cdm] TRANSFER [cdm_new].[person]",
+        "ALTER SCHEMA [cdm_old] TRANSFER [cdm_swap].[person]",
+    ]
+    assert statements[-2:] == ["DROP SCHEMA [cdm_swap]", "DROP SCHEMA [cdm_new]"]
@@ -0,0 +1,53 @@
+from importlib.resources import files
+
+from omop_lite.db.scripts import SCHEMA_PLACEHOLDER, parse_tables
+from omop_lite.db.storage import storage_statements, text_columns
+
+
+def _tables():
+    ddl = files("omop_lite.scripts.pg.omop5_4").joinpath("ddl.sql").read_text()
+    return parse_tables(ddl.replace(SCHEMA_PLACEHOLDER, "cdm"))
+
+
+def test_text_columns_of_note_tables():
+    """Test only the long text columns of NOTE and NOTE_NLP are picked."""
+    columns = {table.name: text_columns(table) for table in _tables()}
+
+    assert columns["note"] == ["note_title", "note_text"]
+    assert columns["note_nlp"] == [
+        "snippet",
+        "lexical_variant",
+        "nlp_system",
+        "term_modifiers",
+    ]
+    assert columns["concept"] == []
+
+
+def test_storage_statements():
+    """Test compression, toast_tuple_target and fillfactor statements."""
+    tables = [table for table in _tables() if table.name in ("note", "person")]
+
+    statements = storage_statements(
+        tables, compression="lz4", toast_tuple_target=4080, fillfactor=100
+    )
+
+    assert statements == [
+        "ALTER TABLE cdm.person SET (fillfactor = 100)",
+        "ALTER TABLE cdm.note ALTER COLUMN note_title SET COMPRESSION lz4",
+        "ALTER TABLE cdm.note ALTER COLUMN note_text SET COMPRESSION lz4",
+        "ALTER TABLE cdm.note SET (fillfactor = 100, toast_tuple_target = 4080)",
+    ]
+
+
+def test_storage_statements_on_partitions():
+    """Test storage parameters of a partitioned table go to its partitions."""
+    note = next(table for table in _tables() if table.name == "note")
+
+    statements = storage_statements(
+        [note], fillfactor=90, partitions={"note": ["note_p0", "note_p1"]}
+    )
+
+    assert statements == [
+        "ALTER TABLE cdm.note_p0 SET (fillfactor = 90)",
+        "ALTER TABLE cdm.note_p1 SET (fillfactor = 90)",
+    ]
@@ -0,0 +1,61 @@
+"""Unit tests for the streams data is fed to the database through."""
+
+import io
+import threading
+
+import pytest
+
+from omop_lite.db.streams import ReadAheadReader
+
+
+def test_read_ahead_reader_reads_whole_file():
+    """Test the file reads back the same in lines and in reads of any size."""
+    data = "".join(f"{n}\tvalue {n}\n" for n in range(1000))
+
+    with ReadAheadReader.from_file(io.StringIO(data), size=64, buffers=2) as f:
+        assert f.readline() == "0\tvalue 0\n"
+        assert f.read(5) == "1\tval"
+        assert f.read() == data[len("0\tvalue 0\n1\tval") :]
+
+
+def test_read_ahead_reader_bounds_buffers():
+    """Test the reading thread waits once its buffers are full."""
+    produced = []
+    release = threading.Event()
+
+    def chunks():
+        for n in range(10):
+            produced.append(n)
+            yield f"{n}\n"
+        release.set()
+
+    with ReadAheadReader(chunks(), buffers=2) as f:
+        assert not release.wait(0.05)
+        # Two buffers queued, and a third waiting to be put
+        assert len(produced) <= 3
+        assert list(f) == [f"{n}\n" for n in range(10)]
+
+
+def test_read_ahead_reader_raises_producer_errors():
+    """Test an error reading ahead is raised where the data ends."""
+
+    def chunks():
+        yield "1\n"
+        raise OSError("connection reset")
+
+    with ReadAheadReader(chunks()) as f:
+        assert f.readline() == "1\n"
+        with pytest.raises(OSError, match="connection reset"):
+            f.read()
+
+
+def test_read_ahead_reader_close_stops_producer():
+    """Test closing before the end stops the thread rather than blocking it."""
+    chunks = (f"{n}\n" for n in range(1000))
+
+    f = ReadAheadReader(chunks, buffers=1)
+    assert f.readline() == "0\n"
+    f.close()
+
+    assert not f._thread.is_alive()
+    assert len(list(chunks)) > 0
@@ -0,0 +1,107 @@
+"""Unit tests for capping the load rate."""
+
+import io
+import time
+from unittest.mock import Mock
+
+from omop_lite.db.throttle import MIN_FACTOR, Throttle, ThrottledReader, TokenBucket
+
+
+def test_token_bucket_sleeps_off_debt(monkeypatch):
+    """Test taking beyond the burst sleeps for the excess at the bucket's rate."""
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    bucket = TokenBucket(100)
+
+    bucket.take(100)
+    assert sleeps == []
+    bucket.take(50)
+
+    assert len(sleeps) == 1
+    assert 0.49 <= sleeps[0] <= 0.5
+
+
+def test_throttle_backs_off_and_recovers(monkeypatch):
+    """Test the rates halve while unhealthy and grow back up to the caps."""
+    monkeypatch.setattr(time, "sleep", lambda seconds: None)
+    healthy = [False, False, True]
+    throttle = Throttle(
+        bytes_per_second=1000,
+        rows_per_second=10,
+        health=lambda: healthy.pop(0) if healthy else True,
+        interval=0,
+    )
+
+    throttle.consume(1, 1)
+    assert throttle.factor == 0.5
+    throttle.consume(1, 1)
+    assert throttle.factor == 0.25
+    assert throttle._bytes.rate == 250
+    assert throttle._rows.rate == 2.5
+
+    for _ in range(10):
+        throttle.consume(1, 1)
+    assert throttle.factor == 1.0
+    assert throttle._bytes.rate == 1000
+
+
+def test_throttle_learns_rate_without_caps(monkeypatch):
+    """Test an uncapped throttle backs off from the observed rate, then lifts."""
+    monkeypatch.setattr(time, "sleep", lambda seconds: None)
+    healthy = [False]
+    throttle = Throttle(health=lambda: healthy.pop(0) if healthy else True, interval=0)
+
+    throttle.consume(1000)
+    assert throttle._bytes is not None
+    assert throttle._rows is None
+
+    for _ in range(10):
+        throttle.consume(1000)
+    assert throttle._bytes is None
+
+
+def test_throttle_backoff_has_a_floor(monkeypatch):
+    """Test the rate never backs off below the minimum fraction."""
+    monkeypatch.setattr(time, "sleep", lambda seconds: None)
+    throttle = Throttle(bytes_per_second=1000, health=lambda: False, interval=0)
+
+    for _ in range(20):
+        throttle.consume(1)
+
+    assert throttle.factor == MIN_FACTOR
+
+
+def test_throttle_assumes_healthy_when_check_fails(monkeypatch):
+    """Test a failing health check leaves the rate as it is."""
+    monkeypatch.setattr(time, "sleep", lambda seconds: None)
+    throttle = Throttle(
+        bytes_per_second=1000, health=Mock(side_effect=OSError("down")), interval=0
+    )
+
+    throttle.consume(1)
+
+    assert throttle.factor == 1.0
+
+
+def test_throttled_reader_counts_bytes_and_rows():
+    """Test the reader passes data through and draws its size and lines."""
+    throttle = Mock()
+    reader = ThrottledReader(io.StringIO("a\tb\nc\td\ne"), throttle)
+
+    assert list(reader) == ["a\tb\n", "c\td\n", "e"]
+    assert [c.args for c in throttle.consume.call_args_list] == [
+        (4, 1),
+        (4, 1),
+        (1, 0),
+    ]
+
+
+def test_throttled_reader_feeds_counter_without_throttle():
+    """Test the reader counts what it reads when there is only a counter."""
+    counted = []
+    reader = ThrottledReader(
+        io.StringIO("a\nb\n"), None, lambda size, rows: counted.append((size, rows))
+    )
+
+    assert reader.read() == "a\nb\n"
+    assert counted == [(4, 2)]
@@ -0,0 +1,58 @@
+"""Unit tests for the streaming column transforms."""
+
+import io
+
+from omop_lite.db.streams import ChunkReader, iter_records
+from omop_lite.db.transforms import (
+    column_transforms,
+    iso_date,
+    transform_chunks,
+    transform_records,
+)
+
+
+def test_iso_date():
+    """Test YYYYMMDD dates are rewritten and anything else kept."""
+    assert iso_date("19700101") == "1970-01-01"
+    assert iso_date("2099-12-31") == "2099-12-31"
+    assert iso_date("") == ""
+
+
+def test_column_transforms_by_position():
+    """Test transforms are found by column name, in the file's column order."""
+    transforms = column_transforms(
+        "CONCEPT", ["concept_id", "Valid_End_Date", "valid_start_date"]
+    )
+
+    assert sorted(transforms) == [1, 2]
+    assert column_transforms("person", ["person_id"]) == {}
+
+
+def test_transform_records_quoted():
+    """Test quoted records keep their delimiters and newlines."""
+    transforms = {1: iso_date}
+    records = ["1\t19700101\tplain\n", '2\t20991231\t"tab\there\nand newline"\n']
+
+    assert transform_records(records, transforms, "\t", '"') == (
+        "1\t1970-01-01\tplain\n" '2\t2099-12-31\t"tab\there\nand newline"\n'
+    )
+
+
+def test_transform_chunks_stream():
+    """Test a file streams through the transforms in batches."""
+    f = io.StringIO("1\t19700101\n2\t19700102\n3\t\n")
+    reader = ChunkReader(
+        transform_chunks(iter_records(f, '"'), {1: iso_date}, "\t", '"', batch=2)
+    )
+
+    assert reader.readline() == "1\t1970-01-01\n"
+    assert reader.read() == "2\t1970-01-02\n3\t\n"
+
+
+def test_transform_records_projects_columns():
+    """Test only the projected fields are kept, of quoted records too."""
+    records = ["1\tx\ta\n", '2\t"y\tz"\tb\n']
+
+    assert transform_records(records, {}, "\t", '"', positions=[2, 0]) == (
+        "a\t1\nb\t2\n"
+    )
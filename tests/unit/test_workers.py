@@ -0,0 +1,88 @@
+"""Unit tests for running load and index jobs concurrently."""
+
+import threading
+import time
+
+from omop_lite.db.workers import HillClimber, Throughput, run_adaptive
+
+
+def test_hill_climber_climbs_while_throughput_improves():
+    """Test workers are added while each step is faster than the last."""
+    climber = HillClimber(1, 4)
+
+    assert climber.update(10) == 2
+    assert climber.update(20) == 3
+    assert climber.update(30) == 4
+    # Beyond the bound, so it turns back
+    assert climber.update(40) == 3
+    assert climber.best == (4, 40)
+
+
+def test_hill_climber_turns_back_when_throughput_drops():
+    """Test a step that is no faster is undone."""
+    climber = HillClimber(1, 8, start=2)
+
+    assert climber.update(20) == 3
+    assert climber.update(30) == 4
+    assert climber.update(25) == 3
+    # Fewer workers did better, so it keeps going down
+    assert climber.update(35) == 2
+    assert climber.update(20) == 3
+
+
+def test_hill_climber_stays_in_bounds():
+    """Test the start and every step are kept within the bounds."""
+    climber = HillClimber(1, 2, start=5)
+    assert climber.workers == 2
+
+    steps = [climber.update(10) for _ in range(5)]
+
+    assert set(steps) <= {1, 2}
+
+
+def test_throughput_counts_per_table():
+    """Test bytes and rows add up per table and in total."""
+    throughput = Throughput()
+    throughput.add("person", 10, 1)
+    throughput.add("person", 5, 1)
+    throughput.add("visit_occurrence", 7)
+
+    assert throughput.bytes["person"] == 15
+    assert throughput.rows["person"] == 2
+    assert throughput.total() == 22
+
+
+def test_run_adaptive_runs_every_job_within_bounds():
+    """Test all jobs run, never more at once than the workers allowed."""
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+    ran = []
+
+    def job(n):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.005)
+        with lock:
+            running -= 1
+            ran.append(n)
+
+    workers = run_adaptive([lambda n=n: job(n) for n in range(40)], 3, interval=0.01)
+
+    assert sorted(ran) == list(range(40))
+    assert 1 <= workers <= 3
+    assert peak <= 3
+
+
+def test_run_adaptive_logs_failures_and_carries_on():
+    """Test a failing job does not stop the rest."""
+    ran = []
+
+    def fail():
+        raise ValueError("bad file")
+
+    run_adaptive([fail, lambda: ran.append(1), lambda: ran.append(2)], 2, interval=0.01)
+
+    assert sorted(ran) == [1, 2]
@@ -23,12 +23,14 @@ with psycopg.connect(uri) as conn:
     print("Connected to database\n")
     print("Materialising text-search column")
     conn.execute(
-            f"""ALTER TABLE {SCHEMA_NAME}.concept
+        f"""ALTER TABLE {SCHEMA_NAME}.concept
                 ADD COLUMN concept_name_tsv tsvector
                 GENERATED ALWAYS AS (to_tsvector('english', concept_name)) STORED;"""
-            )
+    )
     print("Creating text-search index")
-    conn.execute(f"CREATE INDEX idx_concept_fts ON {SCHEMA_NAME}.concept USING GIN (concept_name_tsv);")
+    conn.execute(
+        f"CREATE INDEX idx_concept_fts ON {SCHEMA_NAME}.concept USING GIN (concept_name_tsv);"
+    )
 
 with psycopg.connect(uri) as conn:
     print("Connected to database\n")